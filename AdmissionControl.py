@@ -0,0 +1,179 @@
+"""
+AdmissionControl.py - 准入控制與背壓
+以設定的容量上限（連線數、房間數、等待人數）決定是否接受新連線與新房間，
+超過房間上限的配對請求排入有上限的等待佇列並回報排隊位置與預估等待時間；
+另以共用排程器量測背景工作的延遲（事件迴圈負載），延遲過高時拒絕新負載
+"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+from Config import Config
+
+# 尚無房間結束紀錄時，預估一場對戰佔用房間的秒數
+DEFAULT_ROOM_LIFETIME = 120.0
+
+# 延遲與房間時長的指數移動平均權重
+EWMA_WEIGHT = 0.2
+
+
+class AdmissionControl:
+    """
+    准入控制
+    - allow_connect() / room_available() 依容量上限判斷是否接受
+    - enqueue() / pop() / remove() 管理等待配對的佇列（依加入順序）
+    - overloaded 依量測到的延遲判斷是否應拒絕新負載
+    """
+
+    def __init__(self, max_sockets: int = 0, max_rooms: int = 0, max_queue: int = 0,
+                 shed_latency: float = 0, probe_interval: float = 0.5,
+                 time_func: Callable[[], float] = time.monotonic):
+        """
+        初始化准入控制
+
+        Args:
+            max_sockets: 同時連線數上限（0 為不限）
+            max_rooms: 房間數上限（0 為不限）
+            max_queue: 等待配對的人數上限（0 代表不排隊，直接拒絕）
+            shed_latency: 量測延遲超過此秒數時拒絕新負載（0 為停用）
+            probe_interval: 延遲量測的間隔秒數
+            time_func: 取得目前時間的函式（測試時可替換）
+        """
+        self.max_sockets = max_sockets
+        self.max_rooms = max_rooms
+        self.max_queue = max_queue
+        self.shed_latency = shed_latency
+        self.probe_interval = probe_interval
+        self.time_func = time_func
+        self.latency = 0.0  # 量測延遲的移動平均（秒）
+        self.room_lifetime = DEFAULT_ROOM_LIFETIME  # 房間佔用時長的移動平均（秒）
+        self.shed_count = 0  # 因容量或延遲而拒絕的次數
+        self._queue: Dict[str, float] = {}  # {sid: 加入佇列時間}，dict 保持加入順序
+        self._probing = False
+
+    @property
+    def overloaded(self) -> bool:
+        """量測延遲是否超過門檻"""
+        return self.shed_latency > 0 and self.latency > self.shed_latency
+
+    def allow_connect(self, connected: int) -> bool:
+        """
+        判斷是否接受新連線
+
+        Args:
+            connected: 目前連線數
+
+        Returns:
+            bool: 是否接受（拒絕時計入 shed_count）
+        """
+        if self.overloaded or (self.max_sockets and connected >= self.max_sockets):
+            self.shed_count += 1
+            return False
+        return True
+
+    def room_available(self, room_count: int) -> bool:
+        """
+        判斷是否還能建立新房間
+
+        Args:
+            room_count: 目前房間數
+        """
+        return not self.max_rooms or room_count < self.max_rooms
+
+    def enqueue(self, sid: str) -> Optional[int]:
+        """
+        將玩家排入等待佇列（已在佇列中時維持原位置）
+
+        Args:
+            sid: Socket ID
+
+        Returns:
+            Optional[int]: 排隊位置（從 1 開始），佇列已滿或過載時返回 None
+        """
+        if sid in self._queue:
+            return self.position(sid)
+        if self.overloaded or len(self._queue) >= self.max_queue:
+            self.shed_count += 1
+            return None
+        self._queue[sid] = self.time_func()
+        return len(self._queue)
+
+    def position(self, sid: str) -> Optional[int]:
+        """取得玩家的排隊位置（從 1 開始），不在佇列中時返回 None"""
+        for position, queued in enumerate(self._queue, 1):
+            if queued == sid:
+                return position
+        return None
+
+    def remove(self, sid: str) -> bool:
+        """將玩家移出佇列（斷線時），返回是否原本在佇列中"""
+        return self._queue.pop(sid, None) is not None
+
+    def pop(self) -> Optional[str]:
+        """取出排在最前面的玩家"""
+        for sid in self._queue:
+            del self._queue[sid]
+            return sid
+        return None
+
+    def queued(self) -> List[str]:
+        """依排隊順序列出佇列中的玩家"""
+        return list(self._queue)
+
+    def __len__(self) -> int:
+        """等待中的人數"""
+        return len(self._queue)
+
+    def eta(self, position: int) -> float:
+        """
+        預估排在 position 的玩家還要等多久（秒）
+
+        每結束一個房間可讓兩位排隊玩家配成一組，
+        因此約需等待 ceil(position / 2) 個房間結束，並由 max_rooms 個房間同時消化
+
+        Args:
+            position: 排隊位置（從 1 開始）
+        """
+        rooms_needed = (position + 1) // 2
+        return round(rooms_needed * self.room_lifetime / max(self.max_rooms, 1), 1)
+
+    def record_room_closed(self, lifetime: float):
+        """
+        記錄一個房間從建立到解散的時長（更新預估等待時間）
+
+        Args:
+            lifetime: 房間存在的秒數
+        """
+        self.room_lifetime += EWMA_WEIGHT * (lifetime - self.room_lifetime)
+
+    def record_latency(self, seconds: float):
+        """記錄一次延遲量測"""
+        self.latency += EWMA_WEIGHT * (max(seconds, 0.0) - self.latency)
+
+    def start(self, scheduler):
+        """
+        以共用排程器定期量測延遲：計時器實際觸發時間比預定晚多少，即代表背景工作被拖慢多久
+        （停用延遲門檻時不量測；同一個實例只會啟動一次）
+
+        Args:
+            scheduler: 共用計時排程器
+        """
+        if self.shed_latency <= 0 or self._probing:
+            return
+        self._probing = True
+
+        def probe(expected):
+            now = self.time_func()
+            self.record_latency(now - expected)
+            scheduler.schedule(self.probe_interval, probe, now + self.probe_interval)
+
+        scheduler.schedule(self.probe_interval, probe, self.time_func() + self.probe_interval)
+
+
+# 全域准入控制實例 (singleton pattern)
+admission = AdmissionControl(
+    max_sockets=Config.MAX_SOCKETS,
+    max_rooms=Config.MAX_ROOMS,
+    max_queue=Config.MAX_QUEUED_JOINERS,
+    shed_latency=Config.SHED_LATENCY
+)
@@ -0,0 +1,164 @@
+"""
+AssetPipeline.py - 靜態資源指紋與預先壓縮
+啟動時計算 static/ 下 CSS / JS 的內容雜湊，產生帶指紋的網址，
+並預先壓縮成 gzip（與 brotli，若已安裝），
+以 immutable 長效快取與 ETag 提供，請求時不再做任何壓縮
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional
+
+from flask import Response, abort, request, url_for
+
+try:
+    import brotli  # 選用套件：pip install brotli
+except ImportError:
+    brotli = None
+
+# 需要處理的副檔名
+ASSET_EXTENSIONS = ('.css', '.js')
+
+# 指紋長度（十六進位字元數）
+HASH_LENGTH = 12
+
+# 帶指紋的網址內容永不改變，可快取一年
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+
+class Asset:
+    """單一靜態資源的建置結果"""
+
+    __slots__ = ('filename', 'hashed_name', 'etag', 'mimetype', 'encodings')
+
+    def __init__(self, filename: str, hashed_name: str, etag: str, mimetype: str,
+                 encodings: Dict[str, bytes]):
+        self.filename = filename  # 原始路徑，例如 css/main.css
+        self.hashed_name = hashed_name  # 帶指紋的路徑，例如 css/main.0123456789ab.css
+        self.etag = etag
+        self.mimetype = mimetype
+        self.encodings = encodings  # {'identity' | 'gzip' | 'br': 內容}
+
+
+class AssetPipeline:
+    """
+    靜態資源管線
+    - build() 建立 {原始路徑: Asset} 與 {指紋路徑: Asset} 對照
+    - asset_url() 供模板產生帶指紋的網址（找不到時退回一般 static 網址）
+    - serve() 依 Accept-Encoding 回傳預先壓縮的內容，If-None-Match 相符時回 304
+    """
+
+    def __init__(self, static_folder: str):
+        """
+        初始化資源管線
+
+        Args:
+            static_folder: 靜態檔案根目錄
+        """
+        self.static_folder = static_folder
+        self.assets: Dict[str, Asset] = {}
+        self.hashed: Dict[str, Asset] = {}
+
+    def build(self) -> int:
+        """
+        掃描並建置所有靜態資源
+
+        Returns:
+            int: 建置的檔案數
+        """
+        assets, hashed = {}, {}
+        for root, _, files in os.walk(self.static_folder):
+            for name in sorted(files):
+                if not name.endswith(ASSET_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    asset = self._build_asset(filename, f.read())
+                assets[filename] = asset
+                hashed[asset.hashed_name] = asset
+        # 建好後一次替換，避免請求看到建到一半的對照表
+        self.assets, self.hashed = assets, hashed
+        return len(assets)
+
+    @staticmethod
+    def _build_asset(filename: str, data: bytes) -> Asset:
+        """計算指紋並預先壓縮單一檔案（壓縮後沒有變小的編碼不保留）"""
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        stem, ext = os.path.splitext(filename)
+        encodings = {'identity': data}
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            encodings['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                encodings['br'] = compressed
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        return Asset(filename, f'{stem}.{digest}{ext}', digest, mimetype, encodings)
+
+    def asset_url(self, filename: str) -> str:
+        """
+        取得靜態資源的網址（模板使用）
+
+        Args:
+            filename: 相對於 static/ 的路徑，例如 'css/main.css'
+
+        Returns:
+            str: 帶指紋的網址；未建置的檔案退回 url_for('static')
+        """
+        asset = self.assets.get(filename)
+        if asset is None:
+            return url_for('static', filename=filename)
+        return url_for('asset', filename=asset.hashed_name)
+
+    def serve(self, filename: str) -> Response:
+        """
+        回傳帶指紋的靜態資源
+
+        Args:
+            filename: 帶指紋的路徑
+
+        Returns:
+            Response: 預先壓縮的內容或 304
+        """
+        asset = self.hashed.get(filename)
+        if asset is None:
+            abort(404)
+
+        headers = {
+            'Cache-Control': IMMUTABLE_CACHE,
+            'ETag': f'"{asset.etag}"',
+            'Vary': 'Accept-Encoding',
+        }
+        if asset.etag in request.if_none_match:
+            return Response(status=304, headers=headers)
+
+        encoding = self._choose_encoding(asset)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(asset.encodings[encoding], mimetype=asset.mimetype, headers=headers)
+
+    @staticmethod
+    def _choose_encoding(asset: Asset) -> str:
+        """依客戶端 Accept-Encoding 選擇最小的可用編碼（br > gzip > identity）"""
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in asset.encodings and accepted[encoding] > 0:
+                return encoding
+        return 'identity'
+
+    def init_app(self, app, enabled: bool = True):
+        """
+        建置資源並註冊 /assets 路由與模板函式 asset_url
+
+        Args:
+            app: Flask 應用
+            enabled: False 時模板的 asset_url 直接使用 url_for('static')（開發時方便即時修改）
+        """
+        if enabled:
+            self.build()
+        app.add_url_rule('/assets/<path:filename>', 'asset', self.serve)
+        app.jinja_env.globals['asset_url'] = self.asset_url
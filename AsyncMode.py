@@ -0,0 +1,29 @@
+"""
+AsyncMode.py - 事件迴圈模式（eventlet / gevent）下的阻塞工作
+monkey patch 後 threading 建立的是協程，SQLite 寫入、編譯禁用字清單等阻塞或 CPU 密集的工作
+若直接在協程中執行會卡住整個事件迴圈；offload() 把這類工作交給 OS 執行緒池，只讓呼叫的協程等待
+"""
+
+from typing import Callable
+
+from Config import Config
+
+
+def offload(func: Callable, *args):
+    """
+    在 OS 執行緒中執行阻塞工作並回傳結果（threading 模式下本來就是 OS 執行緒，直接呼叫）
+
+    Args:
+        func: 阻塞的函式
+        *args: 傳給 func 的參數
+
+    Returns:
+        func 的回傳值（func 拋出的例外會在呼叫端重新拋出）
+    """
+    if Config.ASYNC_MODE == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args)
+    if Config.ASYNC_MODE == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(func, args)
+    return func(*args)
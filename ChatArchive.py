@@ -0,0 +1,261 @@
+"""
+ChatArchive.py - 聊天紀錄封存與搜尋
+聊天訊息先放入記憶體佇列，由背景寫入執行緒批次寫入 SQLite，
+並以 FTS5（trigram，支援中文子字串）建立全文索引供管理員搜尋
+（sqlite3 只在啟用封存時才載入，未設定路徑的部署不需付出載入成本；
+事件迴圈模式下 SQLite 呼叫一律經 AsyncMode.offload 在 OS 執行緒中執行）
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from AsyncMode import offload
+from Config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    room_id TEXT,
+    username TEXT NOT NULL,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_time ON messages(created_at);
+CREATE INDEX IF NOT EXISTS idx_messages_room_time ON messages(room_id, created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    message, username, content='messages', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, message, username) VALUES (new.id, new.message, new.username);
+END;
+"""
+
+# trigram 索引最短可搜尋的字數，較短的關鍵字改用 LIKE
+MIN_FTS_QUERY = 3
+
+# 較短的關鍵字（LIKE 逐筆比對）必須指定房間，且時間範圍不可超過此秒數
+SHORT_QUERY_WINDOW = 86400
+
+# 大廳訊息在資料庫中的 room_id
+LOBBY_ROOM_ID = 'lobby'
+
+
+class ChatArchive:
+    """
+    聊天紀錄封存
+    - archive() 只把訊息放進佇列（佇列滿時丟棄並計數），不會阻塞聊天事件處理
+    - 背景執行緒每累積 batch_size 則或每 flush_interval 秒寫入一次（單一交易）
+    - search() 以 FTS5 搜尋關鍵字，可依房間與時間範圍過濾，以 id 分頁
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_queue: int = 100000):
+        """
+        初始化聊天封存
+
+        Args:
+            path: SQLite 檔案路徑，空字串代表停用
+            batch_size: 單次寫入最多訊息數
+            flush_interval: 佇列沒有新訊息時最久等待秒數
+            max_queue: 佇列上限（超過時丟棄新訊息）
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0  # 因佇列已滿而丟棄的訊息數
+        self.written = 0  # 已寫入的訊息數
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def enabled(self) -> bool:
+        """是否啟用封存"""
+        return bool(self.path)
+
+    @property
+    def running(self) -> bool:
+        """背景寫入執行緒是否在執行"""
+        return self._running and self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """建立資料表並啟動背景寫入執行緒（停用或已啟動時不做任何事）"""
+        if not self.enabled or self._running:
+            return
+        offload(self._create_schema)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='ChatArchiveWriter', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """寫完佇列中的訊息後停止背景寫入執行緒"""
+        if not self._running:
+            return
+        self._running = False
+        self._thread.join()
+        self._thread = None
+
+    def _connect(self) -> 'sqlite3.Connection':
+        """
+        開啟資料庫連線（WAL 模式，讀寫互不阻塞）
+        寫入執行緒的連線會交給 offload 的執行緒池使用（同一時間只有一個執行緒使用），不限定建立的執行緒
+        """
+        import sqlite3
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def archive(self, room_id: Optional[str], username: str, message: str,
+                created_at: Optional[float] = None):
+        """
+        將一則訊息放入封存佇列
+
+        Args:
+            room_id: 房間 ID，None 代表大廳
+            username: 發送者名稱
+            message: 訊息內容
+            created_at: 發送時間（epoch 秒），預設為目前時間
+        """
+        if not self._running:
+            return
+        try:
+            self._queue.put_nowait((room_id or LOBBY_ROOM_ID, username, message, created_at or time.time()))
+        except queue.Full:
+            self.dropped += 1
+
+    def pending_count(self) -> int:
+        """尚未寫入的訊息數"""
+        return self._queue.qsize()
+
+    def flush(self):
+        """等待佇列中的訊息全部寫入"""
+        if self._running:
+            self._queue.join()
+
+    def _run(self):
+        """背景寫入迴圈"""
+        import sqlite3
+        conn = offload(self._connect)
+        try:
+            while self._running or not self._queue.empty():
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    offload(self._write, conn, batch)
+                except sqlite3.Error:  # 寫入失敗不可中斷寫入執行緒
+                    # 整批失敗時逐筆重寫，只丟棄本身無法寫入的訊息
+                    for row in batch:
+                        try:
+                            offload(self._write, conn, [row])
+                        except sqlite3.Error:
+                            logger.exception('聊天紀錄寫入失敗（房間 %s）', row[0])
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            conn.close()
+
+    def _create_schema(self):
+        """建立資料表與全文索引（已存在時不做任何事）"""
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _query(self, sql: str, params: list) -> list:
+        """以獨立的連線執行查詢"""
+        import sqlite3
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _write(self, conn: 'sqlite3.Connection', rows: list):
+        """以單一交易寫入多則訊息（失敗時整批回滾）"""
+        with conn:
+            conn.executemany(
+                'INSERT INTO messages (room_id, username, message, created_at) VALUES (?, ?, ?, ?)',
+                rows
+            )
+        self.written += len(rows)
+
+    def search(self, query: Optional[str] = None, room_id: Optional[str] = None,
+               since: Optional[float] = None, until: Optional[float] = None,
+               limit: int = 50, before_id: Optional[int] = None) -> List[dict]:
+        """
+        搜尋封存的訊息（由新到舊）
+
+        Args:
+            query: 關鍵字（子字串比對），None 代表不限
+            room_id: 房間 ID（'lobby' 為大廳），None 代表所有房間
+            since: 起始時間（epoch 秒，含）
+            until: 結束時間（epoch 秒，不含）
+            limit: 最多筆數
+            before_id: 只回傳 id 小於此值的訊息（分頁用，帶入上一頁最後一筆的 id）
+
+        Returns:
+            List[dict]: 訊息列表 {'id', 'room_id', 'username', 'message', 'created_at'}
+
+        Raises:
+            ValueError: 關鍵字少於 MIN_FTS_QUERY 個字，卻沒有指定房間與 SHORT_QUERY_WINDOW 內的時間範圍
+        """
+        if query and len(query) < MIN_FTS_QUERY:
+            # 無法使用全文索引：只在單一房間的有限時間範圍內掃描（room_id, created_at 索引），不掃整個資料表
+            end = until if until is not None else time.time()
+            if room_id is None or since is None or end - since > SHORT_QUERY_WINDOW:
+                raise ValueError(f'少於 {MIN_FTS_QUERY} 個字的關鍵字需指定房間與 {SHORT_QUERY_WINDOW} 秒內的時間範圍')
+        conditions, params = [], []
+        if query and len(query) >= MIN_FTS_QUERY:
+            # 以片語搜尋，避免使用者輸入被解析成 FTS 語法
+            source = 'messages_fts JOIN messages m ON m.id = messages_fts.rowid'
+            conditions.append('messages_fts MATCH ?')
+            params.append('"' + query.replace('"', '""') + '"')
+        else:
+            source = 'messages m'
+            if query:
+                conditions.append("m.message LIKE ? ESCAPE '\\'")
+                escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                params.append(f'%{escaped}%')
+        if room_id is not None:
+            conditions.append('m.room_id = ?')
+            params.append(room_id)
+        if since is not None:
+            conditions.append('m.created_at >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('m.created_at < ?')
+            params.append(until)
+        if before_id is not None:
+            conditions.append('m.id < ?')
+            params.append(before_id)
+
+        sql = f'SELECT m.id, m.room_id, m.username, m.message, m.created_at FROM {source}'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY m.id DESC LIMIT ?'
+        params.append(limit)
+
+        rows = offload(self._query, sql, params)
+        return [
+            {'id': row[0], 'room_id': row[1], 'username': row[2], 'message': row[3], 'created_at': row[4]}
+            for row in rows
+        ]
+
+
+# 全域聊天封存實例 (singleton pattern)
+chat_archive = ChatArchive(Config.CHAT_ARCHIVE_PATH, batch_size=Config.CHAT_ARCHIVE_BATCH)
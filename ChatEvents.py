@@ -1,41 +1,166 @@
 """
 chat_events.py - 聊天室事件處理
 負責處理聊天消息的即時通訊
+（訊息只送到發送者所在的房間；未進入房間的玩家共用大廳頻道）
 """
 
-from flask import session
-from flask_socketio import emit
+from flask import request
+from flask_socketio import emit, join_room, leave_room
 from datetime import datetime
+from typing import Optional
+from Config import Config
+from RateLimiter import rate_limiter
+from Metrics import metrics
+from RoomManager import room_manager
+from IdentityRegistry import identities
+from MessageCoalescer import MessageCoalescer
+from ChatArchive import chat_archive
+from ChatFilter import chat_filter
+from TimerScheduler import shared_scheduler
+
+# 大廳頻道的 Socket.IO room 名稱
+LOBBY_ROOM = 'lobby'
+
+# 聊天訊息合併器：同一房間短時間內的多則訊息以單一 'chat messages' 事件送出
+chat_coalescer = MessageCoalescer(
+    'chat message', 'chat messages',
+    window=Config.CHAT_COALESCE_WINDOW,
+    max_batch=Config.CHAT_COALESCE_MAX
+)
 
 
 def register_chat_events(socketio):
     """
     註冊聊天相關的 Socket.IO 事件
-    
+
     Args:
         socketio: SocketIO 實例
     """
-    
+    chat_coalescer.start(socketio, shared_scheduler)
+
     @socketio.on('chat message')
+    @metrics.timed('chat message')
     def handle_chat_message(msg):
         """
         處理聊天消息
-        
+
         Args:
             msg: 聊天消息內容
         """
-        if isinstance(msg, dict):
-            message = msg.get('message', '')
-            username = session.get('user') or msg.get('username') or '隱藏玩家'
-            time_str = msg.get('time') or datetime.now().strftime('%H:%M:%S')
-        else:
-            message = str(msg)
-            username = session.get('user', '隱藏玩家')
-            time_str = datetime.now().strftime('%H:%M:%S')
-
-        # 廣播給所有人
-        emit('chat message', {
-            'username': username,
-            'message': message,
-            'time': time_str
-        }, broadcast=True)
+        # 超出頻率限制的訊息直接丟棄，不做任何廣播
+        if not rate_limiter.allow(request.sid, 'chat message'):
+            return
+
+        # 不在房間且大廳頻道關閉時，沒有可送達的對象
+        room_id = room_manager.get_room_by_sid(request.sid)
+        if room_id is None and not Config.LOBBY_CHAT:
+            return
+
+        # 訊息內容必須是字串（數字轉成字串），其他型別直接丟棄
+        data = validate_chat_data(msg)
+        if data is None:
+            return
+        message, time_str = data
+
+        # 名稱一律取自連線時登記的身分，不採信客戶端送來的 username
+        username = identities.get(request.sid).username or '隱藏玩家'
+
+        # 遮蔽禁用字（單次線性掃描）
+        message = chat_filter.censor(message)
+
+        post_chat_message(room_id, username, message, time_str)
+
+
+def validate_chat_data(msg):
+    """
+    驗證聊天 payload
+
+    Args:
+        msg: 訊息字串，或 { message: <內容>, time: <顯示時間，選用> }
+
+    Returns:
+        Optional[tuple]: (訊息內容, 顯示時間或 None)，內容不是字串或數字時返回 None
+    """
+    if isinstance(msg, dict):
+        message = msg.get('message', '')
+        time_str = msg.get('time')
+    else:
+        message, time_str = msg, None
+    # bool 是 int 的子類別，需排除
+    if isinstance(message, (int, float)) and not isinstance(message, bool):
+        message = str(message)
+    if not isinstance(message, str):
+        return None
+    if not isinstance(time_str, str):
+        time_str = None
+    return message, time_str
+
+
+def post_chat_message(room_id: Optional[str], username: str, message: str, time_str: Optional[str] = None):
+    """
+    發送聊天訊息到房間（或大廳）並記錄到歷史（經由合併器送出，並放入封存佇列）
+
+    Args:
+        room_id: 房間 ID，None 代表大廳
+        username: 發送者名稱（系統訊息為 '系統'）
+        message: 訊息內容
+        time_str: 顯示時間，預設為目前時間
+    """
+    entry = {
+        'username': username,
+        'message': message,
+        'time': time_str or datetime.now().strftime('%H:%M:%S')
+    }
+    room_manager.add_chat_message(room_id, entry)
+    chat_coalescer.post(room_id or LOBBY_ROOM, entry)
+    chat_archive.archive(room_id, username, message)
+
+
+def join_chat_room(room_id: Optional[str], sid: Optional[str] = None):
+    """
+    加入房間（或大廳）的聊天頻道並送出聊天歷史
+    （先送出合併器中尚未送出的訊息，避免新成員同時從歷史與合併批次收到同一則）
+
+    Args:
+        room_id: 房間 ID，None 代表大廳
+        sid: Socket ID，預設為目前連線
+    """
+    sid = sid or request.sid
+    chat_coalescer.flush(room_id or LOBBY_ROOM)
+    join_room(room_id or LOBBY_ROOM, sid=sid)
+    send_chat_history(room_id, sid)
+
+
+def send_chat_history(room_id: Optional[str], sid: str):
+    """
+    以單一事件送出房間（或大廳）的最近聊天訊息（沒有訊息時不送）
+
+    Args:
+        room_id: 房間 ID，None 代表大廳
+        sid: 接收者 Socket ID
+    """
+    messages = room_manager.get_chat_history(room_id)
+    if messages:
+        emit('chat history', {'room_id': room_id, 'messages': messages}, room=sid)
+
+
+def enter_lobby(sid: Optional[str] = None):
+    """
+    加入大廳頻道並送出大廳的聊天歷史（大廳頻道關閉時不做任何事）
+
+    Args:
+        sid: Socket ID，預設為目前連線
+    """
+    if Config.LOBBY_CHAT:
+        join_chat_room(None, sid)
+
+
+def leave_lobby(sid: Optional[str] = None):
+    """
+    離開大廳頻道（進入房間後只收房間內的聊天）
+
+    Args:
+        sid: Socket ID，預設為目前連線
+    """
+    if Config.LOBBY_CHAT:
+        leave_room(LOBBY_ROOM, sid=sid or request.sid)
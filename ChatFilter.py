@@ -0,0 +1,229 @@
+"""
+ChatFilter.py - 聊天禁用字過濾
+將禁用字清單編譯成 Aho-Corasick 自動機，每則訊息只需線性掃描一次；
+重新載入清單時先建好新的自動機再整個替換，過濾中的訊息不受影響
+（讀檔與編譯經 AsyncMode.offload 在 OS 執行緒中進行，事件迴圈模式下不會卡住其他連線）
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from AsyncMode import offload
+from Config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick 多字串比對自動機（建立後唯讀，可在多執行緒間共用）
+    - 比對不分大小寫
+    - 每個節點記錄「結束於此節點的最長禁用字長度」（含 fail 鏈），遮蔽時只需此值
+    """
+
+    __slots__ = ('_goto', '_fail', '_match_len', 'word_count')
+
+    def __init__(self, words: Iterable[str]):
+        """
+        編譯禁用字清單
+
+        Args:
+            words: 禁用字（空字串會被略過）
+        """
+        self._goto: List[Dict[str, int]] = [{}]  # 各節點的轉移表
+        self._fail: List[int] = [0]  # 各節點的失敗轉移
+        self._match_len: List[int] = [0]  # 結束於該節點的最長禁用字長度（0 代表沒有）
+        self.word_count = 0
+
+        for word in words:
+            word = _fold(word.strip())
+            if not word:
+                continue
+            node = 0
+            for ch in word:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._match_len.append(0)
+                node = nxt
+            self._match_len[node] = max(self._match_len[node], len(word))
+            self.word_count += 1
+
+        # 以 BFS 建立 fail 連結，並沿 fail 鏈合併最長長度
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._match_len[nxt] = max(self._match_len[nxt], self._match_len[self._fail[nxt]])
+                pending.append(nxt)
+
+    def find(self, text: str) -> List[tuple]:
+        """
+        找出所有禁用字出現的位置
+
+        Args:
+            text: 要掃描的文字
+
+        Returns:
+            List[tuple]: [(起始位置, 結束位置（不含）), ...]，同一結束位置只回報最長的一個
+        """
+        goto, fail, match_len = self._goto, self._fail, self._match_len
+        spans = []
+        node = 0
+        for i, ch in enumerate(_fold(text)):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            length = match_len[node]
+            if length:
+                spans.append((i + 1 - length, i + 1))
+        return spans
+
+
+def _fold(text: str) -> str:
+    """轉小寫（僅在長度不變時，確保位置與原文對齊）"""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+class ChatFilter:
+    """
+    聊天禁用字過濾器
+    - censor() 以目前的自動機遮蔽禁用字（未載入清單時原樣返回）
+    - reload() 建好新的自動機後一次替換參考，讀取端不需加鎖
+    - watch() 透過共用排程器定期檢查清單檔案，修改後在背景執行緒編譯，完成後回到排程器替換
+    """
+
+    def __init__(self, path: str = '', mask: str = '*'):
+        """
+        初始化過濾器
+
+        Args:
+            path: 禁用字清單檔案（每行一個字，# 開頭為註解），空字串代表停用
+            mask: 遮蔽用的字元
+        """
+        self.path = path
+        self.mask = mask
+        self._automaton: Optional[AhoCorasick] = None
+        self._mtime: Optional[float] = None
+        self._watching = False
+        self._worker: Optional[threading.Thread] = None  # 編譯中的背景執行緒
+
+    @property
+    def word_count(self) -> int:
+        """目前載入的禁用字數"""
+        automaton = self._automaton
+        return automaton.word_count if automaton else 0
+
+    def censor(self, text: str) -> str:
+        """
+        將訊息中的禁用字替換為遮蔽字元
+
+        Args:
+            text: 訊息內容
+
+        Returns:
+            str: 遮蔽後的訊息（不是字串時原樣返回，由呼叫端驗證型別）
+        """
+        automaton = self._automaton
+        if automaton is None or not text or not isinstance(text, str):
+            return text
+        spans = automaton.find(text)
+        if not spans:
+            return text
+
+        chars = list(text)
+        covered = 0  # 已遮蔽到的位置（spans 依結束位置遞增）
+        for start, end in spans:
+            for i in range(max(start, covered), end):
+                chars[i] = self.mask
+            covered = max(covered, end)
+        return ''.join(chars)
+
+    def reload(self, words: Optional[Iterable[str]] = None) -> int:
+        """
+        重新編譯禁用字清單並替換目前的自動機
+
+        Args:
+            words: 禁用字清單，None 代表從 path 讀取
+
+        Returns:
+            int: 載入的禁用字數
+        """
+        if words is None:
+            if not self.path:
+                return 0
+            self._mtime = os.path.getmtime(self.path)
+            automaton = offload(self._compile_file)
+        else:
+            automaton = offload(AhoCorasick, words)
+        self._automaton = automaton  # 單一參考替換，censor() 不會看到建到一半的狀態
+        return automaton.word_count
+
+    def _compile_file(self) -> AhoCorasick:
+        """讀取清單檔案並編譯成自動機"""
+        return AhoCorasick(self._read_words())
+
+    def _read_words(self) -> List[str]:
+        """讀取清單檔案（略過空行與 # 開頭的註解）"""
+        with open(self.path, encoding='utf-8') as f:
+            return [line for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    def watch(self, scheduler, interval: float):
+        """
+        以共用排程器定期檢查清單檔案
+        （排程器只比對修改時間；讀檔與編譯在背景執行緒進行，大型清單不會卡住步時計時器等其他計時器，
+        編譯完成後再排回排程器替換自動機）
+
+        Args:
+            scheduler: 共用計時排程器
+            interval: 檢查間隔秒數（<= 0 代表不檢查；同一個過濾器只會啟動一次）
+        """
+        if not self.path or interval <= 0 or self._watching:
+            return
+        self._watching = True
+
+        def install(automaton: Optional[AhoCorasick], mtime: Optional[float]):
+            self._worker = None
+            if automaton is not None:
+                self._automaton = automaton
+                self._mtime = mtime
+
+        def compile_words(mtime: float):
+            try:
+                automaton = offload(self._compile_file)
+            except (OSError, UnicodeDecodeError):  # 讀取失敗時保留舊清單（下次檢查再試）
+                logger.exception('禁用字清單重新載入失敗')
+                automaton = None
+            scheduler.schedule(0, install, automaton, mtime)
+
+        def check():
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = self._mtime
+            # 編譯中不重複啟動；修改時間在讀檔前取得，編譯期間再次修改會在下次檢查重新載入
+            if mtime != self._mtime and self._worker is None:
+                self._worker = threading.Thread(target=compile_words, args=(mtime,),
+                                                name='ChatFilterReload', daemon=True)
+                self._worker.start()
+            scheduler.schedule(interval, check)
+
+        scheduler.schedule(interval, check)
+
+
+# 全域過濾器實例 (singleton pattern)
+chat_filter = ChatFilter(Config.CHAT_FILTER_PATH)
@@ -9,3 +9,33 @@ class Config:
     HOST = os.getenv('HOST', '0.0.0.0') # 允許外部訪問
     FLASK_RUN_PORT = int(os.getenv('FLASK_RUN_PORT', 5000)) # 預設端口
     DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 'yes') # 僅用於開發環境
+    BINARY_CODEC = os.getenv('BINARY_CODEC', 'True').lower() in ('true', '1', 'yes') # 允許客戶端協商二進位編碼
+    ACTION_BATCH_LIMIT = int(os.getenv('ACTION_BATCH_LIMIT', 16)) # 單一 batch action 最多包含的 action 數
+    ASYNC_MODE = os.getenv('ASYNC_MODE', 'threading') # Socket.IO 非同步模式：threading / eventlet / gevent
+    TURN_TIME_LIMIT = float(os.getenv('TURN_TIME_LIMIT', 30)) # 單步限時秒數（0 為不限時）
+    MATCH_TIME_BASE = float(os.getenv('MATCH_TIME_BASE', 300)) # 每位玩家整場比賽的時間秒數（0 為不限時）
+    MATCH_TIME_INCREMENT = float(os.getenv('MATCH_TIME_INCREMENT', 2)) # 每下一步加秒
+    MOVE_RATE = float(os.getenv('MOVE_RATE', 5)) # 每個連線每秒可下棋次數（0 為不限流）
+    MOVE_BURST = float(os.getenv('MOVE_BURST', 10)) # 下棋事件可瞬間累積的次數
+    CHAT_RATE = float(os.getenv('CHAT_RATE', 2)) # 每個連線每秒可送出的聊天訊息數（0 為不限流）
+    CHAT_BURST = float(os.getenv('CHAT_BURST', 5)) # 聊天訊息可瞬間累積的則數
+    CHAT_HISTORY_SIZE = int(os.getenv('CHAT_HISTORY_SIZE', 50)) # 每個房間（及大廳）保留的最近聊天訊息數
+    LOBBY_CHAT = os.getenv('LOBBY_CHAT', 'True').lower() in ('true', '1', 'yes') # 未進入房間的玩家可在大廳頻道聊天
+    CHAT_COALESCE_WINDOW = float(os.getenv('CHAT_COALESCE_WINDOW', 0.03)) # 同一房間的聊天訊息合併送出的時間窗秒數（0 為不合併）
+    CHAT_COALESCE_MAX = int(os.getenv('CHAT_COALESCE_MAX', 20)) # 單批合併的最多訊息數
+    CHAT_ARCHIVE_PATH = os.getenv('CHAT_ARCHIVE_PATH', '') # 聊天紀錄封存的 SQLite 檔案路徑（留空則不封存）
+    CHAT_ARCHIVE_BATCH = int(os.getenv('CHAT_ARCHIVE_BATCH', 500)) # 背景寫入單次最多訊息數
+    CHAT_FILTER_PATH = os.getenv('CHAT_FILTER_PATH', '') # 禁用字清單檔案（每行一個字，留空則不過濾）
+    CHAT_FILTER_RELOAD_INTERVAL = float(os.getenv('CHAT_FILTER_RELOAD_INTERVAL', 5)) # 檢查清單檔案是否修改的間隔秒數（0 為不自動重新載入）
+    ASSET_PIPELINE = os.getenv('ASSET_PIPELINE', 'True').lower() in ('true', '1', 'yes') # 啟動時為 CSS / JS 加上指紋並預先壓縮（修改靜態檔後需重新啟動）
+    PAGE_CACHE = os.getenv('PAGE_CACHE', 'True').lower() in ('true', '1', 'yes') # 登入頁與首頁以預先渲染的片段快取（修改模板後需重新啟動）
+    MAX_SOCKETS = int(os.getenv('MAX_SOCKETS', 0)) # 同時連線數上限（0 為不限）
+    MAX_ROOMS = int(os.getenv('MAX_ROOMS', 1)) # 同時進行的房間數上限（0 為不限；預設 1 即單組對戰）
+    MAX_QUEUED_JOINERS = int(os.getenv('MAX_QUEUED_JOINERS', 50)) # 房間已滿時可排隊等待配對的人數（0 為不排隊，直接拒絕）
+    SHED_LATENCY = float(os.getenv('SHED_LATENCY', 0.5)) # 量測到的背景工作延遲超過此秒數時拒絕新連線與新房間（0 為停用）
+    SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', '') # 排空時保存對戰房間的快照檔（新行程啟動時載入，留空則不保存）
+    RESUME_GRACE = float(os.getenv('RESUME_GRACE', 30)) # 載入快照後等待玩家重新連線的秒數（逾時解散房間）
+    RECONNECT_GRACE = float(os.getenv('RECONNECT_GRACE', 15)) # 對戰中斷線的玩家保留座位的秒數（0 為不保留，直接判定離開）
+    OUTBOUND_QUEUE_LIMIT = int(os.getenv('OUTBOUND_QUEUE_LIMIT', 100)) # 單一連線尚未送出的封包數上限，超過即略過遊戲事件改為稍後重新同步（0 為停用）
+    OUTBOUND_STALE_TIMEOUT = float(os.getenv('OUTBOUND_STALE_TIMEOUT', 10)) # 連線持續超過上限多少秒即中斷
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '') # 管理端點（/admin/...）的存取權杖，留空則停用
@@ -4,7 +4,7 @@ Game.py - 井字遊戲核心邏輯類別
 """
 
 from enum import Enum
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 class Player(Enum):
@@ -36,19 +36,69 @@ class Game:
         [(0, 0), (1, 1), (2, 2)], [(0, 2), (1, 1), (2, 0)]                            # 對角
     ]
     
-    def __init__(self):
-        """初始化 - 設定空白棋盤和遊戲狀態"""
-        self.board = [[None] * 3 for _ in range(3)]  # 3x3棋盤用二維陣列存
+    # 各棋盤尺寸的連線索引快取：{size: (所有連線, {(row, col): 經過該格的連線})}
+    _LINE_INDEX = {}
+    
+    def __init__(self, size: int = 3):
+        """
+        初始化 - 設定空白棋盤和遊戲狀態
+        
+        Args:
+            size: 棋盤邊長（預設 3，即 3x3；N x N 需連滿整條線才算贏）
+        """
+        self.size = size
+        self.win_conditions, self._cell_lines = self._get_line_index(size)
+        self.board = [[None] * size for _ in range(size)]  # NxN棋盤用二維陣列存
         self.turn = Player.X.value              # 固定X永遠先手
         self.winner = None                     # 贏家是誰
+        self.winning_lines = []                 # 獲勝連線（判定勝負時記錄）
+        self.move_count = 0                     # 已下棋步數（判斷平局用）
+        self.moves: List[Tuple[int, int]] = []  # 本局依序的下棋座標（重新連線時補送錯過的移動）
         self.started = False                    # 遊戲開始了沒
+        self.version = 0                        # 狀態版本號（每次變動 +1，供房間快取判斷）
+        self.generation = 0                     # 棋局代數（每次 reset +1，辨識客戶端看到的是不是同一局）
+    
+    @classmethod
+    def _get_line_index(cls, size: int):
+        """
+        取得指定尺寸的所有連線及「格子 → 經過的連線」索引（每種尺寸只建一次）
+        
+        Args:
+            size: 棋盤邊長
+            
+        Returns:
+            tuple: (所有連線列表, {(row, col): [連線, ...]})
+        """
+        index = cls._LINE_INDEX.get(size)
+        if index is None:
+            if size == 3:
+                lines = cls.WIN_CONDITIONS
+            else:
+                lines = [[(row, col) for col in range(size)] for row in range(size)]  # 橫排
+                lines += [[(row, col) for row in range(size)] for col in range(size)]  # 直排
+                lines.append([(i, i) for i in range(size)])                            # 主對角
+                lines.append([(i, size - 1 - i) for i in range(size)])                 # 副對角
+            
+            cell_lines = {(row, col): [] for row in range(size) for col in range(size)}
+            for line in lines:
+                for pos in line:
+                    cell_lines[pos].append(line)
+            
+            index = (lines, cell_lines)
+            cls._LINE_INDEX[size] = index
+        return index
     
     def reset(self):
         """清空棋盤，重新開始"""
-        self.board = [[None] * 3 for _ in range(3)]
+        self.board = [[None] * self.size for _ in range(self.size)]
         self.turn = Player.X.value
         self.winner = None
+        self.winning_lines = []
+        self.move_count = 0
+        self.moves = []
         self.started = False
+        self.version += 1
+        self.generation += 1
     
     def start(self):
         """開始遊戲"""
@@ -66,7 +116,7 @@ class Game:
             return False
         
         # 驗證座標
-        if not (0 <= row < 3 and 0 <= col < 3):
+        if not (0 <= row < self.size and 0 <= col < self.size):
             return False
         if self.board[row][col] is not None:
             return False
@@ -74,32 +124,71 @@ class Game:
         # 執行移動
         move_player = player if player else self.turn
         self.board[row][col] = move_player  # 下棋
+        self.move_count += 1
+        self.moves.append((row, col))
         
-        # 檢查勝負
-        self.winner = self._check_winner()
+        # 檢查勝負（只需檢查經過這一步的連線）
+        self.winner = self._check_winner(row, col)
         
         # 切換回合
         if self.winner is None:
             self.turn = Player.O.value if self.turn == Player.X.value else Player.X.value
         
+        self.version += 1
         return True
     
-    def _check_winner(self):
+    def forfeit(self, loser: str) -> bool:
+        """
+        判定 loser 認輸（例如超時），由對手獲勝
+        
+        Args:
+            loser: 判負的符號 ('X' 或 'O')
+        
+        Returns:
+            bool: 是否成功判定（遊戲未開始或已結束時返回 False）
+        """
+        if not self.started or self.winner is not None:
+            return False
+        
+        self.winner = Player.O.value if loser == Player.X.value else Player.X.value
+        self.winning_lines = []
+        self.version += 1
+        return True
+    
+    def _check_winner(self, row: Optional[int] = None, col: Optional[int] = None):
         """
         檢查勝負狀態，返回勝者符號 ('X', 'O', 'Draw') 或 None (遊戲繼續)
+        獲勝時會把完成的連線記錄到 self.winning_lines
+        
+        Args:
+            row, col: 最後一步的座標；有給時只檢查經過該格的連線，否則掃描整個棋盤
         """
-        for condition in self.WIN_CONDITIONS:
-            pos1, pos2, pos3 = condition
-            r1, c1 = pos1
-            r2, c2 = pos2
-            r3, c3 = pos3
-            if (self.board[r1][c1] is not None and 
-                self.board[r1][c1] == self.board[r2][c2] == self.board[r3][c3]):
-                # 直接返回勝者符號（'X' 或 'O'）
-                return self.board[r1][c1]
+        if row is not None and col is not None:
+            lines = self._cell_lines[(row, col)]
+        else:
+            lines = self.win_conditions
+        
+        board = self.board
+        completed = []
+        winner = None
+        for line in lines:
+            r0, c0 = line[0]
+            symbol = board[r0][c0]
+            if symbol is not None and all(board[r][c] == symbol for r, c in line):
+                winner = symbol
+                completed.append([[r, c] for r, c in line])
+        
+        if winner is not None:
+            # 直接返回勝者符號（'X' 或 'O'）
+            self.winning_lines = completed
+            return winner
         
         # 檢查是否平局（棋盤已滿）
-        if all(self.board[row][col] is not None for row in range(3) for col in range(3)):
+        if row is not None and col is not None:
+            board_full = self.move_count >= self.size * self.size
+        else:
+            board_full = all(cell is not None for board_row in board for cell in board_row)
+        if board_full:
             return GameResult.DRAW.value
         
         # 遊戲繼續
@@ -4,44 +4,164 @@ GameEvents.py - 遊戲事件處理
 """
 
 from flask import session, request
-from flask_socketio import emit, join_room, leave_room
-from RoomManager import RoomManager
-from datetime import datetime
+from flask_socketio import emit, leave_room
+from RoomManager import room_manager
+from RateLimiter import rate_limiter
+from IdentityRegistry import identities
+from Metrics import metrics
+from TimerScheduler import shared_scheduler
+from Config import Config
+from ChatEvents import post_chat_message, join_chat_room, enter_lobby, leave_lobby
+from HotRestart import hot_restart
+from AdmissionControl import admission
+from OutboundGuard import outbound_guard
+import WireCodec
+from functools import wraps
+import time
 
-# 創建房間管理器實例 (singleton pattern)
-room_manager = RoomManager()
+# 共用計時排程器（所有房間的步時計時器都在同一個背景工作中處理）
+turn_scheduler = shared_scheduler
 
+# 每個連線協商後的編碼：{sid: 'json' | 'binary'}（未記錄者視為 JSON）
+client_codecs = {}
 
-def register_game_events(socketio):
+# 預測下棋序號的上限（二進位編碼以 2 bytes 傳送）
+MAX_MOVE_SEQ = 0xFFFF
+
+
+def synchronized(handler):
+    """
+    讓事件處理函式在房間鎖內執行
+    （threading 模式下多個執行緒、事件迴圈模式下多個 green thread 會同時處理事件，
+    配對等「先檢查再修改」的流程必須互斥）
+    """
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        with room_manager.lock:
+            return handler(*args, **kwargs)
+    return wrapper
+
+
+def register_game_events(socketio, app):
     """
     註冊遊戲相關的 Socket.IO 事件
     
     Args:
         socketio: SocketIO 實例
+        app: Flask 應用（計時器在事件處理之外配對排隊中的玩家時使用其 request context）
     """
+    turn_scheduler.start(socketio)
+    # 上一個行程排空時留下的快照：載入後等待玩家帶恢復權杖重新連線（逾時解散後讓排隊中的玩家遞補）
+    hot_restart.restore(turn_scheduler, lambda rooms: close_rooms_from_timer(rooms))
+    # 量測背景工作延遲，過載時拒絕新負載
+    admission.start(turn_scheduler)
+    # 檢查各連線的送出佇列：落後的連線略過遊戲事件，恢復後補送一次完整狀態
+    outbound_guard.start(socketio, turn_scheduler, lambda sid: send_resync(socketio, sid))
+    
+    @socketio.on('connect')
+    @metrics.timed('connect')
+    def handle_connect(auth=None):
+        """
+        處理連線：登記身分（只在此讀取一次 session）、協商熱門事件的編碼，
+        帶有恢復權杖時回到斷線或熱重啟前的座位
+        
+        Args:
+            auth: 連線時附帶的資料，例如
+                  {'codec': 'binary', 'resume': '<恢復權杖>', 'known': {'generation': 3, 'moves': 2}}
+        """
+        auth = auth if isinstance(auth, dict) else {}
+        # 連線數已達上限或過載：拒絕連線（客戶端於 connect_error 收到 retry_after）
+        # 帶著仍保留座位的恢復權杖重新連線的玩家不受限制，否則會在寬限期結束後輸掉對戰
+        if not room_manager.holds_seat(auth.get('resume')) and not admission.allow_connect(len(identities)):
+            raise ConnectionRefusedError({
+                'message': '伺服器忙碌中，請稍後再試',
+                'retry_after': admission.probe_interval * 4
+            })
+        identities.register(request.sid, session.get('user'), session.get('icon'))
+        codec = WireCodec.negotiate(auth.get('codec'), Config.BINARY_CODEC)
+        if codec == WireCodec.CODEC_BINARY:
+            client_codecs[request.sid] = codec
+        emit('codec_selected', {'codec': codec})
+        
+        if 'resume' in auth:
+            with room_manager.lock:
+                room = hot_restart.resume(auth['resume'], request.sid)
+                if room:
+                    resume_match(room, auth.get('known'))
+                    return
+            # 權杖無效或房間已解散：客戶端改為重新配對
+            emit('resume_failed', {'message': '原本的棋局已結束，重新配對中'})
+        enter_lobby()
     
     @socketio.on('join_pvp')
-    def handle_join_pvp():
+    @metrics.timed('join_pvp')
+    @synchronized
+    def handle_join_pvp(data=None):
+        """
+        處理玩家加入 PVP 配對（配對邏輯見 match_player）
+        
+        Args:
+            data: 選用，{'room_id': 指定加入的房間}
+        """
+        sid = request.sid
+        
+        # 排空中不接受新配對（新行程啟動後再試）
+        if hot_restart.draining:
+            emit('server_draining', {'message': '伺服器即將重新啟動，請稍候'})
+            return
+        
+        data = validate_join_data(data)
+        if data is None:
+            return
+        match_player(sid, data.get('room_id'))
+
+    def match_player(sid, requested_room=None, admitted=False):
         """
-        處理玩家加入 PVP 配對
+        為玩家配對
         
         配對邏輯：
+        0. 指定 room_id（從大廳列表選擇）→ 房間仍在等待時加入，否則回傳 room_full
         1. 如果有等待中的房間 → 加入房間，遊戲開始
         2. 如果沒有等待中的房間：
-           - 若已有遊戲進行中 → 拒絕加入（避免同時多場遊戲）
-           - 若沒有遊戲進行中 → 創建新房間，等待對手加入
+           - 延遲過高 → 回傳 server_busy，請客戶端稍後重試
+           - 房間數已達上限，或已有玩家在排隊 → 排入等待佇列（佇列已滿時回傳 game_in_progress），
+             有空位時依排隊順序遞補（新玩家不可插隊）
+           - 否則 → 創建新房間，等待對手加入
+        
+        Args:
+            sid: 玩家 Socket ID
+            requested_room: 指定加入的房間 ID
+            admitted: 是否為剛從等待佇列取出的玩家（admit_queued 呼叫時為 True）
         """
-        username = session.get('user', '匿名')
-        sid = request.sid
+        identity = identities.get(sid)
+        username = identity.username or '匿名'
         
-        # 檢查是否有正在進行的遊戲（沒有等待中的房間）
-        available_room = room_manager.get_available_room()
-        active_game_count = room_manager.get_active_game_count()
+        if requested_room:
+            # 指定的房間必須仍在等待對手，且玩家本身不在任何房間
+            room = room_manager.get_room(requested_room)
+            if not room or not room.waiting or room_manager.get_room_by_sid(sid):
+                emit('room_full', {'message': '房間不存在或已滿，請選擇其他房間'}, room=sid)
+                return
+            available_room = requested_room
+        else:
+            available_room = room_manager.get_available_room()
         
-        # 如果沒有等待中的房間，且已經有正在進行的遊戲，拒絕加入
-        if not available_room and active_game_count > 0:
-            emit('game_in_progress', {'message': '目前已有遊戲進行中，請稍後再試'})
-            return
+        if not available_room:
+            # 過載時不建立新房間（加入等待中的房間可完成配對，不受影響）
+            if admission.overloaded:
+                admission.shed_count += 1
+                emit('server_busy', {
+                    'message': '伺服器忙碌中，請稍後再試',
+                    'retry_after': admission.probe_interval * 4
+                }, room=sid)
+                return
+            room_available = admission.room_available(room_manager.get_room_count())
+            if not room_available or (len(admission) and not admitted):
+                queue_joiner(sid)
+                if room_available:
+                    admit_queued()
+                return
+        admission.remove(sid)
         
         # 嘗試尋找可用房間
         room_id = available_room
@@ -50,13 +170,14 @@ def register_game_events(socketio):
             # 檢查房間是否已滿
             room = room_manager.get_room(room_id)
             if room and len(room.players) >= 2:
-                emit('room_full', {'message': '房間已滿，請稍後再試'})
+                emit('room_full', {'message': '房間已滿，請稍後再試'}, room=sid)
                 return
             
             # 加入現有房間
-            success = room_manager.join_room(room_id, sid, username)
+            success = room_manager.join_room(room_id, sid, username, identity.icon)
             if success:
-                join_room(room_id)
+                leave_lobby(sid)
+                join_chat_room(room_id, sid)
                 room = room_manager.get_room(room_id)
                 room_state = room.get_state()
                 
@@ -64,26 +185,13 @@ def register_game_events(socketio):
                 first_player_name = room_state['players'][0]['username']
                 
                 # 發送系統訊息到聊天室
-                timestamp = datetime.now().strftime('%H:%M:%S')
-                emit('chat message', {
-                    'username': '系統',
-                    'message': f'強勁的棋手 {first_player_name} 已等候多時!',
-                    'time': timestamp
-                }, room=room_id)
-                timestamp = datetime.now().strftime('%H:%M:%S')
-                emit('chat message', {
-                    'username': '系統',
-                    'message': f'強勁的棋手 {username} 已抵達戰場!',
-                    'time': timestamp
-                }, room=room_id)
+                post_chat_message(room_id, '系統', f'強勁的棋手 {first_player_name} 已等候多時!')
+                post_chat_message(room_id, '系統', f'強勁的棋手 {username} 已抵達戰場!')
                 
-                # 使用隨機分配的座位和符號
+                # 使用隨機分配的座位和符號（左玩家先手，已在 add_player 設定）
                 left_player = room_state['left_player']
                 right_player = room_state['right_player']
-                
-                # 左玩家先手
-                first_turn = left_player['symbol']
-                room.game.turn = first_turn
+                first_turn = room_state['turn']
                 
                 for player in room.players:
                     my_side = 'left' if player.sid == left_player['sid'] else 'right'
@@ -95,105 +203,168 @@ def register_game_events(socketio):
                         'right_player': right_player,
                         'my_side': my_side,
                         'scores': room_state['scores'],
-                        'round_count': room_state['round_count']
+                        'round_count': room_state['round_count'],
+                        'generation': room_state['generation'],
+                        'clock': room_state['clock'],
+                        'resume_token': player.resume_token
                     }, room=player.sid)
+                
+                arm_turn_clock(room, socketio)
             else:
-                emit('room_full', {'message': '房間已滿，請稍後再試'})
+                emit('room_full', {'message': '房間已滿，請稍後再試'}, room=sid)
         else:
-            # 創建新房間（只有在沒有正在進行的遊戲時）
-            room_id = room_manager.create_room(sid, username)
-            join_room(room_id)
+            # 創建新房間（房間數未達上限時）
+            room_id = room_manager.create_room(sid, username, identity.icon)
+            leave_lobby(sid)
+            join_chat_room(room_id, sid)
             # 回傳等待狀態
-            emit('waiting_for_opponent', {'room_id': room_id, 'status': 'waiting'})
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            emit('chat message', {
-                'username': '系統',
-                'message': '請等候其他玩家加入！',
-                'time': timestamp
-            }, room=room_id)
+            emit('waiting_for_opponent', {'room_id': room_id, 'status': 'waiting'}, room=sid)
+            post_chat_message(room_id, '系統', '請等候其他玩家加入！')
+
+    def queue_joiner(sid):
+        """
+        房間數已達上限：排入等待佇列並回報位置與預估等待時間
+        
+        Args:
+            sid: 玩家 Socket ID
+        """
+        position = admission.enqueue(sid)
+        if position is None:
+            emit('game_in_progress', {'message': '目前對戰已滿且等待人數過多，請稍後再試'}, room=sid)
+            return
+        emit('join_queued', {'position': position, 'eta': admission.eta(position)}, room=sid)
+
+    def admit_queued(changed=False):
+        """
+        有房間解散後，讓排隊中的玩家依序配對，並通知其餘玩家新的排隊位置
+        （需在事件處理中呼叫）
+        
+        Args:
+            changed: 佇列是否已有變動（例如排隊中的玩家斷線），為 True 時一定通知新位置
+        """
+        admitted = changed
+        while len(admission) and not admission.overloaded and (
+                room_manager.get_available_room()
+                or admission.room_available(room_manager.get_room_count())):
+            match_player(admission.pop(), admitted=True)
+            admitted = True
+        if admitted:
+            for position, sid in enumerate(admission.queued(), 1):
+                emit('join_queued', {'position': position, 'eta': admission.eta(position)}, room=sid)
+
+    def close_rooms_from_timer(rooms):
+        """
+        計時器解散房間後（斷線逾時、熱重啟後未到齊）：留下的玩家回到大廳，排隊中的玩家遞補空出的房間
+        （在房間鎖內呼叫；計時器不在事件處理中執行，先建立 request context 讓 emit / join_room 等輔助函式可以使用）
+        
+        Args:
+            rooms: 已解散的 GameRoom 列表
+        """
+        with app.test_request_context('/'):
+            request.namespace = '/'
+            for room in rooms:
+                admission.record_room_closed(time.time() - room.created_at)
+                release_players(room)
+            if not hot_restart.draining:
+                admit_queued()
 
     @socketio.on('action')
+    @metrics.timed('action')
     def handle_action(payload):
         """
-        統一處理前端發來的 action 事件，根據 action 名稱轉發到對應函式
+        統一處理前端發來的 action 事件，依 action 註冊表轉發到對應函式
+        
+        支援兩種格式：
+        - 單一 action：{ action: 'make_move', data: { row: <r>, col: <c> } }
+        - 批次 action：{ action: 'batch', actions: [<單一 action>, ...] }
+        
+        批次中的所有 action 會先全部驗證，任何一個無效就整批忽略
         """
-
         if not payload:
             return
 
-        action_name = None
-        if isinstance(payload, dict):
-            action_name = payload.get('action')
-        elif isinstance(payload, str):
-            action_name = payload
-
-        if action_name == 'join_pvp':
-            # 直接呼叫既有的 handler
-            return handle_join_pvp()
-
-        if action_name == 'make_move':
-            # 只接受統一格式：
-            # { action: 'make_move', data: { row: <r>, col: <c> } }
-            if isinstance(payload, dict):
-                data = payload.get('data')
-                # 若 data 為 None 或不包含 row/col，則不處理
-                if data and isinstance(data, dict) and data.get('row') is not None and data.get('col') is not None:
-                    return handle_make_move(data)
-            # 否則忽略
-            return
+        if isinstance(payload, dict) and payload.get('action') == 'batch':
+            items = payload.get('actions')
+            if not isinstance(items, list) or not 0 < len(items) <= Config.ACTION_BATCH_LIMIT:
+                return
+        else:
+            items = [payload]
 
-        if action_name == 'reset_game':
-            # 透過 action 路徑觸發重置回合
-            return handle_reset_game()
+        # 先驗證全部 action，再依序執行
+        calls = []
+        for item in items:
+            call = parse_action(item, action_registry)
+            if call is None:
+                return
+            calls.append(call)
 
-        if action_name == 'start_new_match':
-            # 透過 action 路徑開始新比賽
-            return handle_start_new_match()
+        for handler, data in calls:
+            if data is None:
+                handler()
+            else:
+                handler(data)
 
     @socketio.on('make_move')
+    @metrics.timed('make_move')
+    @synchronized
     def handle_make_move(data):
         """
         處理玩家移動（使用座標方式）
         
+        帶有 seq 的移動是客戶端已先行畫出的預測，無法執行時回覆 move_rejected 讓客戶端復原
+        
         Args:
-            data: 包含移動資訊的字典 {'row': 行座標, 'col': 列座標}
+            data: 包含移動資訊的字典 {'row': 行座標, 'col': 列座標, 'seq': 序號（選用）}，
+                  或已協商二進位編碼時的 bytes
         """
         sid = request.sid
-        row = data.get('row')
-        col = data.get('col')
+        if isinstance(data, (bytes, bytearray)):
+            data = WireCodec.decode('make_move', data)
         
         # 驗證座標
-        if row is None or col is None or not (0 <= row <= 2) or not (0 <= col <= 2):
+        data = validate_move_data(data)
+        if data is None:
+            return
+        row = data['row']
+        col = data['col']
+        seq = data.get('seq')
+        
+        # 超出頻率限制的事件不執行；排空中棋局已寫入快照，凍結直到新行程恢復
+        if not rate_limiter.allow(sid, 'make_move') or hot_restart.draining:
+            reject_move(seq)
             return
         
         # 獲取玩家所在房間
         room_id = room_manager.get_room_by_sid(sid)
         if not room_id:
+            reject_move(seq)
             return
         
         # 執行移動
         room_state = room_manager.make_move(room_id, sid, row, col)
         if room_state:
             # 只廣播必要的更新資訊（使用二維數組座標）
-            emit('move_made', {
+            emit_hot_event('move_made', {
                 'row': row,
                 'col': col,
                 'symbol': room_state['board'][row][col],
                 'turn': room_state['turn']
-            }, room=room_id)
+            }, room_id, room_state['players'])
+            
+            # 輪到對手計時（回合結束時只取消計時器）
+            room = room_manager.get_room(room_id)
+            arm_turn_clock(room, socketio)
             
             # 如果遊戲結束，發送結束資訊
             if room_state['winner']:
-                winning_lines = get_winning_lines(room_state['board'])
-                emit('round_end', {
-                    'winner': room_state['winner'],
-                    'scores': room_state['scores'],
-                    'round_count': room_state['round_count'],
-                    'match_finished': room_state['match_finished'],
-                    'winning_lines': winning_lines
-                }, room=room_id)
+                emit_hot_event('round_end', room.get_encoded('round_end', build_round_end),
+                               room_id, room_state['players'])
+        else:
+            reject_move(seq)
 
     @socketio.on('reset_game')
+    @metrics.timed('reset_game')
+    @synchronized
     def handle_reset_game():
         """
         處理遊戲重置請求（下一回合）
@@ -201,21 +372,18 @@ def register_game_events(socketio):
         sid = request.sid
         room_id = room_manager.get_room_by_sid(sid)
         
-        if room_id:
+        if room_id and not hot_restart.draining:
             room = room_manager.get_room(room_id)
             if room:
                 room.reset()
-                room_state = room.get_state()
+                arm_turn_clock(room, socketio)
                 
-                emit('game_reset', {
-                    'turn': room_state['turn'],
-                    'scores': room_state['scores'],
-                    'round_count': room_state['round_count'],
-                    'match_finished': room_state['match_finished'],
-                    'current_first_player': room_state['current_first_player']
-                }, room=room_id)
+                emit('game_reset', room.get_encoded('game_reset', build_game_reset),
+                     room=room_id, skip_sid=outbound_guard.skip(player.sid for player in room.players) or None)
 
     @socketio.on('start_new_match')
+    @metrics.timed('start_new_match')
+    @synchronized
     def handle_start_new_match():
         """
         處理開始新比賽請求（新的5戰3勝）
@@ -223,77 +391,349 @@ def register_game_events(socketio):
         sid = request.sid
         room_id = room_manager.get_room_by_sid(sid)
         
-        if room_id:
+        if room_id and not hot_restart.draining:
             room = room_manager.get_room(room_id)
             if room:
-                # 重置所有分數和回合數
-                room.scores = {'left': 0, 'right': 0, 'draw': 0}
-                room.round_count = 0
-                room.match_finished = False
-                
-                # 重新隨機分配座位和符號
-                room._assign_seats_and_symbols()
-                
-                # 重置遊戲
-                room.game.reset()
-                room.game.turn = room.left_player.symbol
-                room.game.started = True
-                room.current_first_player = 'left'
-                
-                room_state = room.get_state()
+                # 分數歸零、重新分配座位和符號並重置棋盤
+                room.start_new_match()
+                arm_turn_clock(room, socketio)
                 
                 # 發送新比賽開始資訊
-                emit('new_match_started', {
-                    'turn': room_state['turn'],
-                    'scores': room_state['scores'],
-                    'round_count': room_state['round_count'],
-                    'match_finished': room_state['match_finished'],
-                    'left_player': room_state['left_player'],
-                    'right_player': room_state['right_player'],
-                    'current_first_player': room_state['current_first_player']
-                }, room=room_id)
+                emit('new_match_started', room.get_encoded('new_match_started', build_new_match),
+                     room=room_id, skip_sid=outbound_guard.skip(player.sid for player in room.players) or None)
+
+    def resume_match(room, known):
+        """
+        玩家帶恢復權杖重新連線後回到原棋局
+        
+        客戶端停在同一局時只補送錯過的移動（game_caught_up），否則送出完整狀態（game_resumed）；
+        之後發給新的恢復權杖並通知對手
+        
+        Args:
+            room: 回到的房間
+            known: 客戶端最後看到的狀態 {'generation', 'moves'}（沒有時送完整狀態）
+        """
+        sid = request.sid
+        join_chat_room(room.room_id)
+        missed = room.get_missed_moves(known)
+        if missed is None:
+            emit('game_resumed', room.get_state_for(sid))
+        else:
+            emit('game_caught_up', {'moves': missed})
+        emit('resume_token', {'room_id': room.room_id, 'token': room.get_player_by_sid(sid).resume_token})
+        emit('opponent_reconnected', room=room.room_id, skip_sid=sid)
+        arm_turn_clock(room, socketio)
 
     @socketio.on('disconnect')
+    @metrics.timed('disconnect')
+    @synchronized
     def handle_disconnect():
         """
         處理玩家斷線
         當玩家離開時，通知房間內的其他玩家
         """
         sid = request.sid
+        client_codecs.pop(sid, None)
+        rate_limiter.forget(sid)
+        identities.forget(sid)
+        outbound_guard.forget(sid)
+        was_queued = admission.remove(sid)
+        room = room_manager.get_room(room_manager.get_room_by_sid(sid))
+        
+        # 對戰中斷線：保留座位等待重新連線，棋局暫停（逾時才解散房間）
+        if room and Config.RECONNECT_GRACE > 0 and not hot_restart.draining:
+            token = room_manager.suspend_player(sid)
+            if token:
+                arm_turn_clock(room, socketio)
+                emit('opponent_reconnecting', {'grace': Config.RECONNECT_GRACE}, room=room.room_id)
+                turn_scheduler.schedule(Config.RECONNECT_GRACE, expire_reconnect, token, close_rooms_from_timer)
+                return
+        
         room_id = room_manager.leave_room(sid)
+        if room and room_manager.get_room(room_id) is None:
+            admission.record_room_closed(time.time() - room.created_at)
         
-        if room_id:
-            # 通知對手玩家已離開
-            emit('opponent_left', room=room_id)
+        # 排空中玩家陸續斷線是預期中的（房間已在快照中），不通知對手
+        if room and room_manager.get_room(room_id) is None and not hot_restart.draining:
+            release_players(room, sid)
+        
+        # 房間解散或排隊中的玩家離開後，讓後面的玩家遞補
+        if not hot_restart.draining:
+            admit_queued(changed=was_queued)
+
+    # action 註冊表：{action 名稱: (處理函式, payload 驗證函式)}
+    # 驗證函式回傳正規化後的 data，無效時回傳 None；不需要 data 的 action 驗證函式為 None
+    action_registry = {
+        'join_pvp': (handle_join_pvp, validate_join_data),
+        'make_move': (handle_make_move, validate_move_data),
+        'reset_game': (handle_reset_game, None),
+        'start_new_match': (handle_start_new_match, None),
+    }
 
 
-def get_winning_lines(board):
+def arm_turn_clock(room, socketio):
     """
-    獲取獲勝的連線（座標方式）
+    重新設定房間的步時計時器（回合未進行或未啟用計時時只取消舊計時器）
     
     Args:
-        board: 二維棋盤 [[None, 'X', ...], [...], [...]]
+        room: GameRoom 實例
+        socketio: SocketIO 實例（超時時用來廣播）
+    """
+    if room.clock_timer:
+        room.clock_timer.cancel()
+        room.clock_timer = None
+    room.clock_generation += 1
+    
+    remaining = room.turn_time_left()
+    if remaining is None:
+        return
+    room.clock_timer = turn_scheduler.schedule(
+        remaining, on_turn_timeout, socketio, room.room_id, room.clock_generation
+    )
+
+
+def on_turn_timeout(socketio, room_id, generation):
+    """
+    步時計時器到期：輪到的玩家本回合判負，並廣播回合結束
+    
+    Args:
+        socketio: SocketIO 實例
+        room_id: 房間 ID
+        generation: 排程時的計時代數（與房間目前不同代表計時器已過期）
+    """
+    with room_manager.lock:
+        room = room_manager.get_room(room_id)
+        if not room or room.clock_generation != generation or hot_restart.draining:
+            return
+        room.clock_timer = None
+        if not room.timeout():
+            return
+        
+        room_state = room.get_state()
+        emit_hot_event('round_end', room.get_encoded('round_end', build_round_end), room_id,
+                       room_state['players'], emitter=socketio.emit)
+
+
+def expire_reconnect(token, release):
+    """
+    斷線玩家逾時未重新連線：解散房間，交由 release 通知留下的玩家並讓排隊中的玩家遞補
+    （空出的房間先給排隊中的玩家，留下的玩家重新配對時排在他們之後）
+    
+    Args:
+        token: 斷線時保留座位的恢復權杖
+        release: 處理已解散房間的函式（register_game_events 中的 close_rooms_from_timer）
+    """
+    with room_manager.lock:
+        room = room_manager.expire_player(token)
+        if room is not None:
+            release([room])
+
+
+def release_players(room, leaver=None):
+    """
+    房間解散後，讓留下的玩家離開房間頻道、收到 opponent_left（客戶端自動重新配對）並回到大廳頻道
+    （需在事件處理或 request context 中呼叫）
+    
+    Args:
+        room: 已解散的 GameRoom
+        leaver: 離開的玩家 Socket ID（不通知）
+    """
+    for player in room.players:
+        if player.sid and player.sid != leaver:
+            leave_room(room.room_id, sid=player.sid)
+            emit('opponent_left', room=player.sid)
+            enter_lobby(player.sid)
+
+
+def send_resync(socketio, sid):
+    """
+    送出佇列消化後補送完整狀態，取代落後期間略過的所有遊戲事件
+    
+    Args:
+        socketio: SocketIO 實例
+        sid: Socket ID
+    """
+    with room_manager.lock:
+        room = room_manager.get_room(room_manager.get_room_by_sid(sid))
+        if room:
+            socketio.emit('resync', room.get_state_for(sid), to=sid)
+
+
+def build_round_end(room_state):
+    """
+    組出 round_end 事件內容（獲勝連線由 Game 判定勝負時記錄，不需重新掃描棋盤）
+    
+    Args:
+        room_state: get_state() 的結果
+    
+    Returns:
+        dict: round_end payload
+    """
+    return {
+        'winner': room_state['winner'],
+        'scores': room_state['scores'],
+        'round_count': room_state['round_count'],
+        'match_finished': room_state['match_finished'],
+        'winning_lines': room_state['winning_lines'],
+        'timeout_side': room_state['timeout_side'],
+        'forfeit_side': room_state['forfeit_side']
+    }
+
+
+def build_game_reset(room_state):
+    """
+    組出 game_reset 事件內容（下一回合）
+    
+    Args:
+        room_state: get_state() 的結果
     
     Returns:
-        list: 獲勝連線的座標列表，例如 [[[0,0], [0,1], [0,2]]]
+        dict: game_reset payload
+    """
+    return {
+        'turn': room_state['turn'],
+        'scores': room_state['scores'],
+        'round_count': room_state['round_count'],
+        'match_finished': room_state['match_finished'],
+        'current_first_player': room_state['current_first_player'],
+        'generation': room_state['generation'],
+        'clock': room_state['clock']
+    }
+
+
+def build_new_match(room_state):
+    """
+    組出 new_match_started 事件內容（新的 5 戰 3 勝，座位與符號重新分配）
+    
+    Args:
+        room_state: get_state() 的結果
+    
+    Returns:
+        dict: new_match_started payload
+    """
+    return dict(build_game_reset(room_state),
+                left_player=room_state['left_player'],
+                right_player=room_state['right_player'])
+
+
+def reject_move(seq):
+    """
+    通知客戶端預測的移動未被接受（沒有 seq 的移動不是預測，不需回覆）
+    
+    Args:
+        seq: make_move 帶來的序號
+    """
+    if seq is not None:
+        emit('move_rejected', {'seq': seq})
+
+
+def validate_move_data(data):
+    """
+    驗證下棋 payload
+    
+    Args:
+        data: { row: <r>, col: <c>, seq: <序號，選用> }
+    
+    Returns:
+        Optional[dict]: 正規化後的 {'row', 'col'}（有序號時加上 'seq'），無效時返回 None
+    """
+    if not isinstance(data, dict):
+        return None
+    row = data.get('row')
+    col = data.get('col')
+    # bool 是 int 的子類別，需排除
+    if type(row) is not int or type(col) is not int:
+        return None
+    if not (0 <= row <= 2 and 0 <= col <= 2):
+        return None
+    seq = data.get('seq')
+    if seq is None:
+        return {'row': row, 'col': col}
+    if type(seq) is not int or not 0 <= seq <= MAX_MOVE_SEQ:
+        return None
+    return {'row': row, 'col': col, 'seq': seq}
+
+
+def validate_join_data(data):
+    """
+    驗證加入配對 payload
+    
+    Args:
+        data: None（自動配對）或 { room_id: <房間 ID> }
+    
+    Returns:
+        Optional[dict]: 正規化後的 {} 或 {'room_id'}，無效時返回 None
+    """
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        return None
+    room_id = data.get('room_id')
+    if room_id is None:
+        return {}
+    if not isinstance(room_id, str) or not 0 < len(room_id) <= 64:
+        return None
+    return {'room_id': room_id}
+
+
+def parse_action(item, registry):
+    """
+    解析並驗證單一 action
+    
+    Args:
+        item: 'join_pvp' 字串或 { action: <名稱>, data: <payload> }
+        registry: action 註冊表
+    
+    Returns:
+        Optional[tuple]: (處理函式, 驗證後的 data 或 None)，無效時返回 None
+    """
+    if isinstance(item, str):
+        action_name, data = item, None
+    elif isinstance(item, dict):
+        action_name, data = item.get('action'), item.get('data')
+    else:
+        return None
+
+    entry = registry.get(action_name)
+    if entry is None:
+        return None
+
+    handler, validator = entry
+    if validator is None:
+        return handler, None
+
+    data = validator(data)
+    if data is None:
+        return None
+    return handler, data
+
+
+def emit_hot_event(event, payload, room_id, players, emitter=emit):
+    """
+    發送熱門遊戲事件，依各玩家協商的編碼分別送出
+    
+    JSON 玩家以一次房間廣播送出（跳過二進位玩家），
+    二進位玩家共用同一份打包結果逐一送出
+    
+    Args:
+        event: 事件名稱（move_made / round_end）
+        payload: JSON 格式的事件內容（dict 或房間共用的 EncodedPayload）
+        room_id: 房間 ID
+        players: 房間玩家列表（get_state() 中的 players）
+        emitter: 發送函式（事件處理中用 flask_socketio.emit，背景工作用 socketio.emit）
     """
-    win_conditions = [
-        [[0, 0], [0, 1], [0, 2]],  # 第一行
-        [[1, 0], [1, 1], [1, 2]],  # 第二行
-        [[2, 0], [2, 1], [2, 2]],  # 第三行
-        [[0, 0], [1, 0], [2, 0]],  # 第一列
-        [[0, 1], [1, 1], [2, 1]],  # 第二列
-        [[0, 2], [1, 2], [2, 2]],  # 第三列
-        [[0, 0], [1, 1], [2, 2]],  # 主對角線
-        [[0, 2], [1, 1], [2, 0]]   # 副對角線
-    ]
+    lagging = outbound_guard.skip(player['sid'] for player in players)
+    binary_sids = [player['sid'] for player in players
+                   if client_codecs.get(player['sid']) == WireCodec.CODEC_BINARY
+                   and player['sid'] not in lagging]
     
-    winning_lines = []
-    for line in win_conditions:
-        # 使用二維棋盤座標檢查
-        pos1, pos2, pos3 = line
-        if (board[pos1[0]][pos1[1]] is not None and 
-            board[pos1[0]][pos1[1]] == board[pos2[0]][pos2[1]] == board[pos3[0]][pos3[1]]):
-            winning_lines.append(line)
+    # 送出佇列已滿的玩家略過此事件（恢復後由 resync 補上完整狀態）
+    if len(binary_sids) + len(lagging) < len(players):
+        emitter(event, payload, room=room_id, skip_sid=(binary_sids + lagging) or None)
     
-    return winning_lines
+    if binary_sids:
+        if isinstance(payload, WireCodec.EncodedPayload):
+            payload = payload.payload
+        data = WireCodec.encode(event, payload)
+        for sid in binary_sids:
+            emitter(event, data, room=sid)
@@ -0,0 +1,164 @@
+"""
+HotRestart.py - 排空與熱重啟
+排空時停止接受新配對並凍結對戰，把進行中的房間存成精簡快照（gzip 壓縮的 JSON），
+同時把各玩家的恢復權杖送給客戶端；新行程啟動時載入快照，
+玩家帶權杖重新連線後回到原座位，逾時未回來的房間會被解散
+"""
+
+import gzip
+import json
+import logging
+import os
+from typing import Callable, List, Optional
+
+from Config import Config
+from RoomManager import room_manager
+
+logger = logging.getLogger(__name__)
+
+# 快照格式版本（格式不相容時拒絕載入）
+SNAPSHOT_FORMAT = 1
+
+
+class HotRestart:
+    """
+    排空與熱重啟控制
+    - drain() 進入排空模式：拒絕新配對、凍結下棋，寫出快照並通知客戶端
+    - restore() 新行程啟動時載入快照（讀取後即刪除，避免重複載入）
+    - resume() 連線時以恢復權杖回到快照中的座位
+    """
+
+    def __init__(self, path: str = '', grace: float = 30):
+        """
+        初始化熱重啟控制
+
+        Args:
+            path: 快照檔路徑，空字串代表排空時不保存房間
+            grace: 載入快照後等待玩家重新連線的秒數
+        """
+        self.path = path
+        self.grace = grace
+        self.draining = False
+
+    def drain(self, socketio) -> int:
+        """
+        進入排空模式並保存所有對戰中的房間
+
+        Args:
+            socketio: SocketIO 實例（用來通知客戶端）
+
+        Returns:
+            int: 保存的房間數（未設定快照路徑時為 0）
+        """
+        with room_manager.lock:
+            self.draining = True
+            data = room_manager.snapshot()
+            if self.path:
+                self.save(data)
+
+            socketio.emit('server_draining', {'message': '伺服器即將重新啟動，請稍候'})
+            if not self.path:
+                return 0
+            for room in room_manager.rooms.values():
+                if room.waiting:
+                    continue
+                for player in room.players:
+                    if player.sid:
+                        socketio.emit('resume_token', {
+                            'room_id': room.room_id,
+                            'token': player.resume_token
+                        }, to=player.sid)
+            return len(data['rooms'])
+
+    def save(self, data: dict):
+        """
+        寫出快照（先寫暫存檔再替換，行程中斷時不會留下寫到一半的檔案）
+
+        Args:
+            data: RoomManager.snapshot() 的結果
+        """
+        payload = json.dumps(dict(data, format=SNAPSHOT_FORMAT), ensure_ascii=False, separators=(',', ':'))
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(gzip.compress(payload.encode('utf-8'), mtime=0))
+        os.replace(temp_path, self.path)
+
+    def load(self) -> Optional[dict]:
+        """
+        讀取並刪除快照檔
+
+        Returns:
+            Optional[dict]: 快照內容，檔案不存在、損毀或格式不符時返回 None
+        """
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.loads(gzip.decompress(f.read()).decode('utf-8'))
+        except (OSError, ValueError):  # gzip / JSON 損毀
+            logger.exception('快照讀取失敗')
+            data = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        if not isinstance(data, dict) or data.get('format') != SNAPSHOT_FORMAT:
+            return None
+        return data
+
+    def restore(self, scheduler, release: Optional[Callable[[List], None]] = None) -> int:
+        """
+        載入快照中的房間，並排程在 grace 秒後解散仍有玩家未帶快照權杖回來的房間
+
+        Args:
+            scheduler: 共用計時排程器
+            release: 處理逾時解散房間的函式（通知已回來的玩家並讓排隊中的玩家遞補）
+
+        Returns:
+            int: 載入的房間數
+        """
+        data = self.load()
+        if data is None:
+            return 0
+        with room_manager.lock:
+            restored = room_manager.restore(data)
+            # 記下快照中的恢復權杖（玩家回來後即換發新權杖，之後一般斷線保留座位由 RECONNECT_GRACE 計時）
+            tokens = [player.resume_token for room_id in restored
+                      for player in room_manager.get_room(room_id).players]
+        if restored:
+            scheduler.schedule(self.grace, self.expire, tokens, release)
+        return len(restored)
+
+    def resume(self, token, sid: str):
+        """
+        以恢復權杖回到快照中（或斷線前）的座位
+
+        Args:
+            token: 客戶端送來的恢復權杖
+            sid: 新的 Socket ID
+
+        Returns:
+            Optional[GameRoom]: 回到的房間，權杖無效時返回 None
+        """
+        if not isinstance(token, str) or not token:
+            return None
+        return room_manager.resume_player(token, sid)
+
+    @staticmethod
+    def expire(tokens: List[str], release: Optional[Callable[[List], None]] = None):
+        """
+        解散仍有玩家未帶快照權杖回來的房間，交由 release 通知已回來的玩家並讓排隊中的玩家遞補
+        （只處理 restore() 載入的房間，一般斷線暫停中的房間不受影響）
+
+        Args:
+            tokens: restore() 時記下的恢復權杖
+            release: 處理已解散房間的函式
+        """
+        with room_manager.lock:
+            expired = [room for room in map(room_manager.expire_player, tokens) if room]
+            if expired and release:
+                release(expired)
+
+
+# 全域熱重啟控制實例 (singleton pattern)
+hot_restart = HotRestart(Config.SNAPSHOT_PATH, Config.RESUME_GRACE)
@@ -0,0 +1,77 @@
+"""
+IdentityRegistry.py - 連線身分登記
+Socket.IO 連線時從 Flask session 取出一次使用者名稱與圖示，
+之後所有事件處理都從這裡讀取，不再每個事件解析 session，也不採信客戶端送來的名稱
+"""
+
+from typing import Dict, Optional
+
+
+class Identity:
+    """單一連線的身分（使用者名稱與登入時選擇的圖示）"""
+
+    __slots__ = ('username', 'icon')
+
+    def __init__(self, username: Optional[str], icon: Optional[str]):
+        self.username = username
+        self.icon = icon
+
+
+# 未登記（或未登入）連線共用的空身分
+ANONYMOUS = Identity(None, None)
+
+
+class IdentityRegistry:
+    """
+    連線身分表
+    - 以 sid 為 key，登記與查詢皆為 O(1)
+    - 斷線時移除
+    """
+
+    def __init__(self):
+        """初始化身分表"""
+        self._identities: Dict[str, Identity] = {}
+
+    def register(self, sid: str, username: Optional[str], icon: Optional[str] = None) -> Identity:
+        """
+        登記連線的身分
+
+        Args:
+            sid: Socket ID
+            username: 使用者名稱（未登入為 None）
+            icon: 登入時選擇的圖示
+
+        Returns:
+            Identity: 登記的身分
+        """
+        identity = Identity(username, icon)
+        self._identities[sid] = identity
+        return identity
+
+    def get(self, sid: str) -> Identity:
+        """
+        查詢連線的身分
+
+        Args:
+            sid: Socket ID
+
+        Returns:
+            Identity: 登記的身分，未登記時返回 ANONYMOUS
+        """
+        return self._identities.get(sid, ANONYMOUS)
+
+    def forget(self, sid: str):
+        """
+        移除斷線連線的身分
+
+        Args:
+            sid: Socket ID
+        """
+        self._identities.pop(sid, None)
+
+    def __len__(self) -> int:
+        return len(self._identities)
+
+
+# 全域身分表實例 (singleton pattern)
+identities = IdentityRegistry()
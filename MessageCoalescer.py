@@ -0,0 +1,108 @@
+"""
+MessageCoalescer.py - 外送訊息合併
+同一個 Socket.IO room 在短時間內的多則訊息合併成一個陣列事件送出，
+減少 frame 數與每次 emit 的額外成本
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+from TimerScheduler import TimerScheduler
+
+
+class MessageCoalescer:
+    """
+    依 room 合併外送訊息
+    - 第一則訊息進來時排程 window 秒後送出，期間的訊息累積在同一批
+    - 累積到 max_batch 則時立即送出
+    - 整批只有一則時以單筆事件送出，多則時以陣列事件送出
+    - window 為 0 時不合併，直接送出
+    """
+
+    def __init__(self, event: str, batch_event: str, window: float, max_batch: int):
+        """
+        初始化合併器
+
+        Args:
+            event: 單筆訊息的事件名稱
+            batch_event: 合併後的陣列事件名稱（payload 為 {'messages': [...]}）
+            window: 合併的時間窗（秒）
+            max_batch: 單批最多訊息數
+        """
+        self.event = event
+        self.batch_event = batch_event
+        self.window = window
+        self.max_batch = max_batch
+        self.socketio = None
+        self.scheduler: Optional[TimerScheduler] = None
+        self._pending: Dict[str, List[dict]] = {}  # {room: 尚未送出的訊息}
+        self._timers: Dict[str, object] = {}  # {room: TimerHandle}
+        self._lock = threading.Lock()
+
+    def start(self, socketio, scheduler: TimerScheduler):
+        """
+        綁定 SocketIO 與共用排程器（並確保排程器已啟動）
+
+        Args:
+            socketio: SocketIO 實例
+            scheduler: 共用計時排程器
+        """
+        self.socketio = socketio
+        self.scheduler = scheduler
+        scheduler.start(socketio)
+
+    def post(self, room: str, message: dict):
+        """
+        加入一則要送到 room 的訊息
+
+        Args:
+            room: Socket.IO room（房間 ID、大廳或 sid）
+            message: 訊息 payload
+        """
+        if self.window <= 0 or self.scheduler is None:
+            self._send(room, [message])
+            return
+
+        with self._lock:
+            batch = self._pending.setdefault(room, [])
+            batch.append(message)
+            if len(batch) < self.max_batch:
+                if room not in self._timers:
+                    self._timers[room] = self.scheduler.schedule(self.window, self.flush, room)
+                return
+            batch = self._take(room)
+
+        self._send(room, batch)
+
+    def flush(self, room: str):
+        """
+        立即送出 room 尚未送出的訊息（例如有人加入 room 之前，避免與聊天歷史重複）
+
+        Args:
+            room: Socket.IO room
+        """
+        with self._lock:
+            batch = self._take(room)
+        if batch:
+            self._send(room, batch)
+
+    def flush_all(self):
+        """立即送出所有 room 尚未送出的訊息"""
+        with self._lock:
+            rooms = list(self._pending)
+        for room in rooms:
+            self.flush(room)
+
+    def _take(self, room: str) -> List[dict]:
+        """取出 room 的待送訊息並取消計時器（需在鎖內呼叫）"""
+        timer = self._timers.pop(room, None)
+        if timer:
+            timer.cancel()
+        return self._pending.pop(room, [])
+
+    def _send(self, room: str, batch: List[dict]):
+        """送出一批訊息"""
+        if len(batch) == 1:
+            self.socketio.emit(self.event, batch[0], to=room)
+        else:
+            self.socketio.emit(self.batch_event, {'messages': batch}, to=room)
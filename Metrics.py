@@ -0,0 +1,206 @@
+"""
+Metrics.py - 執行指標收集
+負責 Socket.IO 事件處理延遲直方圖、emit 次數與各種即時數值，
+並輸出 Prometheus 文字格式（/metrics）
+"""
+
+import bisect
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 延遲直方圖的上界（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# 分片數量：以執行緒 id 分散到不同分片，各分片有自己的鎖，幾乎不會互相競爭
+SHARD_COUNT = 16
+
+
+class _Shard:
+    """單一分片 - 保存部分執行緒寫入的計數"""
+
+    __slots__ = ('lock', 'histograms', 'sums', 'counters')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: Dict[str, List[int]] = {}  # {事件: 各區間次數（非累計，最後一格為 +Inf）}
+        self.sums: Dict[str, float] = {}  # {事件: 延遲總和}
+        self.counters: Dict[Tuple[str, str], int] = {}  # {(指標名稱, 標籤值): 次數}
+
+
+class Metrics:
+    """
+    指標收集器
+    - 寫入時只鎖定所屬分片（依執行緒 id 分配），抓取時才合併所有分片
+    - 即時數值（連線數、房間數等）在抓取時才呼叫註冊的函式取得
+    """
+
+    def __init__(self, prefix: str = 'tictactoe'):
+        """
+        初始化指標收集器
+
+        Args:
+            prefix: 所有指標名稱的前綴
+        """
+        self.prefix = prefix
+        self._shards = [_Shard() for _ in range(SHARD_COUNT)]
+        self._gauges: List[Tuple[str, str, str, Callable[[], object]]] = []  # (名稱, 說明, 類型, 取值函式)
+        self._counter_help: Dict[str, str] = {}
+        # 事件處理的外掛 hook（例如剖析器），None 時直接呼叫處理函式
+        self.call_hook: Optional[Callable] = None
+
+    def _shard(self) -> _Shard:
+        """取得目前執行緒對應的分片"""
+        return self._shards[threading.get_ident() % SHARD_COUNT]
+
+    def observe(self, event: str, seconds: float):
+        """
+        記錄一次事件處理延遲
+
+        Args:
+            event: 事件名稱
+            seconds: 處理時間（秒）
+        """
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        shard = self._shard()
+        with shard.lock:
+            buckets = shard.histograms.get(event)
+            if buckets is None:
+                buckets = shard.histograms[event] = [0] * (len(LATENCY_BUCKETS) + 1)
+                shard.sums[event] = 0.0
+            buckets[index] += 1
+            shard.sums[event] += seconds
+
+    def inc(self, name: str, label: str = '', amount: int = 1):
+        """
+        累加計數器
+
+        Args:
+            name: 指標名稱（不含前綴）
+            label: 標籤值（例如事件名稱）
+            amount: 累加量
+        """
+        key = (name, label)
+        shard = self._shard()
+        with shard.lock:
+            shard.counters[key] = shard.counters.get(key, 0) + amount
+
+    def describe_counter(self, name: str, help_text: str):
+        """設定計數器的說明文字"""
+        self._counter_help[name] = help_text
+
+    def register_gauge(self, name: str, help_text: str, func: Callable[[], object],
+                       metric_type: str = 'gauge'):
+        """
+        註冊抓取時才取值的指標
+
+        Args:
+            name: 指標名稱（不含前綴）
+            help_text: 說明文字
+            func: 回傳數值，或 {'標籤="值"': 數值} 的 dict
+            metric_type: Prometheus 類型（由其他模組自行累計的計數可用 'counter'）
+        """
+        self._gauges = [gauge for gauge in self._gauges if gauge[0] != name]
+        self._gauges.append((name, help_text, metric_type, func))
+
+    def timed(self, event: str):
+        """
+        事件處理函式的計時裝飾器
+
+        Args:
+            event: 事件名稱（作為直方圖標籤）
+        """
+        def decorator(handler):
+            @wraps(handler)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    hook = self.call_hook
+                    if hook is None:
+                        return handler(*args, **kwargs)
+                    return hook(event, handler, args, kwargs)
+                finally:
+                    self.observe(event, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def instrument_emits(self, socketio):
+        """
+        統計所有 emit 次數（包含事件處理內與背景工作的 emit）
+
+        Args:
+            socketio: SocketIO 實例
+        """
+        server = socketio.server
+        original_emit = server.emit
+
+        @wraps(original_emit)
+        def counted_emit(event, *args, **kwargs):
+            self.inc('emits_total', event)
+            return original_emit(event, *args, **kwargs)
+
+        server.emit = counted_emit
+
+    def _merge(self):
+        """合併所有分片"""
+        histograms: Dict[str, List[int]] = {}
+        sums: Dict[str, float] = {}
+        counters: Dict[Tuple[str, str], int] = {}
+        for shard in self._shards:
+            with shard.lock:
+                for event, buckets in shard.histograms.items():
+                    merged = histograms.setdefault(event, [0] * len(buckets))
+                    for i, count in enumerate(buckets):
+                        merged[i] += count
+                    sums[event] = sums.get(event, 0.0) + shard.sums[event]
+                for key, value in shard.counters.items():
+                    counters[key] = counters.get(key, 0) + value
+        return histograms, sums, counters
+
+    def render(self) -> str:
+        """
+        輸出 Prometheus 文字格式
+
+        Returns:
+            str: 所有指標
+        """
+        histograms, sums, counters = self._merge()
+        lines = []
+
+        name = f'{self.prefix}_handler_latency_seconds'
+        lines.append(f'# HELP {name} Socket.IO 事件處理延遲')
+        lines.append(f'# TYPE {name} histogram')
+        for event in sorted(histograms):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histograms[event]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{event="{event}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{event="{event}"}} {sums[event]:.6f}')
+            lines.append(f'{name}_count{{event="{event}"}} {cumulative}')
+
+        for counter in sorted({key[0] for key in counters} | set(self._counter_help)):
+            name = f'{self.prefix}_{counter}'
+            lines.append(f'# HELP {name} {self._counter_help.get(counter, counter)}')
+            lines.append(f'# TYPE {name} counter')
+            for (metric, label), value in sorted(counters.items()):
+                if metric == counter:
+                    lines.append(f'{name}{{event="{label}"}} {value}' if label else f'{name} {value}')
+
+        for gauge, help_text, metric_type, func in self._gauges:
+            name = f'{self.prefix}_{gauge}'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            value = func()
+            if isinstance(value, dict):
+                for label, item in value.items():
+                    lines.append(f'{name}{{{label}}} {item}')
+            else:
+                lines.append(f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# 全域指標收集器實例 (singleton pattern)
+metrics = Metrics()
+metrics.describe_counter('emits_total', 'Socket.IO emit 次數')
@@ -0,0 +1,116 @@
+"""
+OutboundGuard.py - 每個連線的送出佇列上限與慢速客戶端處理
+定期檢查每個連線在 engine.io 中尚未送出的封包數：
+超過上限的連線標記為落後，之後的遊戲事件直接略過（不再堆積），
+佇列消化後補送一次完整狀態（resync）取代所有略過的事件；
+落後太久仍未恢復的連線直接中斷，讓每個連線佔用的記憶體有上限
+"""
+
+import time
+from typing import Callable, Dict, Iterable, List
+
+from Config import Config
+
+# 檢查佇列長度的間隔秒數
+CHECK_INTERVAL = 1.0
+
+
+class OutboundGuard:
+    """
+    慢速客戶端保護
+    - check() 掃描所有連線的送出佇列，更新落後名單、補送 resync 或中斷連線
+    - skip() 取出應略過的落後連線（傳給 emit 的 skip_sid）
+    """
+
+    def __init__(self, max_queue: int = 100, stale_timeout: float = 10,
+                 time_func: Callable[[], float] = time.monotonic):
+        """
+        初始化慢速客戶端保護
+
+        Args:
+            max_queue: 單一連線尚未送出的封包數上限（0 為停用）
+            stale_timeout: 落後超過此秒數仍未恢復即中斷連線
+            time_func: 取得目前時間的函式（測試時可替換）
+        """
+        self.max_queue = max_queue
+        self.stale_timeout = stale_timeout
+        self.time_func = time_func
+        self.lagging: Dict[str, float] = {}  # {sid: 開始落後的時間}
+        self.resync_count = 0  # 補送完整狀態的次數
+        self.disconnect_count = 0  # 因落後太久而中斷的連線數
+        self._started = False
+
+    def skip(self, sids: Iterable[str]) -> List[str]:
+        """
+        篩選出落後中的連線
+
+        Args:
+            sids: 即將送出事件的對象
+
+        Returns:
+            List[str]: 應略過的 sid（恢復後會收到 resync）
+        """
+        lagging = self.lagging
+        if not lagging:
+            return []
+        return [sid for sid in sids if sid in lagging]
+
+    def forget(self, sid: str):
+        """連線中斷時移除紀錄"""
+        self.lagging.pop(sid, None)
+
+    def check(self, server, resync: Callable[[str], None]):
+        """
+        掃描所有連線的送出佇列
+
+        - 未落後且佇列超過上限 → 標記為落後
+        - 落後中且佇列降到上限一半以下 → 解除並補送 resync
+        - 落後超過 stale_timeout 秒 → 中斷連線
+
+        Args:
+            server: python-socketio 的 Server（socketio.server）
+            resync: 補送完整狀態的函式，參數為 sid
+        """
+        now = self.time_func()
+        for eio_sid, eio_socket in list(server.eio.sockets.items()):
+            sid = server.manager.sid_from_eio_sid(eio_sid, '/')
+            if sid is None:
+                continue
+            depth = eio_socket.queue.qsize()
+            since = self.lagging.get(sid)
+            if since is None:
+                if depth > self.max_queue:
+                    self.lagging[sid] = now
+            elif depth <= self.max_queue // 2:
+                del self.lagging[sid]
+                self.resync_count += 1
+                resync(sid)
+            elif now - since > self.stale_timeout:
+                del self.lagging[sid]
+                self.disconnect_count += 1
+                server.disconnect(sid)
+
+    def start(self, socketio, scheduler, resync: Callable[[str], None]):
+        """
+        以共用排程器定期檢查（停用時不檢查；同一個實例只會啟動一次）
+
+        Args:
+            socketio: SocketIO 實例
+            scheduler: 共用計時排程器
+            resync: 補送完整狀態的函式，參數為 sid
+        """
+        if self.max_queue <= 0 or self._started:
+            return
+        self._started = True
+
+        def check():
+            try:
+                self.check(socketio.server, resync)
+            finally:
+                scheduler.schedule(CHECK_INTERVAL, check)
+
+        scheduler.schedule(CHECK_INTERVAL, check)
+
+
+# 全域慢速客戶端保護實例 (singleton pattern)
+outbound_guard = OutboundGuard(Config.OUTBOUND_QUEUE_LIMIT, Config.OUTBOUND_STALE_TIMEOUT)
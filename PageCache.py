@@ -0,0 +1,89 @@
+"""
+PageCache.py - 頁面片段快取
+頁面第一次渲染時，把每個請求不同的值（使用者名稱、圖示等）換成標記字串，
+渲染結果依標記切成固定片段快取；之後的請求只需把跳脫後的值接回片段，不再執行 Jinja
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+from flask import render_template
+from markupsafe import escape
+
+# 標記字串（只含不會被 HTML 跳脫的字元）
+_SLOT = '@@SLOT:{}@@'
+_SLOT_PATTERN = re.compile(r'@@SLOT:([A-Za-z0-9_.]+)@@')
+
+
+class PageCache:
+    """
+    頁面片段快取
+    - render() 的每個參數都視為「請求值」：
+      字串會變成標記；list 的每個元素各自變成標記（長度列入快取 key）；
+      空值（None、''、False）直接渲染進片段並列入快取 key（讓 {% if %} 分支各自快取）
+    - 快取 key 為 (模板, 各參數的形狀)，每種頁面變化只會渲染一次
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        初始化頁面快取
+
+        Args:
+            enabled: False 時每次都直接渲染（開發時修改模板可即時生效）
+        """
+        self.enabled = enabled
+        self._pages: Dict[tuple, Tuple[str, ...]] = {}  # {key: (片段, 標記名稱, 片段, ...)}
+
+    def render(self, template_name: str, **values) -> str:
+        """
+        渲染頁面（需在請求內呼叫）
+
+        Args:
+            template_name: 模板名稱
+            **values: 模板變數（每個請求可能不同的值）
+
+        Returns:
+            str: HTML
+        """
+        if not self.enabled:
+            return render_template(template_name, **values)
+
+        key = (template_name,) + tuple(sorted(
+            (name, len(value) if isinstance(value, list) else (True if value else value))
+            for name, value in values.items()
+        ))
+        parts = self._pages.get(key)
+        if parts is None:
+            parts = self._compile(template_name, values)
+            self._pages[key] = parts
+
+        # 展開成 {標記名稱: 跳脫後的值}
+        filled: Dict[str, str] = {}
+        for name, value in values.items():
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    filled[f'{name}.{i}'] = escape(item)
+            elif value:
+                filled[name] = escape(value)
+
+        return ''.join(part if i % 2 == 0 else filled[part] for i, part in enumerate(parts))
+
+    @staticmethod
+    def _compile(template_name: str, values: dict) -> Tuple[str, ...]:
+        """以標記字串渲染模板並切成片段"""
+        context = {}
+        for name, value in values.items():
+            if isinstance(value, list):
+                context[name] = [_SLOT.format(f'{name}.{i}') for i in range(len(value))]
+            elif value:
+                context[name] = _SLOT.format(name)
+            else:
+                context[name] = value
+        html = render_template(template_name, **context)
+        # re.split 保留分組：偶數位置為固定片段、奇數位置為標記名稱
+        parts: List[str] = _SLOT_PATTERN.split(html)
+        return tuple(parts)
+
+    def clear(self):
+        """清除所有快取的頁面"""
+        self._pages.clear()
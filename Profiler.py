@@ -0,0 +1,215 @@
+"""
+Profiler.py - 線上即時剖析工具
+由管理員開啟一段時間，對部分事件處理呼叫執行 cProfile 並彙整統計，
+也可以拍攝 tracemalloc 快照檢查房間相關的記憶體用量
+（關閉時不掛任何 hook，事件處理沒有額外成本）
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+from Metrics import metrics
+from TimerScheduler import TimerHandle, shared_scheduler
+
+# 記憶體報告只統計這些模組配置的記憶體（房間、遊戲狀態與事件處理）
+MEMORY_MODULES = ('Game.py', 'RoomManager.py', 'GameEvents.py', 'ChatEvents.py')
+
+# tracemalloc 保留的呼叫堆疊深度
+TRACEMALLOC_FRAMES = 5
+
+
+class Profiler:
+    """
+    事件處理剖析器
+    - start() 後依取樣比例對事件處理執行 cProfile，時間到由共用排程器自動停止
+    - 依事件名稱彙整 pstats，可隨時輸出文字報告
+    - 透過 Metrics.call_hook 掛入 metrics.timed，停止時移除 hook 並關閉 tracemalloc
+    """
+
+    def __init__(self, hook_target=metrics, time_func: Callable[[], float] = time.monotonic,
+                 scheduler=shared_scheduler):
+        """
+        初始化剖析器
+
+        Args:
+            hook_target: 提供 call_hook 屬性的物件（預設為全域 metrics）
+            time_func: 取得目前時間的函式（測試時可替換）
+            scheduler: 排程剖析結束的計時排程器（預設為全域共用排程器）
+        """
+        self.hook_target = hook_target
+        self.time_func = time_func
+        self.scheduler = scheduler
+        self.sample_rate = 0.0
+        self.deadline: Optional[float] = None
+        self.started_at: Optional[float] = None
+        self.calls: Dict[str, int] = {}  # {事件: 已剖析的呼叫數}
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._lock = threading.Lock()
+        self._memory_baseline: Optional[tracemalloc.Snapshot] = None
+        self._expiry: Optional[TimerHandle] = None  # 剖析結束的計時器
+
+    @property
+    def active(self) -> bool:
+        """是否正在剖析"""
+        return self.hook_target.call_hook is not None
+
+    def start(self, duration: float, sample_rate: float = 0.1, trace_memory: bool = False):
+        """
+        開始剖析（會清除上一輪的統計）
+
+        Args:
+            duration: 剖析秒數
+            sample_rate: 取樣比例（0~1，1 代表剖析每一次呼叫）
+            trace_memory: 是否同時開啟 tracemalloc
+        """
+        with self._lock:
+            self._stats = {}
+            self.calls = {}
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.started_at = self.time_func()
+        self.deadline = self.started_at + duration
+        if self._expiry:
+            self._expiry.cancel()
+        self._expiry = self.scheduler.schedule(duration, self.stop)
+        if trace_memory:
+            self.start_memory_trace()
+        self.hook_target.call_hook = self._call
+
+    def stop(self):
+        """停止剖析與記憶體追蹤（保留已收集的統計）"""
+        self.hook_target.call_hook = None
+        self.deadline = None
+        if self._expiry:
+            self._expiry.cancel()
+            self._expiry = None
+        self.stop_memory_trace()
+
+    def _call(self, event: str, handler: Callable, args: tuple, kwargs: dict):
+        """metrics.timed 的 hook：依取樣比例以 cProfile 執行事件處理"""
+        if random.random() >= self.sample_rate:
+            return handler(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 同一執行緒已有其他剖析器（例如事件迴圈模式下另一個協程正在被剖析）
+            return handler(*args, **kwargs)
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._add(event, profile)
+
+    def _add(self, event: str, profile: cProfile.Profile):
+        """將單次呼叫的統計合併到該事件的彙整結果"""
+        with self._lock:
+            stats = self._stats.get(event)
+            if stats is None:
+                self._stats[event] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+            self.calls[event] = self.calls.get(event, 0) + 1
+
+    def status(self) -> dict:
+        """
+        獲取剖析狀態
+
+        Returns:
+            dict: 是否進行中、剩餘秒數、取樣比例與各事件已剖析的呼叫數
+        """
+        remaining = None
+        if self.active and self.deadline is not None:
+            remaining = round(max(0.0, self.deadline - self.time_func()), 1)
+        with self._lock:
+            calls = dict(self.calls)
+        return {
+            'active': self.active,
+            'remaining': remaining,
+            'sample_rate': self.sample_rate,
+            'calls': calls,
+            'tracing_memory': tracemalloc.is_tracing(),
+        }
+
+    def report(self, sort: str = 'cumulative', limit: int = 30) -> str:
+        """
+        輸出各事件的彙整統計
+
+        Args:
+            sort: pstats 排序鍵（cumulative / tottime / calls ...，無效時使用 cumulative）
+            limit: 每個事件列出的函式數
+
+        Returns:
+            str: 文字報告
+        """
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            sort = 'cumulative'
+        status = self.status()
+        out = io.StringIO()
+        out.write(f"active={status['active']} remaining={status['remaining']} "
+                  f"sample_rate={status['sample_rate']}\n")
+        with self._lock:
+            for event in sorted(self._stats):
+                out.write(f"\n===== {event} ({self.calls[event]} calls) =====\n")
+                stats = self._stats[event]
+                stats.stream = out
+                stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    # ============================================================
+    # 記憶體快照
+    # ============================================================
+
+    def start_memory_trace(self):
+        """開啟 tracemalloc 並記錄基準快照"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._memory_baseline = self._snapshot()
+
+    def stop_memory_trace(self):
+        """關閉 tracemalloc（追蹤期間每次配置記憶體都有額外成本）"""
+        self._memory_baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        """拍攝只包含房間相關模組的快照"""
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(True, f'*{os.sep}{module}') for module in MEMORY_MODULES
+        ])
+
+    def memory_report(self, limit: int = 20) -> str:
+        """
+        輸出房間相關模組的記憶體用量（與開始追蹤時的基準比較）
+
+        Args:
+            limit: 列出的程式行數
+
+        Returns:
+            str: 文字報告
+        """
+        if not tracemalloc.is_tracing():
+            return 'tracemalloc 未開啟\n'
+
+        snapshot = self._snapshot()
+        total = sum(stat.size for stat in snapshot.statistics('filename'))
+        out = io.StringIO()
+        out.write(f'room modules total: {total / 1024:.1f} KiB\n\n')
+        if self._memory_baseline is not None:
+            stats = snapshot.compare_to(self._memory_baseline, 'lineno')
+        else:
+            stats = snapshot.statistics('lineno')
+        for stat in stats[:limit]:
+            out.write(f'{stat}\n')
+        return out.getvalue()
+
+
+# 全域剖析器實例 (singleton pattern)
+profiler = Profiler()
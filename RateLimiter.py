@@ -0,0 +1,100 @@
+"""
+RateLimiter.py - 每個連線的事件限流
+以 token bucket 限制單一 sid 各事件的頻率，超出的事件直接丟棄
+"""
+
+import time
+from typing import Callable, Dict, Tuple
+
+from Config import Config
+
+
+class TokenBucket:
+    """單一 token bucket - 以固定速率補充 token，最多累積 burst 個"""
+
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class RateLimiter:
+    """
+    事件限流器
+    - 以 (sid, 事件) 為 key，每次檢查 O(1)
+    - 未設定規則的事件一律放行
+    - 記錄各事件被拒絕的次數
+    """
+
+    def __init__(self, rules: Dict[str, Tuple[float, float]], time_func: Callable[[], float] = time.monotonic):
+        """
+        初始化限流器
+
+        Args:
+            rules: {事件名稱: (每秒補充 token 數, 最多累積 token 數)}，速率 <= 0 代表不限流
+            time_func: 取得目前時間的函式（測試時可替換）
+        """
+        self.rules = {event: rule for event, rule in rules.items() if rule[0] > 0}
+        self.time_func = time_func
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.rejected: Dict[str, int] = {event: 0 for event in self.rules}
+
+    def allow(self, sid: str, event: str) -> bool:
+        """
+        檢查並消耗一個 token
+
+        Args:
+            sid: Socket ID
+            event: 事件名稱
+
+        Returns:
+            bool: 是否放行
+        """
+        rule = self.rules.get(event)
+        if rule is None:
+            return True
+        rate, burst = rule
+
+        now = self.time_func()
+        key = (sid, event)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(burst, now)
+            self.buckets[key] = bucket
+        else:
+            bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated_at) * rate)
+            bucket.updated_at = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True
+
+        self.rejected[event] += 1
+        return False
+
+    def forget(self, sid: str):
+        """
+        移除斷線 sid 的所有 bucket
+
+        Args:
+            sid: Socket ID
+        """
+        for event in self.rules:
+            self.buckets.pop((sid, event), None)
+
+    def get_rejected_counts(self) -> Dict[str, int]:
+        """
+        獲取各事件被拒絕的次數
+
+        Returns:
+            Dict[str, int]: {事件名稱: 拒絕次數}
+        """
+        return dict(self.rejected)
+
+
+# 全域限流器實例 (singleton pattern)
+rate_limiter = RateLimiter({
+    'make_move': (Config.MOVE_RATE, Config.MOVE_BURST),
+    'chat message': (Config.CHAT_RATE, Config.CHAT_BURST),
+})
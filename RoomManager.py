@@ -3,15 +3,22 @@ RoomManager.py - 遊戲房間管理類別
 負責管理 PVP 模式的房間創建、玩家加入、遊戲狀態同步
 """
 
+import bisect
 import random
-from typing import Optional, Dict, List
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Dict, List, Tuple
+from Config import Config
 from Game import Game, Player
+from WireCodec import EncodedPayload
 
 
 class PlayerInfo:
     """玩家資訊類別 - 儲存單一玩家的連線資料"""
     
-    def __init__(self, sid: str, username: str, symbol: str):
+    def __init__(self, sid: str, username: str, symbol: str, icon: Optional[str] = None):
         """
         建立玩家實例，記錄 socket id 和符號
         
@@ -19,17 +26,21 @@ class PlayerInfo:
             sid: Socket ID
             username: 玩家名稱
             symbol: 玩家符號 ('X' 或 'O')
+            icon: 登入時選擇的圖示
         """
         self.sid = sid
         self.username = username
         self.symbol = symbol
+        self.icon = icon
+        self.resume_token = secrets.token_urlsafe(12)  # 斷線或熱重啟後重新連線回到原座位用（不送給對手，用過即換新）
     
     def to_dict(self) -> dict:
         """轉成 dict 方便傳給前端"""
         return {
             'sid': self.sid,
             'username': self.username,
-            'symbol': self.symbol
+            'symbol': self.symbol,
+            'icon': self.icon
         }
 
 
@@ -39,7 +50,8 @@ class GameRoom:
     管理一個房間內的遊戲狀態和玩家資訊
     """
     
-    def __init__(self, room_id: str, creator_sid: str, creator_username: str):
+    def __init__(self, room_id: str, creator_sid: str, creator_username: str,
+                 creator_icon: Optional[str] = None):
         """
         初始化遊戲房間
         
@@ -47,8 +59,11 @@ class GameRoom:
             room_id: 房間 ID
             creator_sid: 創建者 Socket ID
             creator_username: 創建者名稱
+            creator_icon: 創建者圖示
         """
         self.room_id = room_id
+        self.seq = 0  # 建立序號（由 RoomManager 指定，大廳列表的分頁游標）
+        self.created_at = time.time()  # 建立時間（epoch 秒）
         self.game = Game()  # 遊戲實例
         self.players: List[PlayerInfo] = [] # 玩家列表
         self.waiting = True  # 等待第二位玩家
@@ -59,21 +74,53 @@ class GameRoom:
         self.match_finished = False  # 比賽是否結束
         self.current_first_player = 'left'  # 當前先手玩家 ('left' or 'right')
         
+        # 計時（整場比賽每位玩家的剩餘秒數，0 代表未啟用）
+        self.clock = {'left': float(Config.MATCH_TIME_BASE), 'right': float(Config.MATCH_TIME_BASE)}
+        self.turn_started_at = time.monotonic()  # 本步開始時間
+        self.suspended_elapsed = 0.0  # 從快照恢復時，本步在排空前已用掉的秒數
+        self.timeout_side = None  # 本回合超時判負的一方
+        self.forfeit_side = None  # 比賽時間用完、整場判負的一方
+        self.clock_timer = None  # 共用排程器中的計時器代碼
+        self.clock_generation = 0  # 每次重新計時 +1，用來辨識過期的計時器
+        
+        # 最近的聊天訊息（固定長度，超過時自動捨棄最舊的）
+        self.chat_history = deque(maxlen=Config.CHAT_HISTORY_SIZE)
+        
         # 座位和符號（等第二位玩家加入後隨機分配）
         self.left_player = None
         self.right_player = None
         
+        # 狀態快取（房間或棋局有變動時才重建）
+        self._revision = 0  # 房間層級的變動計數
+        self._state_cache = None  # (版本, 狀態 dict)
+        self._encoded_cache = None  # (版本, {事件名稱: EncodedPayload})
+        
         # 先用臨時符號創建第一位玩家
-        first_player = PlayerInfo(creator_sid, creator_username, 'TEMP')
+        first_player = PlayerInfo(creator_sid, creator_username, 'TEMP', creator_icon)
         self.players.append(first_player)
     
-    def add_player(self, sid: str, username: str) -> bool:
+    @property
+    def version(self) -> int:
+        """房間狀態版本號（房間與棋局的變動計數總和，單調遞增）"""
+        return self._revision + self.game.version
+    
+    @property
+    def suspended(self) -> bool:
+        """是否有玩家斷線或尚未在熱重啟後重新連線（暫停下棋與計時）"""
+        return any(player.sid is None for player in self.players)
+    
+    def mark_dirty(self):
+        """標記房間狀態已變動，下次 get_state() 會重建快取"""
+        self._revision += 1
+    
+    def add_player(self, sid: str, username: str, icon: Optional[str] = None) -> bool:
         """
         添加第二位玩家到房間
         
         Args:
             sid: 玩家 Socket ID
             username: 玩家名稱
+            icon: 玩家圖示
             
         Returns:
             bool: 是否成功添加
@@ -82,7 +129,7 @@ class GameRoom:
             return False
         
         # 第二位玩家先用臨時符號
-        second_player = PlayerInfo(sid, username, 'TEMP')
+        second_player = PlayerInfo(sid, username, 'TEMP', icon)
         self.players.append(second_player)
         self.waiting = False # 已有兩位玩家，停止等待
         
@@ -90,6 +137,9 @@ class GameRoom:
         self._assign_seats_and_symbols()
         
         self.game.start()  # 開始遊戲
+        self.game.turn = self.left_player.symbol  # 左玩家先手
+        self.turn_started_at = time.monotonic()
+        self.mark_dirty()
         return True
     
     def remove_player(self, sid: str) -> bool:
@@ -105,6 +155,7 @@ class GameRoom:
         for player in self.players:
             if player.sid == sid:
                 self.players.remove(player)
+                self.mark_dirty()
                 return True
         return False
     
@@ -143,7 +194,7 @@ class GameRoom:
             elif player.sid == self.right_player.sid:
                 player.symbol = self.right_player.symbol
     
-    def make_move(self, sid: str, row: int, col: int) -> bool:
+    def make_move(self, sid: str, row: int, col: int, now: Optional[float] = None) -> bool:
         """
         執行移動（使用座標方式）
         
@@ -151,13 +202,14 @@ class GameRoom:
             sid: 玩家 Socket ID
             row: 行座標 (0-2)
             col: 列座標 (0-2)
+            now: 目前時間（time.monotonic()，預設自動取得）
             
         Returns:
             bool: 移動是否成功
         """
-        # 獲取玩家資訊
+        # 獲取玩家資訊（有玩家尚未恢復連線時暫停下棋）
         player = self.get_player_by_sid(sid)
-        if not player:
+        if not player or self.suspended:
             return False
         
         # 檢查是否輪到該玩家
@@ -165,7 +217,101 @@ class GameRoom:
             return False
         
         # 執行移動（直接使用座標）
-        return self.game.make_move(row, col, player.symbol)
+        if not self.game.make_move(row, col, player.symbol):
+            return False
+        
+        # 扣除本步用時並加上每步加秒
+        self._charge_clock(self.get_side(player.symbol), now)
+        return True
+    
+    def get_side(self, symbol: str) -> Optional[str]:
+        """
+        根據符號取得座位
+        
+        Args:
+            symbol: 'X' 或 'O'
+            
+        Returns:
+            Optional[str]: 'left' / 'right'，尚未分配座位時返回 None
+        """
+        if self.left_player and self.left_player.symbol == symbol:
+            return 'left'
+        if self.right_player and self.right_player.symbol == symbol:
+            return 'right'
+        return None
+    
+    @property
+    def round_in_progress(self) -> bool:
+        """本回合是否進行中（兩位玩家都在、已開始且尚未分出勝負）"""
+        return (len(self.players) == 2 and self.game.started
+                and self.game.winner is None and not self.match_finished
+                and not self.suspended)
+    
+    def _charge_clock(self, side: Optional[str], now: Optional[float] = None):
+        """扣除 side 本步用時、加上每步加秒，並開始對手的計時"""
+        if now is None:
+            now = time.monotonic()
+        if side and Config.MATCH_TIME_BASE > 0:
+            remaining = self.clock[side] - (now - self.turn_started_at)
+            self.clock[side] = max(0.0, remaining) + Config.MATCH_TIME_INCREMENT
+        self.turn_started_at = now
+    
+    def turn_time_left(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        取得目前輪到的玩家還剩多少秒（取單步限時與比賽剩餘時間較小者）
+        
+        Args:
+            now: 目前時間（time.monotonic()，預設自動取得）
+            
+        Returns:
+            Optional[float]: 剩餘秒數，未啟用計時或回合未進行時返回 None
+        """
+        if not self.round_in_progress:
+            return None
+        if now is None:
+            now = time.monotonic()
+        
+        elapsed = now - self.turn_started_at
+        limits = []
+        if Config.TURN_TIME_LIMIT > 0:
+            limits.append(Config.TURN_TIME_LIMIT - elapsed)
+        if Config.MATCH_TIME_BASE > 0:
+            limits.append(self.clock[self.get_side(self.game.turn)] - elapsed)
+        if not limits:
+            return None
+        return max(0.0, min(limits))
+    
+    def timeout(self, now: Optional[float] = None) -> bool:
+        """
+        目前輪到的玩家超時：本回合判負並計入戰績；
+        若是整場比賽時間用完，則比賽直接結束
+        
+        Args:
+            now: 目前時間（time.monotonic()，預設自動取得）
+            
+        Returns:
+            bool: 是否成功判定超時
+        """
+        if not self.round_in_progress:
+            return False
+        if now is None:
+            now = time.monotonic()
+        
+        side = self.get_side(self.game.turn)
+        bank_exhausted = False
+        if Config.MATCH_TIME_BASE > 0:
+            self.clock[side] = max(0.0, self.clock[side] - (now - self.turn_started_at))
+            bank_exhausted = self.clock[side] <= 0
+        self.turn_started_at = now
+        
+        self.game.forfeit(self.game.turn)
+        self.timeout_side = side
+        self.check_round_end()
+        if bank_exhausted:
+            self.match_finished = True
+            self.forfeit_side = side
+        self.mark_dirty()
+        return True
     
     def reset(self):
         """重置遊戲（新的一回合）"""
@@ -176,11 +322,13 @@ class GameRoom:
         # 先檢查當前比賽狀態是否已達結束條件
         if self.scores['left'] >= 3 or self.scores['right'] >= 3:
             self.match_finished = True
+            self.mark_dirty()
             return
         
         # 檢查是否已經打完5戰（round_count 從0開始，打完第5戰時 round_count == 4）
         if self.round_count >= 4:
             self.match_finished = True
+            self.mark_dirty()
             return
         
         # 增加回合數（開始新的一回合）
@@ -199,6 +347,32 @@ class GameRoom:
         self.game.reset()
         self.game.turn = first_symbol
         self.game.started = True
+        self.timeout_side = None
+        self.turn_started_at = time.monotonic()
+        self.mark_dirty()
+    
+    def start_new_match(self):
+        """開始新比賽（新的5戰3勝）：分數歸零並重新分配座位和符號"""
+        # 重置所有分數和回合數
+        self.scores = {'left': 0, 'right': 0, 'draw': 0}
+        self.round_count = 0
+        self.match_finished = False
+        
+        # 重新隨機分配座位和符號
+        self._assign_seats_and_symbols()
+        
+        # 重置遊戲，左玩家先手
+        self.game.reset()
+        self.game.turn = self.left_player.symbol
+        self.game.started = True
+        self.current_first_player = 'left'
+        
+        # 重置計時
+        self.clock = {'left': float(Config.MATCH_TIME_BASE), 'right': float(Config.MATCH_TIME_BASE)}
+        self.timeout_side = None
+        self.forfeit_side = None
+        self.turn_started_at = time.monotonic()
+        self.mark_dirty()
     
     def check_round_end(self) -> bool:
         """檢查回合是否結束並更新戰績"""
@@ -218,28 +392,214 @@ class GameRoom:
                 # 已經打完第5回合（round_count 從0開始，第5回合時 round_count = 4）
                 self.match_finished = True
             
+            self.mark_dirty()
             return True
         return False
     
     def get_state(self) -> dict:
         """
-        獲取房間狀態
+        獲取房間狀態（依版本號快取，狀態未變動時直接回傳同一份 dict）
+        
+        注意：回傳的 dict 為共用快取，呼叫端只能讀取不可修改
         
         Returns:
             dict: 房間狀態字典
         """
+        version = self.version
+        cache = self._state_cache
+        if cache is None or cache[0] != version:
+            cache = (version, self._build_state())
+            self._state_cache = cache
+        return cache[1]
+    
+    def get_encoded(self, event: str, build: Callable[[dict], dict]) -> EncodedPayload:
+        """
+        獲取預先編碼好的房間廣播 payload（每個狀態版本、每種事件只做一次 JSON 編碼）
+        
+        Args:
+            event: 事件名稱
+            build: 由 get_state() 組出事件內容的函式
+        
+        Returns:
+            EncodedPayload: 房間內所有廣播共用的編碼結果
+        """
+        version = self.version
+        cache = self._encoded_cache
+        if cache is None or cache[0] != version:
+            cache = (version, {})
+            self._encoded_cache = cache
+        encoded = cache[1].get(event)
+        if encoded is None:
+            encoded = cache[1][event] = EncodedPayload(build(self.get_state()))
+        return encoded
+    
+    def get_state_for(self, sid: str) -> dict:
+        """
+        獲取某位玩家視角的完整狀態（房間狀態加上自己的符號與座位，恢復棋局與重新同步用）
+        
+        Args:
+            sid: Socket ID
+        
+        Returns:
+            dict: 房間狀態字典（新的 dict，可修改）
+        """
+        player = self.get_player_by_sid(sid)
+        symbol = player.symbol if player else None
+        return dict(self.get_state(), your_symbol=symbol, my_side=self.get_side(symbol) if symbol else None)
+    
+    def get_missed_moves(self, known) -> Optional[List[dict]]:
+        """
+        取得客戶端斷線期間錯過的移動（重新連線時只補送這些，不送完整狀態）
+        
+        只在客戶端停在同一局、本局仍在進行且有完整下棋紀錄時適用
+        
+        Args:
+            known: 客戶端最後看到的狀態 {'generation': 棋局代數, 'moves': 已收到的移動數}
+        
+        Returns:
+            Optional[List[dict]]: 依序的 move_made payload，無法補送時返回 None（改送完整狀態）
+        """
+        game = self.game
+        if not isinstance(known, dict) or known.get('generation') != game.generation:
+            return None
+        if game.winner is not None or self.match_finished or len(game.moves) != game.move_count:
+            return None
+        count = known.get('moves')
+        if type(count) is not int or not 0 <= count <= len(game.moves):
+            return None
+        missed = []
+        for row, col in game.moves[count:]:
+            symbol = game.board[row][col]
+            missed.append({'row': row, 'col': col, 'symbol': symbol,
+                           'turn': 'O' if symbol == 'X' else 'X'})
+        return missed
+    
+    def get_summary(self) -> dict:
+        """
+        獲取大廳列表用的房間摘要（只含房間集合層級的資訊，不含棋盤與戰績）
+        
+        Returns:
+            dict: {'room_id', 'status', 'players', 'created_at'}
+        """
+        return {
+            'room_id': self.room_id,
+            'status': 'waiting' if self.waiting else 'playing',
+            'players': [{'username': player.username, 'icon': player.icon} for player in self.players],
+            'created_at': round(self.created_at, 3)
+        }
+    
+    def to_snapshot(self, now: Optional[float] = None) -> dict:
+        """
+        匯出房間快照（精簡格式：棋盤為字串、戰績與計時為陣列，本步計時改存已用秒數）
+        
+        Args:
+            now: 目前時間（time.monotonic()，預設自動取得）
+            
+        Returns:
+            dict: 可 JSON 編碼的快照
+        """
+        if now is None:
+            now = time.monotonic()
+        game = self.game
+        seats = {id(self.left_player): 'left', id(self.right_player): 'right'}
+        # 暫停中（有玩家斷線）的時間不算思考時間：存斷線當下已用掉的秒數
+        elapsed = self.suspended_elapsed if self.suspended else now - self.turn_started_at
+        return {
+            'id': self.room_id,
+            'created': round(self.created_at, 3),
+            'players': [[player.resume_token, player.username, player.icon, player.symbol,
+                         seats.get(id(player))] for player in self.players],
+            'size': game.size,
+            'board': ''.join(cell or '.' for row in game.board for cell in row),
+            'turn': game.turn,
+            'winner': game.winner,
+            'lines': game.winning_lines,
+            'started': game.started,
+            'moves': game.move_count,
+            'gv': game.version,
+            'gen': game.generation,
+            'rev': self._revision,
+            'scores': [self.scores['left'], self.scores['right'], self.scores['draw']],
+            'round': self.round_count,
+            'finished': self.match_finished,
+            'first': self.current_first_player,
+            'clock': [round(self.clock['left'], 3), round(self.clock['right'], 3)],
+            'elapsed': round(elapsed, 3),
+            'timeout': self.timeout_side,
+            'forfeit': self.forfeit_side,
+            'chat': list(self.chat_history)
+        }
+    
+    @classmethod
+    def from_snapshot(cls, data: dict) -> 'GameRoom':
+        """
+        從快照重建房間（玩家 sid 為 None，直到帶恢復權杖重新連線）
+        
+        Args:
+            data: to_snapshot() 的結果
+            
+        Returns:
+            GameRoom: 暫停中的房間
+        """
+        first = data['players'][0]
+        room = cls(data['id'], None, first[1], first[2])
+        room.created_at = data['created']
+        room.players = []
+        for token, username, icon, symbol, seat in data['players']:
+            player = PlayerInfo(None, username, symbol, icon)
+            player.resume_token = token
+            room.players.append(player)
+            if seat == 'left':
+                room.left_player = player
+            elif seat == 'right':
+                room.right_player = player
+        room.waiting = len(room.players) < 2
+        
+        size = data['size']
+        game = Game(size)
+        cells = [None if cell == '.' else cell for cell in data['board']]
+        game.board = [cells[row * size:(row + 1) * size] for row in range(size)]
+        game.turn = data['turn']
+        game.winner = data['winner']
+        game.winning_lines = data['lines']
+        game.started = data['started']
+        game.move_count = data['moves']
+        game.version = data['gv']
+        game.generation = data.get('gen', 0)  # 舊版行程寫出的快照沒有此欄位
+        room.game = game
+        
+        room.scores = dict(zip(('left', 'right', 'draw'), data['scores']))
+        room.round_count = data['round']
+        room.match_finished = data['finished']
+        room.current_first_player = data['first']
+        room.clock = dict(zip(('left', 'right'), data['clock']))
+        room.suspended_elapsed = data['elapsed']
+        room.timeout_side = data['timeout']
+        room.forfeit_side = data['forfeit']
+        room.chat_history.extend(data['chat'])
+        room._revision = data['rev']
+        room.mark_dirty()  # 版本號延續快照並再 +1，客戶端持有的舊版本一律視為過期
+        return room
+    
+    def _build_state(self) -> dict:
+        """重建房間狀態字典（棋盤和戰績會複製一份，避免快取被後續變動影響）"""
         return {
             'room_id': self.room_id,
             'players': [player.to_dict() for player in self.players],
-            'board': self.game.board,
+            'board': [row[:] for row in self.game.board],
             'turn': self.game.turn,
             'winner': self.game.winner,
+            'winning_lines': self.game.winning_lines,
             'waiting': self.waiting,
             'started': self.game.started,
-            'scores': self.scores,
+            'generation': self.game.generation,
+            'scores': dict(self.scores),
             'round_count': self.round_count,
             'match_finished': self.match_finished,
             'current_first_player': self.current_first_player,
+            'clock': {side: round(seconds, 1) for side, seconds in self.clock.items()},
+            'timeout_side': self.timeout_side,
+            'forfeit_side': self.forfeit_side,
             'left_player': self.left_player.to_dict() if self.left_player else None,
             'right_player': self.right_player.to_dict() if self.right_player else None
         }
@@ -257,14 +617,57 @@ class RoomManager:
         self.rooms: Dict[str, GameRoom] = {}
         # 玩家到房間的映射：{sid: room_id}
         self.player_to_room: Dict[str, str] = {}
+        # 房間狀態鎖（可重入，事件處理函式之間可互相呼叫）
+        self.lock = threading.RLock()
+        # 大廳（未進入房間的玩家）的最近聊天訊息
+        self.lobby_chat_history = deque(maxlen=Config.CHAT_HISTORY_SIZE)
+        
+        # 大廳列表索引（建立、加入、離開房間時同步更新）
+        self.rooms_version = 0  # 房間集合版本號（單調遞增，大廳列表的 ETag）
+        self._next_seq = 0  # 下一個房間建立序號
+        self._listing_seqs: List[int] = []  # 依建立順序排列的序號（分頁用）
+        self._listing: Dict[int, dict] = {}  # {建立序號: 房間摘要}
+        
+        # 斷線或從快照恢復、玩家尚未重新連線的座位：{恢復權杖: 房間 ID}
+        self._resume_tokens: Dict[str, str] = {}
+    
+    def _index_room(self, room: GameRoom):
+        """新增或更新房間在大廳列表中的摘要"""
+        if room.seq not in self._listing:
+            self._next_seq += 1
+            room.seq = self._next_seq
+            self._listing_seqs.append(room.seq)  # 序號遞增，append 後仍保持排序
+        self._listing[room.seq] = room.get_summary()
+        self.rooms_version += 1
     
-    def create_room(self, sid: str, username: str) -> str:
+    def _unindex_room(self, room: GameRoom):
+        """從大廳列表移除房間"""
+        if self._listing.pop(room.seq, None) is None:
+            return
+        index = bisect.bisect_left(self._listing_seqs, room.seq)
+        del self._listing_seqs[index]
+        self.rooms_version += 1
+    
+    def clear(self):
+        """清除所有房間與玩家對應（版本號繼續遞增，舊的 ETag 不會誤中）"""
+        for room in self.rooms.values():
+            if room.clock_timer:
+                room.clock_timer.cancel()
+        self.rooms.clear()
+        self.player_to_room.clear()
+        self._resume_tokens.clear()
+        self._listing_seqs.clear()
+        self._listing.clear()
+        self.rooms_version += 1
+    
+    def create_room(self, sid: str, username: str, icon: Optional[str] = None) -> str:
         """
         創建新房間
         
         Args:
             sid: 創建者 Socket ID
             username: 創建者名稱
+            icon: 創建者圖示
             
         Returns:
             str: 房間 ID
@@ -273,13 +676,14 @@ class RoomManager:
         room_id = f"room_{sid[:8]}_{random.randint(1000, 9999)}" # eg. room_abcd1234_5678
         
         # 創建房間
-        room = GameRoom(room_id, sid, username)
+        room = GameRoom(room_id, sid, username, icon)
         self.rooms[room_id] = room
         self.player_to_room[sid] = room_id
+        self._index_room(room)
         
         return room_id
     
-    def join_room(self, room_id: str, sid: str, username: str) -> bool:
+    def join_room(self, room_id: str, sid: str, username: str, icon: Optional[str] = None) -> bool:
         """
         加入現有房間
         
@@ -287,6 +691,7 @@ class RoomManager:
             room_id: 房間 ID
             sid: 玩家 Socket ID
             username: 玩家名稱
+            icon: 玩家圖示
             
         Returns:
             bool: 是否成功加入
@@ -295,10 +700,11 @@ class RoomManager:
             return False
         
         room = self.rooms[room_id]
-        success = room.add_player(sid, username)
+        success = room.add_player(sid, username, icon)
         
         if success:
             self.player_to_room[sid] = room_id
+            self._index_room(room)
         
         return success
     
@@ -321,16 +727,50 @@ class RoomManager:
             room.remove_player(sid)
             # 如果房間為空或只剩一人，刪除房間
             if len(room.players) <= 1:
-                # 如果還有一人，也要移除他的映射
-                for player in room.players:
-                    if player.sid in self.player_to_room:
-                        del self.player_to_room[player.sid]
-                del self.rooms[room_id]
+                # 如果還有一人，也要移除他的映射（斷線保留座位中的玩家則移除其恢復權杖）
+                self._dissolve(room)
+            else:
+                self._index_room(room)
         
         if sid in self.player_to_room:
             del self.player_to_room[sid]
         return room_id
     
+    def add_chat_message(self, room_id: Optional[str], entry: dict) -> bool:
+        """
+        記錄一則聊天訊息到房間（或大廳）的歷史
+        
+        Args:
+            room_id: 房間 ID，None 代表大廳
+            entry: 訊息 {'username', 'message', 'time'}
+            
+        Returns:
+            bool: 是否記錄成功（房間不存在時返回 False）
+        """
+        if room_id is None:
+            self.lobby_chat_history.append(entry)
+            return True
+        room = self.rooms.get(room_id)
+        if not room:
+            return False
+        room.chat_history.append(entry)
+        return True
+    
+    def get_chat_history(self, room_id: Optional[str]) -> List[dict]:
+        """
+        獲取房間（或大廳）的最近聊天訊息（由舊到新）
+        
+        Args:
+            room_id: 房間 ID，None 代表大廳
+            
+        Returns:
+            List[dict]: 聊天訊息列表，房間不存在時為空
+        """
+        if room_id is None:
+            return list(self.lobby_chat_history)
+        room = self.rooms.get(room_id)
+        return list(room.chat_history) if room else []
+    
     def get_room_count(self) -> int:
         """
         獲取當前房間數量
@@ -368,6 +808,30 @@ class RoomManager:
         return sum(1 for room in self.rooms.values() 
                   if len(room.players) == 2 and room.game.started and not room.waiting)
     
+    def list_rooms(self, status: Optional[str] = None, cursor: int = 0,
+                   limit: int = 50) -> Tuple[List[dict], Optional[int]]:
+        """
+        依建立順序列出房間摘要（游標分頁，房間增減時不會重複或跳過其他房間）
+        
+        Args:
+            status: 'waiting' / 'playing'，None 代表全部
+            cursor: 只列出建立序號大於此值的房間（帶入上一頁的 next_cursor）
+            limit: 最多筆數
+            
+        Returns:
+            Tuple[List[dict], Optional[int]]: (房間摘要列表, 下一頁游標；沒有下一頁時為 None)
+        """
+        rooms = []
+        seqs = self._listing_seqs
+        for index in range(bisect.bisect_right(seqs, cursor), len(seqs)):
+            summary = self._listing[seqs[index]]
+            if status is not None and summary['status'] != status:
+                continue
+            if len(rooms) == limit:
+                return rooms, seqs[index - 1] if rooms else None
+            rooms.append(summary)
+        return rooms, None
+    
     def get_available_room(self) -> Optional[str]:
         """
         獲取一個等待中的房間
@@ -380,6 +844,128 @@ class RoomManager:
                 return room_id
         return None
     
+    def snapshot(self) -> dict:
+        """
+        匯出所有對戰中房間的快照（等待對手的房間不保存，玩家重新配對即可）
+        
+        Returns:
+            dict: {'saved_at': epoch 秒, 'rooms': [房間快照, ...]}
+        """
+        now = time.monotonic()
+        return {
+            'saved_at': time.time(),
+            'rooms': [room.to_snapshot(now) for room in self.rooms.values() if not room.waiting]
+        }
+    
+    def restore(self, data: dict) -> List[str]:
+        """
+        載入快照中的房間（房間暫停，等待玩家帶恢復權杖重新連線）
+        
+        Args:
+            data: snapshot() 的結果
+            
+        Returns:
+            List[str]: 載入的房間 ID（已存在的房間會被略過）
+        """
+        restored = []
+        for entry in data.get('rooms', []):
+            room = GameRoom.from_snapshot(entry)
+            if room.room_id in self.rooms:
+                continue
+            self.rooms[room.room_id] = room
+            self._index_room(room)
+            for player in room.players:
+                self._resume_tokens[player.resume_token] = room.room_id
+            restored.append(room.room_id)
+        return restored
+    
+    def holds_seat(self, token) -> bool:
+        """
+        恢復權杖是否仍保留著座位（斷線或熱重啟後尚未回來、房間也還沒解散）
+        
+        Args:
+            token: 客戶端送來的恢復權杖
+        
+        Returns:
+            bool: 權杖有效時返回 True
+        """
+        return isinstance(token, str) and token in self._resume_tokens
+    
+    def resume_player(self, token: str, sid: str) -> Optional[GameRoom]:
+        """
+        以恢復權杖讓重新連線的玩家回到快照中的座位
+        
+        Args:
+            token: 恢復權杖
+            sid: 新的 Socket ID
+            
+        Returns:
+            Optional[GameRoom]: 回到的房間，權杖無效或房間已解散時返回 None
+        """
+        room = self.rooms.get(self._resume_tokens.pop(token, None))
+        if not room:
+            return None
+        for player in room.players:
+            if player.resume_token == token and player.sid is None:
+                player.sid = sid
+                player.resume_token = secrets.token_urlsafe(12)  # 權杖只能用一次
+                self.player_to_room[sid] = room.room_id
+                if not room.suspended:
+                    # 所有玩家都回來了：本步從排空前已用掉的秒數繼續計時
+                    room.turn_started_at = time.monotonic() - room.suspended_elapsed
+                room.mark_dirty()
+                return room
+        return None
+    
+    def suspend_player(self, sid: str) -> Optional[str]:
+        """
+        對戰中的玩家斷線：保留座位等待帶恢復權杖重新連線（房間暫停下棋與計時）
+        
+        Args:
+            sid: 斷線玩家的 Socket ID
+        
+        Returns:
+            Optional[str]: 重新連線用的恢復權杖，玩家不在對戰中的房間時返回 None
+        """
+        room = self.rooms.get(self.player_to_room.get(sid))
+        if not room or room.waiting:
+            return None
+        player = room.get_player_by_sid(sid)
+        if not room.suspended:
+            # 記下本步已用掉的秒數，所有玩家回來後從這裡繼續計時
+            room.suspended_elapsed = time.monotonic() - room.turn_started_at
+        player.sid = None
+        del self.player_to_room[sid]
+        self._resume_tokens[player.resume_token] = room.room_id
+        room.mark_dirty()
+        return player.resume_token
+    
+    def expire_player(self, token: str) -> Optional[GameRoom]:
+        """
+        斷線玩家逾時未帶權杖回來：解散其房間
+        
+        Args:
+            token: suspend_player() 發出（或從快照載入）的恢復權杖
+        
+        Returns:
+            Optional[GameRoom]: 被解散的房間，玩家已回來或房間已不存在時返回 None
+        """
+        room = self.rooms.get(self._resume_tokens.get(token))
+        if not room:
+            return None
+        self._dissolve(room)
+        return room
+    
+    def _dissolve(self, room: GameRoom):
+        """解散房間並移除所有玩家對應與恢復權杖"""
+        if room.clock_timer:
+            room.clock_timer.cancel()
+        for player in room.players:
+            self._resume_tokens.pop(player.resume_token, None)
+            self.player_to_room.pop(player.sid, None)
+        del self.rooms[room.room_id]
+        self._unindex_room(room)
+    
     def get_room(self, room_id: str) -> Optional[GameRoom]:
         """
         獲取房間實例
@@ -446,3 +1032,7 @@ class RoomManager:
         
         room.reset()
         return room.get_state()
+
+
+# 全域房間管理器實例 (singleton pattern)
+room_manager = RoomManager()
@@ -0,0 +1,150 @@
+"""
+TimerScheduler.py - 共用計時排程器
+以單一背景工作搭配最小堆積管理所有房間的計時器，
+避免每個房間各自建立 threading.Timer
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """計時器控制代碼 - 可用於取消尚未觸發的計時器"""
+
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline: float, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """取消計時器（延遲刪除，觸發時直接略過）"""
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """
+    共用計時排程器
+    - schedule / cancel 皆為 O(log n) / O(1)
+    - 由單一背景工作睡到最早的到期時間（最多 tick 秒）；排入更早到期的計時器時立即喚醒，
+      短延遲的計時器（例如聊天合併的時間窗）不會被拉長到 tick 的倍數
+    """
+
+    def __init__(self, time_func: Callable[[], float] = time.monotonic, tick: float = 0.05):
+        """
+        初始化排程器
+
+        Args:
+            time_func: 取得目前時間的函式（測試時可替換）
+            tick: 背景工作兩次檢查之間最長的間隔秒數
+        """
+        self.time_func = time_func
+        self.tick = tick
+        self._heap: List[tuple] = []  # (deadline, 序號, TimerHandle)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()  # 排入新的最早計時器時喚醒背景工作
+        self._running = False
+
+    def schedule(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        """
+        排程一個計時器
+
+        Args:
+            delay: 延遲秒數
+            callback: 到期時呼叫的函式
+            *args: 傳給 callback 的參數
+
+        Returns:
+            TimerHandle: 可用於取消的控制代碼
+        """
+        handle = TimerHandle(self.time_func() + delay, callback, args)
+        with self._lock:
+            heapq.heappush(self._heap, (handle.deadline, next(self._counter), handle))
+            earliest = self._heap[0][2] is handle
+        if earliest and self._running:
+            self._wakeup.set()
+        return handle
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """
+        執行所有已到期的計時器
+
+        Args:
+            now: 目前時間（預設使用 time_func）
+
+        Returns:
+            int: 執行的計時器數量
+        """
+        if now is None:
+            now = self.time_func()
+
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                handle = heapq.heappop(self._heap)[2]
+                if not handle.cancelled:
+                    due.append(handle)
+
+        # 在鎖外執行 callback，避免 callback 內再排程時死結
+        for handle in due:
+            handle.callback(*handle.args)
+        return len(due)
+
+    @property
+    def running(self) -> bool:
+        """背景排程迴圈是否已啟動"""
+        return self._running
+    
+    def pending_count(self) -> int:
+        """取得尚未觸發（含已取消但尚未清除）的計時器數量"""
+        return len(self._heap)
+
+    def start(self, socketio):
+        """
+        以 Socket.IO 的背景工作啟動排程迴圈（同一個排程器只會啟動一次）
+
+        Args:
+            socketio: SocketIO 實例（依其 async_mode 使用執行緒或協程）
+        """
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        socketio.start_background_task(self._run)
+
+    def _run(self):
+        """背景排程迴圈（事件迴圈模式下 threading 已被 monkey patch，等待時會讓出給其他協程）"""
+        while self._running:
+            # 先清除喚醒旗標再檢查：檢查期間排入的計時器會讓下一次等待立即返回
+            self._wakeup.clear()
+            try:
+                self.run_due()
+            except Exception:  # 單一計時器失敗不可中斷整個排程器
+                logger.exception('計時器執行失敗')
+            self._wakeup.wait(self._next_delay())
+
+    def _next_delay(self) -> float:
+        """距離最早到期的計時器還有多久（沒有計時器或超過 tick 時為 tick）"""
+        with self._lock:
+            if not self._heap:
+                return self.tick
+            deadline = self._heap[0][0]
+        return min(self.tick, max(0.0, deadline - self.time_func()))
+
+    def stop(self):
+        """停止背景排程迴圈"""
+        self._running = False
+        self._wakeup.set()
+
+
+# 全域共用排程器實例 (singleton pattern)：步時計時器、聊天訊息合併等都在同一個背景工作中處理
+shared_scheduler = TimerScheduler()
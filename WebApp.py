@@ -3,14 +3,46 @@ WebApp.py - Flask 應用主程式（類別化）
 負責路由管理和 HTTP 請求處理
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session
+from Config import Config
+
+# 事件迴圈模式必須在載入其他模組前 monkey patch（讓 threading / socket 變成協程版本）
+if Config.ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif Config.ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, Response, abort, jsonify, request, redirect, url_for, session
 from flask_socketio import SocketIO
 from flask_cors import CORS
+import hmac
+import logging
 import random
+import signal
 
-from Config import Config
 from ChatEvents import register_chat_events
-from GameEvents import register_game_events
+from GameEvents import register_game_events, room_manager, turn_scheduler
+from TimerScheduler import shared_scheduler
+from Metrics import metrics
+from ChatArchive import chat_archive
+from ChatFilter import chat_filter
+from AssetPipeline import AssetPipeline
+from PageCache import PageCache
+from RateLimiter import rate_limiter
+from HotRestart import hot_restart
+from AdmissionControl import admission
+from OutboundGuard import outbound_guard
+import WireCodec
+
+logger = logging.getLogger(__name__)
+
+# 排空後等待多久再結束行程（讓 server_draining / resume_token 送達客戶端）
+DRAIN_FLUSH_SECONDS = 1.0
+
+# eventlet WSGI 伺服器同時處理的連線數上限（預設只有 1024，每個 WebSocket 連線各佔一個；
+# 實際的連線數上限由准入控制的 MAX_SOCKETS 決定）
+EVENTLET_MAX_CONNECTIONS = 100000
 
 
 class WebApp:
@@ -21,16 +53,26 @@ class WebApp:
     
     def __init__(self):
         """初始化 Web 應用"""
+        self.ready = False  # 所有路由與事件註冊、可選子系統啟動完成後才視為可接流量（/readyz）
+        
         # 創建 Flask 應用
         self.App = Flask(__name__)
         CORS(self.App)
         self.App.secret_key = Config.SECRET_KEY
         
+        # 靜態資源指紋與預先壓縮（模板以 asset_url() 取得網址）
+        self.Assets = AssetPipeline(self.App.static_folder)
+        self.Assets.init_app(self.App, enabled=Config.ASSET_PIPELINE)
+        
+        # 頁面片段快取（只有使用者名稱、圖示等值每次填入）
+        self.Pages = PageCache(enabled=Config.PAGE_CACHE)
+        
         # 創建 Socket.IO 實例
         self.SocketIO = SocketIO(
             self.App, 
-            async_mode='threading', 
-            cors_allowed_origins="*"
+            async_mode=Config.ASYNC_MODE, 
+            cors_allowed_origins="*",
+            json=WireCodec.PacketJSON  # 房間廣播共用的預先編碼 payload 直接嵌入封包
         )
         
         # 註冊路由
@@ -38,10 +80,106 @@ class WebApp:
         self.App.route('/', methods=['GET', 'POST'])(self.home)
         self.App.route('/reset')(self.reset)
         self.App.route('/logout')(self.logout)
+        self.App.route('/metrics')(self.metrics)
+        self.App.route('/api/rooms')(self.list_rooms)
+        self.App.route('/healthz')(self.healthz)
+        self.App.route('/readyz')(self.readyz)
+        # 管理端點只在設定 ADMIN_TOKEN 時註冊（未設定時不存在，也省下啟動時的路由編譯）
+        if Config.ADMIN_TOKEN:
+            self._register_admin_routes()
         
         # 註冊 Socket.IO 事件
         register_chat_events(self.SocketIO)
-        register_game_events(self.SocketIO)
+        register_game_events(self.SocketIO, self.App)
+        
+        # 註冊指標
+        self._register_metrics()
+        
+        # 可選子系統（聊天封存的 SQLite 建表與寫入執行緒、禁用字清單編譯）不在建構時執行：
+        # 有設定時在背景啟動，create_app() 不需等待，完成前 /readyz 回 503
+        if chat_archive.enabled or chat_filter.path:
+            self.SocketIO.start_background_task(self._start_optional_subsystems)
+        else:
+            self.ready = True
+    
+    def _start_optional_subsystems(self):
+        """啟動聊天封存並載入、監看禁用字清單，完成後才視為就緒（失敗時維持未就緒）"""
+        try:
+            chat_archive.start()
+            if chat_filter.path and not chat_filter.word_count:
+                chat_filter.reload()
+            chat_filter.watch(shared_scheduler, Config.CHAT_FILTER_RELOAD_INTERVAL)
+        except Exception:
+            logger.exception('可選子系統啟動失敗')
+            return
+        self.ready = True
+    
+    def _register_admin_routes(self):
+        """註冊管理端點（需 X-Admin-Token）"""
+        self.App.route('/admin/profile')(self.profile_report)
+        self.App.route('/admin/profile/start', methods=['POST'])(self.profile_start)
+        self.App.route('/admin/profile/stop', methods=['POST'])(self.profile_stop)
+        self.App.route('/admin/memory')(self.memory_report)
+        self.App.route('/admin/chat/search')(self.chat_search)
+        self.App.route('/admin/chat/filter/reload', methods=['POST'])(self.chat_filter_reload)
+        self.App.route('/admin/drain', methods=['POST'])(self.drain)
+    
+    def _register_metrics(self):
+        """註冊 emit 統計與抓取時才取值的指標"""
+        metrics.instrument_emits(self.SocketIO)
+        metrics.register_gauge(
+            'connected_sockets', '目前連線數',
+            lambda: len(self.SocketIO.server.manager.rooms.get('/', {}).get(None, ()))
+        )
+        metrics.register_gauge(
+            'rooms', '房間數（依狀態）',
+            lambda: {
+                'state="waiting"': room_manager.get_waiting_room_count(),
+                'state="active"': room_manager.get_active_room_count(),
+            }
+        )
+        metrics.register_gauge(
+            'active_games', '正在進行的遊戲數',
+            room_manager.get_active_game_count
+        )
+        metrics.register_gauge(
+            'pending_timers', '共用排程器中的計時器數',
+            turn_scheduler.pending_count
+        )
+        metrics.register_gauge(
+            'rate_limited_total', '因頻率限制被丟棄的事件數',
+            lambda: {f'event="{event}"': count
+                     for event, count in rate_limiter.get_rejected_counts().items()},
+            metric_type='counter'
+        )
+        metrics.register_gauge('queued_joiners', '排隊等待配對的玩家數', lambda: len(admission))
+        metrics.register_gauge('scheduler_lag_seconds', '背景排程延遲的移動平均（過載判斷依據）', lambda: admission.latency)
+        metrics.register_gauge(
+            'shed_total', '因容量上限或過載而拒絕的連線與配對數',
+            lambda: admission.shed_count,
+            metric_type='counter'
+        )
+        metrics.register_gauge('lagging_clients', '送出佇列超過上限的連線數', lambda: len(outbound_guard.lagging))
+        metrics.register_gauge(
+            'resync_total', '落後連線恢復後補送完整狀態的次數',
+            lambda: outbound_guard.resync_count,
+            metric_type='counter'
+        )
+        metrics.register_gauge(
+            'slow_disconnect_total', '因送出佇列長時間超過上限而中斷的連線數',
+            lambda: outbound_guard.disconnect_count,
+            metric_type='counter'
+        )
+        if chat_archive.enabled:
+            metrics.register_gauge(
+                'chat_archive_pending', '尚未寫入封存的聊天訊息數',
+                chat_archive.pending_count
+            )
+            metrics.register_gauge(
+                'chat_archive_dropped_total', '封存佇列已滿而丟棄的聊天訊息數',
+                lambda: chat_archive.dropped,
+                metric_type='counter'
+            )
     
     # ============================================================
     # 路由處理函式
@@ -90,7 +228,12 @@ class WebApp:
             # GET 請求：生成隨機圖示
             icons = random.sample(ICON_POOL, 5)
         
-        return render_template('login.html', error=error, icons=icons)
+        return self.Pages.render(
+            'login.html',
+            error=error,
+            icons=icons,
+            username_value=request.form.get('username', '')
+        )
     
     def home(self):
         """
@@ -100,11 +243,157 @@ class WebApp:
         if 'user' not in session:
             return redirect(url_for('login'))
         
-        return render_template(
+        return self.Pages.render(
             'index.html',
-            username=session.get('user', '玩家')
+            username=session.get('user', '玩家'),
+            user_icon=session.get('icon')
         )
     
+    def metrics(self):
+        """輸出 Prometheus 文字格式的執行指標"""
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    def list_rooms(self):
+        """
+        大廳房間列表（依建立順序，游標分頁）
+        
+        Query 參數：
+            status: waiting / playing，省略為全部
+            cursor: 分頁用，帶入上一次回傳的 next_cursor
+            limit: 筆數（預設 50，最多 200）
+        
+        ETag 為房間集合版本號，房間沒有增減或變更狀態時回 304
+        """
+        status = request.args.get('status')
+        if status not in (None, 'waiting', 'playing'):
+            abort(400)
+        cursor = max(request.args.get('cursor', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        
+        with room_manager.lock:
+            version = room_manager.rooms_version
+            etag = f'rooms-{version}'
+            if etag in request.if_none_match:
+                return Response(status=304, headers={'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'})
+            rooms, next_cursor = room_manager.list_rooms(status, cursor, limit)
+        
+        response = jsonify({'rooms': rooms, 'next_cursor': next_cursor, 'version': version})
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    def healthz(self):
+        """存活檢查：行程能處理 HTTP 請求即回 200"""
+        return {'status': 'ok'}
+    
+    def readyz(self):
+        """就緒檢查：初始化完成且背景工作都在執行時回 200，否則 503"""
+        checks = {
+            'initialized': self.ready,
+            'scheduler': turn_scheduler.running,
+            'accepting': not hot_restart.draining,
+        }
+        if chat_archive.enabled:
+            checks['chat_archive'] = chat_archive.running
+        ready = all(checks.values())
+        return {'status': 'ready' if ready else 'not ready', 'checks': checks}, 200 if ready else 503
+    
+    # ============================================================
+    # 管理端點（需 X-Admin-Token）
+    # ============================================================
+    
+    def _require_admin(self):
+        """檢查管理權杖：未設定 ADMIN_TOKEN 時視為不存在，權杖錯誤時拒絕"""
+        if not Config.ADMIN_TOKEN:
+            abort(404)
+        token = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+            abort(403)
+    
+    @staticmethod
+    def _profiler():
+        """延遲載入剖析器（cProfile / pstats / tracemalloc 只在管理員使用時才載入）"""
+        from Profiler import profiler
+        return profiler
+    
+    def profile_start(self):
+        """
+        開始剖析事件處理
+        
+        Query 參數：
+            duration: 剖析秒數（預設 30）
+            sample: 取樣比例 0~1（預設 0.1）
+            memory: 1 代表同時開啟 tracemalloc
+        """
+        self._require_admin()
+        duration = request.args.get('duration', 30, type=float)
+        sample = request.args.get('sample', 0.1, type=float)
+        memory = request.args.get('memory', '0') in ('1', 'true')
+        profiler = self._profiler()
+        profiler.start(duration, sample, trace_memory=memory)
+        return profiler.status()
+    
+    def profile_stop(self):
+        """停止剖析與記憶體追蹤（保留已收集的統計）"""
+        self._require_admin()
+        profiler = self._profiler()
+        profiler.stop()
+        return profiler.status()
+    
+    def profile_report(self):
+        """輸出剖析統計（Query 參數：sort、limit）"""
+        self._require_admin()
+        sort = request.args.get('sort', 'cumulative')
+        limit = request.args.get('limit', 30, type=int)
+        return Response(self._profiler().report(sort, limit), mimetype='text/plain')
+    
+    def memory_report(self):
+        """輸出房間相關模組的 tracemalloc 快照（Query 參數：limit）"""
+        self._require_admin()
+        limit = request.args.get('limit', 20, type=int)
+        return Response(self._profiler().memory_report(limit), mimetype='text/plain')
+    
+    def chat_search(self):
+        """
+        搜尋封存的聊天紀錄（由新到舊）
+        
+        Query 參數：
+            q: 關鍵字（子字串比對；少於 3 個字時必須同時指定 room 與一天內的 since / until）
+            room: 房間 ID（lobby 為大廳）
+            since / until: 時間範圍（epoch 秒）
+            limit: 筆數（預設 50，最多 500）
+            before: 分頁用，帶入上一次回傳的 next_before
+        """
+        self._require_admin()
+        if not chat_archive.enabled:
+            abort(404)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        try:
+            messages = chat_archive.search(
+                query=request.args.get('q') or None,
+                room_id=request.args.get('room') or None,
+                since=request.args.get('since', type=float),
+                until=request.args.get('until', type=float),
+                limit=limit,
+                before_id=request.args.get('before', type=int)
+            )
+        except ValueError:  # 過短的關鍵字沒有限定房間與時間範圍
+            abort(400)
+        next_before = messages[-1]['id'] if len(messages) == limit else None
+        return {'messages': messages, 'next_before': next_before}
+    
+    def chat_filter_reload(self):
+        """立即重新載入禁用字清單（建好新的自動機後才替換，不影響進行中的過濾）"""
+        self._require_admin()
+        if not chat_filter.path:
+            abort(404)
+        return {'words': chat_filter.reload()}
+    
+    def drain(self):
+        """進入排空模式：停止配對、凍結對戰並寫出快照（/readyz 隨即回 503）"""
+        self._require_admin()
+        return {'draining': True, 'rooms_saved': hot_restart.drain(self.SocketIO)}
+    
     def reset(self):
         """重定向到遊戲頁面"""
         return redirect(url_for('home'))
@@ -118,18 +407,44 @@ class WebApp:
     # 應用運行
     # ============================================================
     
+    def shutdown(self, signum=None, frame=None):
+        """收到 SIGTERM：排空並保存對戰後結束行程（新行程啟動時載入快照）"""
+        saved = hot_restart.drain(self.SocketIO)
+        logger.info('排空完成，已保存 %d 個房間', saved)
+        self.SocketIO.sleep(DRAIN_FLUSH_SECONDS)
+        raise SystemExit(0)
+    
+    def server_options(self) -> dict:
+        """依非同步模式傳給 SocketIO.run() 的伺服器參數"""
+        if self.SocketIO.async_mode == 'eventlet':
+            return {'max_size': EVENTLET_MAX_CONNECTIONS}
+        return {}
+    
     def run(self):
-        """啟動 Web 應用"""
+        """啟動 Web 應用（SIGTERM 時先排空再結束）"""
+        signal.signal(signal.SIGTERM, self.shutdown)
         self.SocketIO.run(
             self.App, 
             host=Config.HOST, 
             port=Config.FLASK_RUN_PORT, 
-            debug=Config.DEBUG
+            debug=Config.DEBUG,
+            **self.server_options()
         )
 
 
+def create_app():
+    """
+    應用工廠（供 flask CLI、WSGI 伺服器與測試使用）
+
+    Returns:
+        Flask: 已註冊路由與 Socket.IO 事件的應用（SocketIO 實例位於 app.extensions['socketio']）
+    """
+    return WebApp().App
+
+
 def StartWebApp():
     """啟動 Web 應用（主線程模式）"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
     webapp = WebApp()
     webapp.run()
 
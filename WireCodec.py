@@ -0,0 +1,193 @@
+"""
+WireCodec.py - 熱門遊戲事件的二進位編碼
+負責 make_move / move_made / round_end 的固定格式打包與解包
+（連線時協商，未協商的客戶端繼續使用 JSON）
+以及房間廣播共用的預先編碼 JSON payload
+"""
+
+import json
+import struct
+from typing import Optional
+
+# 可協商的編碼名稱
+CODEC_JSON = 'json'
+CODEC_BINARY = 'binary'
+
+# 符號對照（0 代表空值）
+_SYMBOL_TO_CODE = {None: 0, 'X': 1, 'O': 2, 'Draw': 3}
+_CODE_TO_SYMBOL = {code: symbol for symbol, code in _SYMBOL_TO_CODE.items()}
+
+# 固定格式（網路位元組序，皆為無號位元組）
+_MAKE_MOVE = struct.Struct('!BB')             # row, col
+_MAKE_MOVE_SEQ = struct.Struct('!BBH')        # row, col, seq（預測下棋的序號）
+_MOVE_MADE = struct.Struct('!BBBB')           # row, col, symbol, turn
+_ROUND_END = struct.Struct('!BBBBBBB')        # winner, left, right, draw, round_count, flags, 連線數
+_LINE_HEADER = struct.Struct('!B')            # 每條連線的格數，後接 (row, col) * 格數
+
+# round_end 的 flags 位元
+_FLAG_MATCH_FINISHED = 0x01
+_FLAG_TIMEOUT = {'left': 0x02, 'right': 0x04}   # 本回合超時判負的一方
+_FLAG_FORFEIT = {'left': 0x08, 'right': 0x10}   # 比賽時間用完判負的一方
+
+# 支援二進位編碼的事件
+BINARY_EVENTS = ('make_move', 'move_made', 'round_end')
+
+
+def negotiate(requested: Optional[str], enabled: bool) -> str:
+    """
+    決定連線使用的編碼
+
+    Args:
+        requested: 客戶端要求的編碼（連線 auth 中的 codec）
+        enabled: 伺服器是否允許二進位編碼
+
+    Returns:
+        str: CODEC_BINARY 或 CODEC_JSON
+    """
+    if enabled and requested == CODEC_BINARY:
+        return CODEC_BINARY
+    return CODEC_JSON
+
+
+def encode(event: str, payload: dict) -> bytes:
+    """
+    將事件 payload 打包成二進位
+
+    Args:
+        event: 事件名稱（必須在 BINARY_EVENTS 中）
+        payload: 與 JSON 版本相同結構的 dict
+
+    Returns:
+        bytes: 打包後的資料
+    """
+    if event == 'make_move':
+        if payload.get('seq') is not None:
+            return _MAKE_MOVE_SEQ.pack(payload['row'], payload['col'], payload['seq'])
+        return _MAKE_MOVE.pack(payload['row'], payload['col'])
+
+    if event == 'move_made':
+        return _MOVE_MADE.pack(
+            payload['row'],
+            payload['col'],
+            _SYMBOL_TO_CODE[payload['symbol']],
+            _SYMBOL_TO_CODE[payload['turn']]
+        )
+
+    if event == 'round_end':
+        scores = payload['scores']
+        lines = payload['winning_lines']
+        flags = _FLAG_MATCH_FINISHED if payload['match_finished'] else 0
+        flags |= _FLAG_TIMEOUT.get(payload.get('timeout_side'), 0)
+        flags |= _FLAG_FORFEIT.get(payload.get('forfeit_side'), 0)
+        parts = [_ROUND_END.pack(
+            _SYMBOL_TO_CODE[payload['winner']],
+            scores['left'],
+            scores['right'],
+            scores['draw'],
+            payload['round_count'],
+            flags,
+            len(lines)
+        )]
+        for line in lines:
+            parts.append(_LINE_HEADER.pack(len(line)))
+            parts.append(bytes(coord for pos in line for coord in pos))
+        return b''.join(parts)
+
+    raise ValueError(f'不支援二進位編碼的事件: {event}')
+
+
+def _flag_side(flags: int, mapping: dict) -> Optional[str]:
+    """從 flags 取出對應的座位（'left' / 'right'），沒有設定時返回 None"""
+    for side, bit in mapping.items():
+        if flags & bit:
+            return side
+    return None
+
+
+def decode(event: str, data: bytes) -> Optional[dict]:
+    """
+    將二進位資料解包成與 JSON 版本相同結構的 dict
+
+    Args:
+        event: 事件名稱
+        data: 二進位資料
+
+    Returns:
+        Optional[dict]: 解包結果，格式錯誤時返回 None
+    """
+    try:
+        if event == 'make_move':
+            if len(data) >= _MAKE_MOVE_SEQ.size:
+                row, col, seq = _MAKE_MOVE_SEQ.unpack_from(data)
+                return {'row': row, 'col': col, 'seq': seq}
+            row, col = _MAKE_MOVE.unpack_from(data)
+            return {'row': row, 'col': col}
+
+        if event == 'move_made':
+            row, col, symbol, turn = _MOVE_MADE.unpack_from(data)
+            return {
+                'row': row,
+                'col': col,
+                'symbol': _CODE_TO_SYMBOL[symbol],
+                'turn': _CODE_TO_SYMBOL[turn]
+            }
+
+        if event == 'round_end':
+            winner, left, right, draw, round_count, flags, line_count = _ROUND_END.unpack_from(data)
+            offset = _ROUND_END.size
+            lines = []
+            for _ in range(line_count):
+                (length,) = _LINE_HEADER.unpack_from(data, offset)
+                offset += _LINE_HEADER.size
+                coords = data[offset:offset + length * 2]
+                if len(coords) != length * 2:
+                    return None
+                lines.append([[coords[i], coords[i + 1]] for i in range(0, length * 2, 2)])
+                offset += length * 2
+            return {
+                'winner': _CODE_TO_SYMBOL[winner],
+                'scores': {'left': left, 'right': right, 'draw': draw},
+                'round_count': round_count,
+                'match_finished': bool(flags & _FLAG_MATCH_FINISHED),
+                'winning_lines': lines,
+                'timeout_side': _flag_side(flags, _FLAG_TIMEOUT),
+                'forfeit_side': _flag_side(flags, _FLAG_FORFEIT)
+            }
+    except (struct.error, KeyError):
+        return None
+
+    return None
+
+
+class EncodedPayload:
+    """
+    預先編碼好的 JSON 事件 payload（同一個房間狀態版本的廣播共用，只序列化一次）
+    需以 PacketJSON 作為 Socket.IO 的 JSON 模組，封包編碼時直接嵌入 text
+    """
+
+    __slots__ = ('payload', 'text')
+
+    def __init__(self, payload: dict):
+        """
+        Args:
+            payload: 事件內容（保留原 dict 供二進位編碼使用，呼叫端不可再修改）
+        """
+        self.payload = payload
+        self.text = json.dumps(payload, separators=(',', ':'))
+
+
+class PacketJSON:
+    """
+    Socket.IO 封包使用的 JSON 模組（SocketIO(json=PacketJSON)）
+    事件資料為 [事件名稱, EncodedPayload] 時直接拼接已編碼的 payload，其餘交給標準 json
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs) -> str:
+        if isinstance(obj, list) and len(obj) == 2 and isinstance(obj[1], EncodedPayload):
+            return '[' + json.dumps(obj[0]) + ',' + obj[1].text + ']'
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return json.loads(s, **kwargs)
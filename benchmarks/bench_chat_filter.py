@@ -0,0 +1,91 @@
+"""
+bench_chat_filter.py - 聊天禁用字過濾效能測試
+以數千個禁用字比較三種做法每秒可處理的訊息數，並與尖峰聊天速率比較：
+- per-word：每個禁用字各跑一次 regex 取代（舊做法的直覺寫法）
+- alternation：所有禁用字合併成一個 regex
+- aho-corasick：ChatFilter（單次線性掃描）
+
+執行方式：python benchmarks/bench_chat_filter.py --words 5000 --players 1000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ChatFilter import ChatFilter
+from Config import Config
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz' + '的一是不了人我在有他這中大來上個國到說們為子和你地出道也時年得就那要下以生會自著去之過家學對可她裡後小麼心多天而能好都然沒日於起還發成事只作當想看文無開手十用主行方又如前所本見經頭面公同三已老從動兩長'
+
+
+def random_word(rng, min_len=2, max_len=6):
+    """產生隨機禁用字"""
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(min_len, max_len)))
+
+
+def make_messages(rng, words, count, hit_ratio=0.05):
+    """產生測試訊息（約 hit_ratio 比例含禁用字）"""
+    messages = []
+    for _ in range(count):
+        text = ''.join(rng.choice(ALPHABET + '  ') for _ in range(rng.randint(10, 80)))
+        if rng.random() < hit_ratio:
+            pos = rng.randint(0, len(text))
+            text = text[:pos] + rng.choice(words) + text[pos:]
+        messages.append(text)
+    return messages
+
+
+def bench(censor, messages):
+    """回傳每秒處理的訊息數"""
+    start = time.perf_counter()
+    for message in messages:
+        censor(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='聊天禁用字過濾效能測試')
+    parser.add_argument('--words', type=int, default=5000, help='禁用字數')
+    parser.add_argument('--messages', type=int, default=20000, help='測試訊息數')
+    parser.add_argument('--players', type=int, default=1000, help='同時在線玩家數（尖峰速率 = 玩家數 × CHAT_RATE）')
+    parser.add_argument('--naive-messages', type=int, default=200, help='per-word 做法只測這麼多則（太慢）')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    words = sorted({random_word(rng) for _ in range(args.words)})
+    messages = make_messages(rng, words, args.messages)
+
+    patterns = [re.compile(re.escape(word), re.IGNORECASE) for word in words]
+
+    def per_word(text):
+        for pattern in patterns:
+            text = pattern.sub(lambda m: '*' * len(m.group()), text)
+        return text
+
+    alternation = re.compile('|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)), re.IGNORECASE)
+
+    def single_regex(text):
+        return alternation.sub(lambda m: '*' * len(m.group()), text)
+
+    chat_filter = ChatFilter()
+    build_start = time.perf_counter()
+    chat_filter.reload(words)
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    peak = args.players * Config.CHAT_RATE
+    print(f'禁用字 {len(words)} 個，自動機編譯 {build_ms:.1f} ms；尖峰速率 {peak:.0f} msg/s')
+    print(f"{'做法':<14}{'msg/s':>12}{'尖峰倍數':>10}")
+    for name, censor, sample in (('per-word', per_word, messages[:args.naive_messages]),
+                                 ('alternation', single_regex, messages),
+                                 ('aho-corasick', chat_filter.censor, messages)):
+        rate = bench(censor, sample)
+        print(f'{name:<14}{rate:>12.0f}{rate / peak if peak else float("inf"):>10.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+bench_room_state.py - 房間狀態快取效能測試
+比較每次重建狀態（舊做法）與版本快取（新做法）的 CPU 時間與記憶體配置量，
+以及房間廣播封包的 JSON 編碼：每次 emit 重新編碼 vs. 每個版本只編碼一次（EncodedPayload）
+
+執行方式：python benchmarks/bench_room_state.py
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from socketio import packet
+
+import GameEvents
+import WireCodec
+from RoomManager import RoomManager
+
+READS_PER_EVENT = 3  # 每個事件讀取狀態的次數（join / reset / new match 各自會讀多次）
+EMITS_PER_VERSION = 2  # 同一版本的廣播次數（例如 game_reset 後斷線重連的 resync 前再次廣播）
+ROUNDS = 20000
+
+
+def make_room():
+    """建立一個已開始對戰的房間"""
+    manager = RoomManager()
+    room_id = manager.create_room('sid_left_0000', '玩家A')
+    manager.join_room(room_id, 'sid_right_000', '玩家B')
+    return manager.get_room(room_id)
+
+
+def uncached_event(room):
+    """舊做法：每次讀取都重建 dict"""
+    for _ in range(READS_PER_EVENT):
+        room._build_state()
+
+
+def cached_event(room):
+    """新做法：狀態變動一次，後續讀取都命中快取"""
+    room.mark_dirty()
+    for _ in range(READS_PER_EVENT):
+        room.get_state()
+
+
+def cached_hit(room):
+    """狀態未變動時的純讀取"""
+    for _ in range(READS_PER_EVENT):
+        room.get_state()
+
+
+def encode_packet(data):
+    """以 python-socketio 的封包編碼（使用 PacketJSON）產生送出的文字"""
+    return packet.Packet(packet.EVENT, data=['game_reset', data], namespace='/').encode()
+
+
+def encode_per_emit(room):
+    """舊做法：每次廣播都從狀態組出 payload 並重新序列化"""
+    room.mark_dirty()
+    for _ in range(EMITS_PER_VERSION):
+        encode_packet(GameEvents.build_game_reset(room.get_state()))
+
+
+def encoded_once(room):
+    """新做法：每個版本只組出並序列化一次，廣播直接嵌入已編碼的 payload"""
+    room.mark_dirty()
+    for _ in range(EMITS_PER_VERSION):
+        encode_packet(room.get_encoded('game_reset', GameEvents.build_game_reset))
+
+
+def measure(func, room):
+    """回傳 (每事件微秒, 每事件暫存記憶體峰值位元組)"""
+    seconds = timeit.timeit(lambda: func(room), number=ROUNDS)
+
+    samples = 1000
+    total = 0
+    tracemalloc.start()
+    for _ in range(samples):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(room)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - current
+    tracemalloc.stop()
+
+    return seconds / ROUNDS * 1e6, total / samples
+
+
+def main():
+    room = make_room()
+    print(f"{'情境':<12}{'us/event':>12}{'peak bytes':>14}")
+    packet.Packet.json = WireCodec.PacketJSON
+    for name, func in (('uncached', uncached_event),
+                       ('cached-miss', cached_event),
+                       ('cached-hit', cached_hit),
+                       ('emit-encode', encode_per_emit),
+                       ('emit-cached', encoded_once)):
+        us, allocated = measure(func, room)
+        print(f"{name:<12}{us:>12.2f}{allocated:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
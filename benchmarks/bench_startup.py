@@ -0,0 +1,138 @@
+"""
+bench_startup.py - 冷啟動時間量測
+每次以全新的子行程量測「import WebApp」與「create_app()」的耗時（不受模組快取影響），
+可選擇實際啟動伺服器並輪詢 /readyz，量測從行程啟動到可接流量的時間，
+供自動擴展時追蹤冷啟動延遲（JSON 報告，可在版本間 diff）
+
+執行方式：
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --runs 5 --serve --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 在子行程中分段計時，結果以一行 JSON 印出
+MEASURE_BOOT = """
+import json, sys, time
+started = time.perf_counter()
+import WebApp
+imported = time.perf_counter()
+app = WebApp.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_ms': (created - imported) * 1000,
+    'modules': len(sys.modules),
+}))
+"""
+
+# 以子行程啟動伺服器（threading 模式需允許 Werkzeug 伺服器）
+SERVER_BOOT = """
+from WebApp import create_app
+app = create_app()
+socketio = app.extensions['socketio']
+kwargs = {{'allow_unsafe_werkzeug': True}} if socketio.async_mode == 'threading' else {{}}
+socketio.run(app, host='127.0.0.1', port={port}, debug=False, **kwargs)
+"""
+
+
+def measure_once() -> dict:
+    """以全新子行程量測一次 import 與 create_app 的耗時"""
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE_BOOT],
+        cwd=ROOT_DIR, env=dict(os.environ, DEBUG='False'),
+        check=True, capture_output=True, text=True
+    ).stdout
+    total_ms = (time.perf_counter() - started) * 1000
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = total_ms  # 含直譯器啟動與結束
+    return result
+
+
+def measure_ready(port: int, timeout: float = 30) -> float:
+    """
+    啟動伺服器子行程並輪詢 /readyz，返回從啟動到回應 200 的毫秒數
+
+    Args:
+        port: 本機埠號
+        timeout: 最久等待秒數
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_BOOT.format(port=port)],
+        cwd=ROOT_DIR, env=dict(os.environ, DEBUG='False'),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError('WebApp 啟動失敗')
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/readyz', timeout=0.5) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except (urllib.error.URLError, OSError):
+                pass
+            time.sleep(0.01)
+        raise RuntimeError('等待 /readyz 逾時')
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def summarize(samples) -> dict:
+    """計算中位數與最大值（毫秒，取到小數一位）"""
+    return {
+        'median_ms': round(statistics.median(samples), 1),
+        'max_ms': round(max(samples), 1),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='WebApp 冷啟動時間量測')
+    parser.add_argument('--runs', type=int, default=5, help='量測次數（每次都是全新子行程）')
+    parser.add_argument('--serve', action='store_true', help='同時量測啟動伺服器到 /readyz 回應 200 的時間')
+    parser.add_argument('--port', type=int, default=5098, help='--serve 使用的本機埠號')
+    parser.add_argument('--output', help='JSON 報告輸出路徑（預設印到標準輸出）')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runs = [measure_once() for _ in range(args.runs)]
+    report = {
+        'import': summarize([run['import_ms'] for run in runs]),
+        'create_app': summarize([run['create_ms'] for run in runs]),
+        'process': summarize([run['process_ms'] for run in runs]),
+        'meta': {
+            'runs': args.runs,
+            'modules_loaded': runs[-1]['modules'],
+            'async_mode': os.getenv('ASYNC_MODE', 'threading'),
+            'python': sys.version.split()[0],
+        },
+    }
+    if args.serve:
+        report['time_to_ready'] = summarize([measure_ready(args.port) for _ in range(args.runs)])
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
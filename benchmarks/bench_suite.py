@@ -0,0 +1,307 @@
+"""
+bench_suite.py - 效能回歸測試
+量測遊戲核心、房間管理、狀態序列化與事件處理（經 Socket.IO 測試客戶端）的每次操作耗時，
+結果與 JSON 基準檔比較，任何項目變慢超過門檻、或找不到基準檔時即以非零狀態碼結束，
+讓每個效能相關的修改都有量測依據（基準與機器相關，需在同一台機器 / CI 環境產生）
+
+執行方式：
+    python benchmarks/bench_suite.py --update-baseline      # 產生（或更新）基準檔
+    python benchmarks/bench_suite.py                        # 與基準比較，變慢超過 20% 時失敗
+    python benchmarks/bench_suite.py --threshold 0.3 --only game room_state --output result.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+# 關閉限流與開發模式（需在載入 Config 之前設定）
+os.environ.update(DEBUG='False', MOVE_RATE='0', CHAT_RATE='0')
+
+from Game import Game
+from RoomManager import RoomManager
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# 下棋順序（X、O 輪流，九步下成平手：每一步都走完整的勝負判定）
+MOVE_ORDER = [(0, 0), (1, 1), (0, 1), (0, 2), (2, 0), (1, 0), (1, 2), (2, 1), (2, 2)]
+
+
+def play_round(game: Game) -> int:
+    """在已開始的棋局依 MOVE_ORDER 下到分出勝負，返回下棋步數"""
+    moves = 0
+    for row, col in MOVE_ORDER:
+        if game.winner is not None:
+            break
+        game.make_move(row, col)
+        moves += 1
+    return moves
+
+
+def bench_game_make_move(rooms: int):
+    """Game.make_move：整局下到結束（含勝負判定）"""
+    game = Game()
+    moves = 0
+    started = time.perf_counter()
+    for _ in range(rooms):
+        game.start()
+        moves += play_round(game)
+    return moves, time.perf_counter() - started
+
+
+def bench_game_check_winner(rooms: int):
+    """Game._check_winner：只檢查經過最後一步的連線，以及掃描整個棋盤"""
+    game = Game()
+    game.start()
+    for row, col in MOVE_ORDER[:4]:
+        game.make_move(row, col)
+    check = game._check_winner
+    started = time.perf_counter()
+    for _ in range(rooms):
+        check(0, 2)
+        check()
+    return rooms * 2, time.perf_counter() - started
+
+
+def make_rooms(manager: RoomManager, rooms: int):
+    """建立 rooms 個已開始對戰的房間，返回 [(房間 ID, 左側 sid, 右側 sid)]"""
+    created = []
+    for i in range(rooms):
+        room_id = manager.create_room(f'sid_a_{i:06d}', f'玩家A{i}')
+        manager.join_room(room_id, f'sid_b_{i:06d}', f'玩家B{i}')
+        created.append(room_id)
+    return created
+
+
+def bench_room_create_join(rooms: int):
+    """RoomManager.create_room + join_room：在大量房間下建立並開始對戰"""
+    manager = RoomManager()
+    started = time.perf_counter()
+    make_rooms(manager, rooms)
+    elapsed = time.perf_counter() - started
+    manager.clear()
+    return rooms * 2, elapsed
+
+
+def bench_room_make_move(rooms: int):
+    """RoomManager.make_move：大量房間中各下四步（未分出勝負）"""
+    manager = RoomManager()
+    room_ids = make_rooms(manager, rooms)
+    order = []
+    for room_id in room_ids:
+        room = manager.get_room(room_id)
+        first, second = sorted(room.players, key=lambda player: player.symbol != room.game.turn)
+        order.append((room_id, first.sid, second.sid))
+
+    started = time.perf_counter()
+    for step, (row, col) in enumerate(MOVE_ORDER[:4]):
+        for room_id, first_sid, second_sid in order:
+            manager.make_move(room_id, second_sid if step % 2 else first_sid, row, col)
+    elapsed = time.perf_counter() - started
+    manager.clear()
+    return rooms * 4, elapsed
+
+
+def bench_room_leave(rooms: int):
+    """RoomManager.leave_room：大量房間依序解散"""
+    manager = RoomManager()
+    make_rooms(manager, rooms)
+    started = time.perf_counter()
+    for i in range(rooms):
+        manager.leave_room(f'sid_a_{i:06d}')
+    return rooms, time.perf_counter() - started
+
+
+def bench_room_state(rooms: int):
+    """GameRoom.get_state：每次狀態變動後重建（快取未命中）"""
+    manager = RoomManager()
+    room = manager.get_room(make_rooms(manager, 1)[0])
+    started = time.perf_counter()
+    for _ in range(rooms):
+        room.mark_dirty()
+        room.get_state()
+    return rooms, time.perf_counter() - started
+
+
+def bench_room_state_hit(rooms: int):
+    """GameRoom.get_state：狀態未變動時的讀取（快取命中）"""
+    manager = RoomManager()
+    room = manager.get_room(make_rooms(manager, 1)[0])
+    room.get_state()
+    started = time.perf_counter()
+    for _ in range(rooms):
+        room.get_state()
+    return rooms, time.perf_counter() - started
+
+
+def bench_handler_dispatch(rooms: int):
+    """
+    事件處理：經 Socket.IO 測試客戶端送出 make_move / reset_game / start_new_match，
+    包含事件分派、驗證、房間更新、廣播與客戶端接收
+    """
+    from WebApp import WebApp
+    import GameEvents
+
+    webapp = WebApp()
+    room_manager = GameEvents.room_manager
+    room_manager.clear()
+    clients = {}
+    for _ in range(2):
+        client = webapp.SocketIO.test_client(webapp.App)
+        client.emit('join_pvp')
+        # 第一位玩家建立房間、第二位加入，依房間中的玩家順序對應 sid
+        room = next(iter(room_manager.rooms.values()))
+        clients[room.players[len(clients)].sid] = client
+    for client in clients.values():
+        client.get_received()
+
+    events = max(rooms // 10, 100)
+    started = time.perf_counter()
+    for _ in range(events):
+        game = room.game
+        if game.winner is not None:
+            client = next(iter(clients.values()))
+            client.emit('start_new_match' if room.match_finished else 'reset_game')
+        else:
+            player = next(player for player in room.players if player.symbol == game.turn)
+            row, col = next(pos for pos in MOVE_ORDER if game.board[pos[0]][pos[1]] is None)
+            client = clients[player.sid]
+            client.emit('make_move', {'row': row, 'col': col})
+        for client in clients.values():
+            client.get_received()
+    elapsed = time.perf_counter() - started
+
+    for client in clients.values():
+        client.disconnect()
+    room_manager.clear()
+    return events, elapsed
+
+
+# 所有量測項目：{名稱: 量測函式}，量測函式接收規模參數並返回 (操作次數, 秒數)
+BENCHMARKS = {
+    'game_make_move': bench_game_make_move,
+    'game_check_winner': bench_game_check_winner,
+    'room_create_join': bench_room_create_join,
+    'room_make_move': bench_room_make_move,
+    'room_leave': bench_room_leave,
+    'room_state': bench_room_state,
+    'room_state_hit': bench_room_state_hit,
+    'handler_dispatch': bench_handler_dispatch,
+}
+
+
+def run(names, rooms: int, repeat: int) -> dict:
+    """
+    執行量測，每項重複 repeat 次取最快的一次（排除排程與 GC 的雜訊）
+
+    Returns:
+        dict: {名稱: {'us_per_op': 每次操作微秒, 'ops': 操作次數}}
+    """
+    results = {}
+    for name in names:
+        best = None
+        for _ in range(repeat):
+            ops, seconds = BENCHMARKS[name](rooms)
+            per_op = seconds / ops * 1e6
+            if best is None or per_op < best:
+                best = per_op
+        results[name] = {'us_per_op': round(best, 3), 'ops': ops}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    與基準比較
+
+    Args:
+        results: 本次量測結果
+        baseline: 基準檔中的 results
+        threshold: 允許變慢的比例（0.2 代表慢 20% 以內不算回歸）
+
+    Returns:
+        list: 回歸的項目 [(名稱, 基準微秒, 本次微秒, 變化比例)]
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = result['us_per_op'] / base['us_per_op'] - 1
+        result['baseline_us'] = base['us_per_op']
+        result['change'] = round(change, 3)
+        if change > threshold:
+            regressions.append((name, base['us_per_op'], result['us_per_op'], change))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='遊戲核心、房間與事件處理的效能回歸測試')
+    parser.add_argument('--rooms', type=int, default=10000, help='房間數（各項量測的規模）')
+    parser.add_argument('--repeat', type=int, default=5, help='每項重複次數（取最快的一次）')
+    parser.add_argument('--only', nargs='+', metavar='PREFIX', help='只執行名稱以這些字串開頭的項目')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基準檔路徑')
+    parser.add_argument('--update-baseline', '--save', dest='update_baseline', action='store_true',
+                        help='把本次結果寫入基準檔（不比較）')
+    parser.add_argument('--threshold', type=float, default=0.2, help='允許變慢的比例，超過即失敗')
+    parser.add_argument('--output', help='JSON 報告輸出路徑（預設印到標準輸出）')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    names = [name for name in BENCHMARKS
+             if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+    report = {
+        'results': run(names, args.rooms, args.repeat),
+        'meta': {
+            'rooms': args.rooms,
+            'repeat': args.repeat,
+            'async_mode': os.getenv('ASYNC_MODE', 'threading'),
+            'python': sys.version.split()[0],
+            'machine': platform.machine(),
+        },
+    }
+
+    status = 0
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        # 只更新本次執行的項目，其餘保留
+        baseline['results'] = dict(baseline.get('results', {}), **report['results'])
+        baseline['meta'] = report['meta']
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(baseline, indent=2, ensure_ascii=False) + '\n')
+        print(f'基準已寫入 {args.baseline}', file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('rooms') != args.rooms:
+            print('注意：基準的 --rooms 與本次不同，結果可能無法直接比較', file=sys.stderr)
+        regressions = compare(report['results'], baseline.get('results', {}), args.threshold)
+        report['regressions'] = [name for name, *_ in regressions]
+        for name, base, current, change in regressions:
+            print(f'[回歸] {name}: {base:.3f} → {current:.3f} us/op ({change:+.0%})', file=sys.stderr)
+        status = 1 if regressions else 0
+    else:
+        # 沒有基準就無法判斷回歸：以非零狀態碼結束，避免 CI 在缺少基準時永遠通過
+        print(f'找不到基準檔 {args.baseline}，請先以 --update-baseline 產生', file=sys.stderr)
+        status = 2
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""
+loadgen.py - Socket.IO 壓力測試工具
+啟動本機 WebApp，模擬大量玩家依 doc/PROTOCOL.md 進行
+join_pvp → make_move → reset_game → start_new_match 的流程，
+輸出各事件的每秒事件數與 p50/p95/p99 延遲（JSON 報告，可在版本間 diff）
+
+需要額外套件：pip install -r benchmarks/requirements.txt
+
+執行方式：
+    python benchmarks/loadgen.py --players 1000 --duration 60 --output report.json
+    python benchmarks/loadgen.py --players 10000 --idle --duration 30   # 只建立閒置連線，比較記憶體
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+try:
+    import socketio
+    import aiohttp  # noqa: F401  (AsyncClient 需要 aiohttp)
+except ImportError:
+    sys.exit('需要 python-socketio 的 asyncio client：pip install -r benchmarks/requirements.txt')
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 以子行程啟動 WebApp（threading 模式需允許 Werkzeug 伺服器，其餘模式使用 WebApp 的伺服器參數）
+SERVER_BOOT = """
+from WebApp import WebApp
+webapp = WebApp()
+kwargs = dict(webapp.server_options())
+if webapp.SocketIO.async_mode == 'threading':
+    kwargs['allow_unsafe_werkzeug'] = True
+webapp.SocketIO.run(webapp.App, host='127.0.0.1', port={port}, debug=False, **kwargs)
+"""
+
+# 會量測延遲的事件：{送出的事件: 對應的回應事件}
+MEASURED_EVENTS = {
+    'join_pvp': ('waiting_for_opponent', 'game_start', 'game_in_progress', 'join_queued', 'server_busy'),
+    'make_move': ('move_made',),
+    'reset_game': ('game_reset',),
+    'start_new_match': ('new_match_started',),
+}
+
+
+class Recorder:
+    """收集各事件的延遲樣本與計數"""
+
+    def __init__(self):
+        self.latencies = {event: [] for event in MEASURED_EVENTS}
+        self.counters = {'game_in_progress': 0, 'opponent_left': 0, 'connect_errors': 0}
+
+    def record(self, event: str, seconds: float):
+        """記錄一次延遲樣本"""
+        self.latencies[event].append(seconds)
+
+    def count(self, name: str):
+        """累加計數"""
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def report(self, duration: float) -> dict:
+        """產生各事件的統計結果"""
+        events = {}
+        for event, samples in self.latencies.items():
+            samples = sorted(samples)
+            events[event] = {
+                'count': len(samples),
+                'per_sec': round(len(samples) / duration, 2) if duration else 0,
+                'p50_ms': _percentile_ms(samples, 50),
+                'p95_ms': _percentile_ms(samples, 95),
+                'p99_ms': _percentile_ms(samples, 99),
+                'max_ms': _percentile_ms(samples, 100),
+            }
+        return {'events': events, 'counters': dict(self.counters)}
+
+
+def _percentile_ms(samples, percentile):
+    """取已排序樣本的百分位數（nearest-rank），單位毫秒"""
+    if not samples:
+        return None
+    rank = max(1, -(-len(samples) * percentile // 100))
+    return round(samples[int(rank) - 1] * 1000, 3)
+
+
+class SimulatedPlayer:
+    """模擬一位玩家的完整對戰流程"""
+
+    def __init__(self, url: str, recorder: Recorder, think_time: float, idle: bool):
+        self.url = url
+        self.recorder = recorder
+        self.think_time = think_time
+        self.idle = idle
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.pending = {}  # {送出的事件: (送出時間, 額外資訊)}
+        self.board = None
+        self.my_symbol = None
+        self.my_side = None
+        self.turn = None
+        self.round_over = False
+        self._register_handlers()
+
+    def _register_handlers(self):
+        """註冊伺服器事件處理"""
+        on = self.sio.on
+        on('waiting_for_opponent', lambda data: self._resolve('join_pvp'))
+        on('game_in_progress', self._on_game_in_progress)
+        on('join_queued', self._on_join_queued)
+        on('server_busy', self._on_server_busy)
+        on('game_start', self._on_game_start)
+        on('move_made', self._on_move_made)
+        on('round_end', self._on_round_end)
+        on('game_reset', self._on_game_reset)
+        on('new_match_started', self._on_new_match_started)
+        on('opponent_left', self._on_opponent_left)
+
+    async def run(self, deadline: float):
+        """連線並持續遊戲直到 deadline"""
+        try:
+            await self.sio.connect(self.url, transports=['websocket'])
+        except Exception:
+            self.recorder.count('connect_errors')
+            return
+        if not self.idle:
+            await self._send('join_pvp')
+        await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+        await self.sio.disconnect()
+
+    async def _send(self, event: str, data=None, info=None):
+        """送出事件並記錄送出時間"""
+        self.pending[event] = (time.monotonic(), info)
+        if data is None:
+            await self.sio.emit(event)
+        else:
+            await self.sio.emit(event, data)
+
+    def _resolve(self, event: str, info=None) -> bool:
+        """收到回應時計算延遲（info 不符時視為他人觸發的廣播）"""
+        pending = self.pending.get(event)
+        if pending is None or pending[1] != info:
+            return False
+        del self.pending[event]
+        self.recorder.record(event, time.monotonic() - pending[0])
+        return True
+
+    def _start_round(self, turn: str):
+        """開始新的一回合"""
+        self.board = [[None] * 3 for _ in range(3)]
+        self.turn = turn
+        self.round_over = False
+
+    async def _maybe_move(self):
+        """輪到自己時隨機下在空格"""
+        if self.round_over or self.turn != self.my_symbol or 'make_move' in self.pending:
+            return
+        if self.think_time:
+            await asyncio.sleep(random.uniform(0, self.think_time))
+        empty = [(r, c) for r in range(3) for c in range(3) if self.board[r][c] is None]
+        if not empty or self.round_over:
+            return
+        row, col = random.choice(empty)
+        await self._send('make_move', {'row': row, 'col': col}, info=(row, col))
+
+    async def _on_game_in_progress(self, data):
+        """配對被拒絕：稍後重試"""
+        self._resolve('join_pvp')
+        self.recorder.count('game_in_progress')
+        await asyncio.sleep(1 + random.random())
+        if self.sio.connected:
+            await self._send('join_pvp')
+
+    async def _on_join_queued(self, data):
+        """排入等待佇列：房間空出時伺服器會自動配對"""
+        self._resolve('join_pvp')
+        self.recorder.count('join_queued')
+
+    async def _on_server_busy(self, data):
+        """伺服器過載：依 retry_after 稍後重試"""
+        self._resolve('join_pvp')
+        self.recorder.count('server_busy')
+        await asyncio.sleep(data['retry_after'] * (1 + random.random()))
+        if self.sio.connected:
+            await self._send('join_pvp')
+
+    async def _on_game_start(self, data):
+        self._resolve('join_pvp')
+        self.my_symbol = data['your_symbol']
+        self.my_side = data['my_side']
+        self._start_round(data['turn'])
+        await self._maybe_move()
+
+    async def _on_move_made(self, data):
+        row, col = data['row'], data['col']
+        self._resolve('make_move', (row, col))
+        if self.board is None:
+            return
+        self.board[row][col] = data['symbol']
+        self.turn = data['turn']
+        await self._maybe_move()
+
+    async def _on_round_end(self, data):
+        self.round_over = True
+        self.pending.pop('make_move', None)
+        # 只由左邊玩家推進流程，避免雙方同時重置
+        if self.my_side != 'left':
+            return
+        if data['match_finished']:
+            await self._send('start_new_match')
+        else:
+            await self._send('reset_game')
+
+    async def _on_game_reset(self, data):
+        self._resolve('reset_game')
+        if data['match_finished']:
+            if self.my_side == 'left':
+                await self._send('start_new_match')
+            return
+        self._start_round(data['turn'])
+        await self._maybe_move()
+
+    async def _on_new_match_started(self, data):
+        self._resolve('start_new_match')
+        my_sid = self.sio.get_sid()
+        for side in ('left', 'right'):
+            if data[f'{side}_player']['sid'] == my_sid:
+                self.my_side = side
+                self.my_symbol = data[f'{side}_player']['symbol']
+        self._start_round(data['turn'])
+        await self._maybe_move()
+
+    async def _on_opponent_left(self, data=None):
+        self.recorder.count('opponent_left')
+        self.board = None
+        if self.sio.connected:
+            await self._send('join_pvp')
+
+
+def start_server(port: int, max_rooms: int = 0) -> subprocess.Popen:
+    """以子行程啟動 WebApp 並等待埠號可連線（關閉限流以免影響量測，房間數上限預設不限）"""
+    env = dict(os.environ, DEBUG='False', MOVE_RATE='0', CHAT_RATE='0', MAX_ROOMS=str(max_rooms))
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_BOOT.format(port=port)],
+        cwd=ROOT_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('WebApp 啟動失敗')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('等待 WebApp 啟動逾時')
+
+
+def read_rss_mb(pid: int):
+    """讀取行程常駐記憶體（僅支援 Linux，其餘平台返回 None）"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+async def run_load(args, server_pid=None) -> dict:
+    """建立所有模擬玩家並執行到結束"""
+    recorder = Recorder()
+    started = time.monotonic()
+    deadline = started + args.ramp_time + args.duration
+
+    tasks = []
+    for i in range(args.players):
+        player = SimulatedPlayer(args.url, recorder, args.think, args.idle)
+        tasks.append(asyncio.create_task(player.run(deadline)))
+        # 依 ramp 時間平均分散連線，避免同一瞬間湧入
+        if args.ramp_time:
+            await asyncio.sleep(args.ramp_time / args.players)
+
+    # 連線全部建立後量測伺服器記憶體
+    rss_mb = None
+    if server_pid:
+        await asyncio.sleep(min(2.0, max(0.0, deadline - time.monotonic())))
+        rss_mb = read_rss_mb(server_pid)
+
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+
+    report = recorder.report(elapsed)
+    report['meta'] = {
+        'players': args.players,
+        'duration_s': args.duration,
+        'ramp_s': args.ramp_time,
+        'elapsed_s': round(elapsed, 2),
+        'idle': args.idle,
+        'async_mode': os.getenv('ASYNC_MODE', 'threading'),
+        'server_rss_mb': rss_mb,
+    }
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Tic-Tac-Toe Socket.IO 壓力測試')
+    parser.add_argument('--players', type=int, default=200, help='模擬玩家數')
+    parser.add_argument('--duration', type=float, default=30, help='全部連線後持續的秒數')
+    parser.add_argument('--ramp-time', type=float, default=5, help='建立所有連線所花的秒數')
+    parser.add_argument('--think', type=float, default=0, help='每步隨機思考時間上限（秒）')
+    parser.add_argument('--idle', action='store_true', help='只建立閒置連線，不進行遊戲')
+    parser.add_argument('--port', type=int, default=5099, help='本機啟動 WebApp 的埠號')
+    parser.add_argument('--max-rooms', type=int, default=0, help='本機 WebApp 的房間數上限（0 為不限）')
+    parser.add_argument('--url', help='改為連線到已啟動的伺服器（不啟動本機 WebApp）')
+    parser.add_argument('--output', help='JSON 報告輸出路徑（預設印到標準輸出）')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None
+    if not args.url:
+        server = start_server(args.port, args.max_rooms)
+        args.url = f'http://127.0.0.1:{args.port}'
+
+    try:
+        report = asyncio.run(run_load(args, server.pid if server else None))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,52 @@
  */
 
 // 全域變數
-const socket = io();
+// 對戰開始時（與伺服器熱重啟前）送來的恢復權杖：斷線重新連線時帶上，回到原本的座位
+let resumeToken = sessionStorage.getItem("resumeToken");
+
+// 自動重新連線：指數退避（1 秒起、最多 30 秒）並加上 ±50% 隨機延遲，避免大量客戶端同時重連
+const RECONNECT_DELAY = 1000;
+const RECONNECT_DELAY_MAX = 30000;
+// 伺服器排空（即將重新啟動）時，第一次重連的基準延遲拉長，讓重連分散開來
+const DRAIN_RECONNECT_DELAY = 5000;
+
+// 連線時要求熱門事件使用二進位編碼（伺服器以 codec_selected 回覆實際採用的編碼）
+// auth 以函式提供，每次自動重新連線都會帶上最新的恢復權杖與目前看到的棋局
+const socket = io({
+  reconnectionDelay: RECONNECT_DELAY,
+  reconnectionDelayMax: RECONNECT_DELAY_MAX,
+  randomizationFactor: 0.5,
+  auth: (cb) =>
+    cb(
+      resumeToken
+        ? { codec: "binary", resume: resumeToken, known: knownState() }
+        : { codec: "binary" }
+    ),
+});
+// 伺服器忙碌拒絕連線時不會自動重試：依 retry_after 加上隨機延遲後重新連線
+socket.on("connect_error", function (err) {
+  if (err.data && err.data.retry_after) {
+    const delay = (err.data.retry_after + Math.random() * err.data.retry_after) * 1000;
+    setTimeout(() => socket.connect(), delay);
+  }
+});
+// 連線成功：恢復一般的重連延遲；重新連線且沒有恢復權杖（等待配對中）時重新配對
+socket.on("connect", function () {
+  socket.io.reconnectionDelay(RECONNECT_DELAY);
+  if (hasConnected && !resumeToken) {
+    socket.emit("action", { action: "join_pvp" });
+  }
+  hasConnected = true;
+});
+// 被伺服器主動中斷（例如連線太慢）時 socket.io 不會自動重連：加上隨機延遲後自行重連
+socket.on("disconnect", function (reason) {
+  if (reason === "io client disconnect") return;
+  appendMessage("[系統提示] 連線中斷，重新連線中...");
+  if (reason === "io server disconnect") {
+    setTimeout(() => socket.connect(), RECONNECT_DELAY * (1 + Math.random()));
+  }
+});
+let binaryCodec = false;
 let chatMessages, chatInput, chatSend, gameBoard, resetBtn;
 
 // 遊戲狀態
@@ -19,6 +64,15 @@ let roundCount = 0;
 let matchFinished = false;
 let board = [[null, null, null], [null, null, null], [null, null, null]];
 
+// 預測下棋：點擊後立即畫出自己的棋子，伺服器以 move_made 確認或 move_rejected 拒絕
+let moveSeq = 0;
+let pendingMove = null; // { seq, row, col, turn, gameActive }：尚未確認的移動與下棋前的狀態
+
+// 重新連線
+let roundGeneration = null; // 目前棋局的代數（伺服器每開新的一局 +1）
+let opponentAway = false; // 對手斷線中（棋局暫停）
+let hasConnected = false;
+
 /**
  * 初始化遊戲
  * 頁面完成後自動載入
@@ -46,7 +100,71 @@ function initGame() {
   // 設置遊戲相關 socket 事件監聽
   setupPvPEvents();
   // 進來就直接開始配對（使用 proto 中定義的 action JSON 格式）
-  socket.emit("action", { action: "join_pvp" });
+  // 持有恢復權杖時等待 game_resumed / resume_failed，不重複配對
+  if (!resumeToken) {
+    socket.emit("action", { action: "join_pvp" });
+  }
+}
+
+/**
+ * 重新連線時告訴伺服器目前看到的棋局：同一局只需補送錯過的移動
+ * （尚未確認的預測不算，斷線時可能沒有送達）
+ */
+function knownState() {
+  let moves = board.flat().filter((cell) => cell !== null).length;
+  if (pendingMove) moves -= 1;
+  return { generation: roundGeneration, moves: moves };
+}
+
+/**
+ * 儲存或清除恢復權杖
+ */
+function setResumeToken(token) {
+  resumeToken = token;
+  if (token) {
+    sessionStorage.setItem("resumeToken", token);
+  } else {
+    sessionStorage.removeItem("resumeToken");
+  }
+}
+
+/**
+ * 以伺服器送來的完整房間狀態重繪整個棋局（恢復棋局與重新同步共用）
+ */
+function applyFullState(data) {
+  pendingMove = null;
+  roundGeneration = data.generation;
+  const pvpInfo = document.querySelector(".pvp-info");
+  if (pvpInfo) pvpInfo.style.display = "none";
+
+  leftPlayer = data.left_player;
+  rightPlayer = data.right_player;
+  mySide = data.my_side;
+  mySymbol = data.your_symbol;
+  currentTurn = data.turn;
+  scores = data.scores;
+  roundCount = data.round_count;
+  matchFinished = data.match_finished;
+  gameActive = data.started && !data.winner && !data.match_finished;
+  board = data.board.map((row) => row.slice());
+
+  const scoreBoard = document.getElementById("score-board");
+  if (scoreBoard) scoreBoard.classList.add("active");
+  if (gameBoard) gameBoard.classList.add("active");
+  if (resetBtn) {
+    resetBtn.classList.add("visible");
+    resetBtn.textContent = matchFinished ? "下一輪" : "下一回合";
+    resetBtn.disabled = gameActive;
+  }
+
+  clearBoard();
+  clearWinningLines();
+  board.forEach((row, r) => row.forEach((symbol, c) => updateCell(r, c, symbol)));
+  if (data.winning_lines && data.winning_lines.length > 0) {
+    drawWinningLines(data.winning_lines);
+  }
+  updateTurnDisplay();
+  updateScoreDisplay();
 }
 
 /**
@@ -61,20 +179,43 @@ function setupChatEvents() {
     });
   }
 
-  socket.on("chat message", function (msg) {
-    // 使用統一的系統提示格式
-    if (msg && typeof msg === "object" && msg.username === "系統") {
-      appendMessage("[系統提示] " + (msg.message || ""));
-    } else {
-      appendMessage(msg);
+  socket.on("chat message", showChatMessage);
+
+  // 伺服器在短時間內合併的多則訊息（含系統訊息）
+  socket.on("chat messages", function (data) {
+    if (data && Array.isArray(data.messages)) {
+      data.messages.forEach(showChatMessage);
+    }
+  });
+
+  // 進入房間（或大廳）時一次收到最近的聊天訊息
+  socket.on("chat history", function (data) {
+    if (data && Array.isArray(data.messages)) {
+      data.messages.forEach(showChatMessage);
     }
   });
 }
 
+/**
+ * 顯示單則聊天訊息（系統訊息使用統一的提示格式）
+ */
+function showChatMessage(msg) {
+  if (msg && typeof msg === "object" && msg.username === "系統") {
+    appendMessage("[系統提示] " + (msg.message || ""));
+  } else {
+    appendMessage(msg);
+  }
+}
+
 /**
  * 設置 PvP 模式事件監聽
  */
 function setupPvPEvents() {
+  // 編碼協商結果
+  socket.on("codec_selected", function (data) {
+    binaryCodec = data && data.codec === "binary";
+  });
+
   // 遊戲進行中事件
   socket.on("game_in_progress", function (data) {
     const waitingAnimation = document.querySelector(".waiting-animation");
@@ -104,6 +245,50 @@ function setupPvPEvents() {
     }
   });
 
+  // 伺服器排空（即將重新啟動）：棋局暫停，稍後自動重新連線
+  socket.on("server_draining", function (data) {
+    appendMessage("[系統提示] " + data.message);
+    socket.io.reconnectionDelay(DRAIN_RECONNECT_DELAY);
+  });
+
+  // 熱重啟用的恢復權杖
+  socket.on("resume_token", function (data) {
+    setResumeToken(data.token);
+  });
+
+  // 重新連線後回到原本的棋局
+  socket.on("game_resumed", function (data) {
+    applyFullState(data);
+    appendMessage("[系統提示] 已重新連線，棋局繼續");
+  });
+
+  // 連線太慢而略過了部分事件：以完整狀態重新同步
+  socket.on("resync", applyFullState);
+
+  // 恢復失敗（房間已解散）：改為重新配對
+  socket.on("resume_failed", function (data) {
+    setResumeToken(null);
+    appendMessage("[系統提示] " + data.message);
+    socket.emit("action", { action: "join_pvp" });
+  });
+
+  // 房間數已達上限，排隊等待配對
+  socket.on("join_queued", function (data) {
+    const waitingText = document.querySelector(".waiting-text");
+    const waitingSubtext = document.querySelector(".waiting-subtext");
+    if (waitingText) waitingText.textContent = `排隊中：第 ${data.position} 位`;
+    if (waitingSubtext) waitingSubtext.textContent = `預估等待約 ${Math.ceil(data.eta)} 秒`;
+  });
+
+  // 伺服器忙碌：稍後（加上隨機延遲）重新配對
+  socket.on("server_busy", function (data) {
+    appendMessage("[系統提示] " + data.message);
+    const delay = (data.retry_after + Math.random() * data.retry_after) * 1000;
+    setTimeout(function () {
+      socket.emit("action", { action: "join_pvp" });
+    }, delay);
+  });
+
   // 房間已滿事件
   socket.on("room_full", function (data) {
     updateGameStatus(data.message, "error");
@@ -128,8 +313,10 @@ function setupPvPEvents() {
     currentTurn = data.turn;
     scores = data.scores;
     roundCount = data.round_count;
+    roundGeneration = data.generation;
     gameActive = true;
     board = [[null, null, null], [null, null, null], [null, null, null]];
+    setResumeToken(data.resume_token);
 
     // 顯示戰績板和棋盤
     const scoreBoard = document.getElementById("score-board");
@@ -150,15 +337,42 @@ function setupPvPEvents() {
 
   // 移動完成事件
   socket.on("move_made", function (data) {
-    // 使用二維數組座標直接訪問
-    board[data.row][data.col] = data.symbol;
-    updateCell(data.row, data.col, data.symbol);
-    currentTurn = data.turn;
-    updateTurnDisplay();
+    applyMove(decodeHotEvent("move_made", data));
+  });
+
+  // 重新連線後只補送斷線期間錯過的移動（同一局）
+  socket.on("game_caught_up", function (data) {
+    // 斷線前尚未確認的預測：先移除，有送達的話會出現在補送的移動中
+    if (pendingMove) rollbackMove(pendingMove.seq);
+    data.moves.forEach(applyMove);
+    appendMessage("[系統提示] 已重新連線，棋局繼續");
+  });
+
+  // 對手斷線，棋局暫停等待對手重新連線
+  socket.on("opponent_reconnecting", function (data) {
+    opponentAway = true;
+    appendMessage(`[系統提示] 對手連線中斷，等待重新連線（最多 ${data.grace} 秒）`);
+  });
+
+  socket.on("opponent_reconnected", function () {
+    opponentAway = false;
+    appendMessage("[系統提示] 對手已重新連線，棋局繼續");
+  });
+
+  // 預測的移動被伺服器拒絕
+  socket.on("move_rejected", function (data) {
+    rollbackMove(data.seq);
   });
 
   // 回合結束事件
   socket.on("round_end", function (data) {
+    data = decodeHotEvent("round_end", data);
+    // 尚未確認的預測（例如送出前已超時）不會被執行，從棋盤上移除
+    if (pendingMove) {
+      board[pendingMove.row][pendingMove.col] = null;
+      updateCell(pendingMove.row, pendingMove.col, null);
+      pendingMove = null;
+    }
     gameActive = false;
     scores = data.scores;
     roundCount = data.round_count;
@@ -169,6 +383,13 @@ function setupPvPEvents() {
       drawWinningLines(data.winning_lines);
     }
 
+    // 超時判負提示
+    if (data.timeout_side) {
+      const timeoutPlayer = data.timeout_side === "left" ? leftPlayer : rightPlayer;
+      const reason = data.forfeit_side ? "比賽時間用完" : "思考超時";
+      appendMessage(`[系統提示] ⏰ ${timeoutPlayer.username} ${reason}，本回合判負！`);
+    }
+
     // 禁用所有格子
     if (gameBoard) {
       const cells = gameBoard.querySelectorAll(".cell");
@@ -181,7 +402,12 @@ function setupPvPEvents() {
     if (matchFinished) {
       let finalMessage = "";
       let winnerName = "";
-      if (scores.left >= 3) {
+      if (data.forfeit_side) {
+        // 比賽時間用完，由對手獲勝
+        const winner = data.forfeit_side === "left" ? rightPlayer : leftPlayer;
+        winnerName = winner.username;
+        finalMessage = `🎉 ${winner.username} (${winner.symbol}) 獲勝！對手比賽時間用完`;
+      } else if (scores.left >= 3) {
         winnerName = leftPlayer.username;
         finalMessage = `🎉 ${leftPlayer.username} (${leftPlayer.symbol}) 獲勝！比分 ${scores.left}:${scores.right}`;
       } else if (scores.right >= 3) {
@@ -238,6 +464,8 @@ function setupPvPEvents() {
 
   // 遊戲重置事件
   socket.on("game_reset", function (data) {
+    pendingMove = null;
+    roundGeneration = data.generation;
     currentTurn = data.turn;
     scores = data.scores;
     roundCount = data.round_count;
@@ -305,6 +533,8 @@ function setupPvPEvents() {
     }
 
     // 重置所有狀態
+    pendingMove = null;
+    roundGeneration = data.generation;
     currentTurn = data.turn;
     scores = data.scores;
     roundCount = data.round_count;
@@ -327,6 +557,9 @@ function setupPvPEvents() {
 
   // 對手離開事件
   socket.on("opponent_left", function () {
+    pendingMove = null;
+    opponentAway = false;
+    setResumeToken(null);
     gameActive = false;
     matchFinished = true;
 
@@ -389,19 +622,160 @@ function setupPvPEvents() {
         const row = Math.floor(cellIndex / 3);
         const col = cellIndex % 3;
 
-        if (
-          gameActive &&
-          currentTurn === mySymbol &&
-          !e.target.disabled &&
-          board[row][col] === null
-        ) {
-          socket.emit("make_move", { row: row, col: col });
+        if (!e.target.disabled && isLegalMove(row, col)) {
+          const seq = predictMove(row, col);
+          if (binaryCodec) {
+            socket.emit("make_move", new Uint8Array([row, col, seq >> 8, seq & 0xff]));
+          } else {
+            socket.emit("make_move", { row: row, col: col, seq: seq });
+          }
         }
       }
     });
   }
 }
 
+/**
+ * 井字棋規則（與 Game.py 相同），用來在伺服器確認前預測自己的移動
+ */
+const WIN_CONDITIONS = [
+  [[0, 0], [0, 1], [0, 2]], [[1, 0], [1, 1], [1, 2]], [[2, 0], [2, 1], [2, 2]], // 橫排
+  [[0, 0], [1, 0], [2, 0]], [[0, 1], [1, 1], [2, 1]], [[0, 2], [1, 2], [2, 2]], // 直排
+  [[0, 0], [1, 1], [2, 2]], [[0, 2], [1, 1], [2, 0]], // 對角
+];
+
+function isLegalMove(row, col) {
+  return (
+    gameActive &&
+    !pendingMove &&
+    !opponentAway &&
+    currentTurn === mySymbol &&
+    board[row][col] === null
+  );
+}
+
+/**
+ * 檢查最後一步 (row, col) 之後的勝負，返回 'X'、'O'、'Draw' 或 null（遊戲繼續）
+ */
+function checkWinner(row, col) {
+  for (const line of WIN_CONDITIONS) {
+    if (!line.some(([r, c]) => r === row && c === col)) continue;
+    const symbol = board[row][col];
+    if (line.every(([r, c]) => board[r][c] === symbol)) {
+      return symbol;
+    }
+  }
+  return board.every((cells) => cells.every((cell) => cell !== null)) ? "Draw" : null;
+}
+
+/**
+ * 立即畫出自己的移動並切換回合（勝負仍以伺服器的 round_end 為準）
+ *
+ * @returns {number} 這一步的序號（0-65535 循環使用）
+ */
+function predictMove(row, col) {
+  moveSeq = (moveSeq + 1) & 0xffff;
+  pendingMove = { seq: moveSeq, row: row, col: col, turn: currentTurn, gameActive: gameActive };
+  board[row][col] = mySymbol;
+  updateCell(row, col, mySymbol);
+  if (checkWinner(row, col)) {
+    // 這一步結束本回合：鎖住棋盤等待 round_end
+    gameActive = false;
+  } else {
+    currentTurn = mySymbol === "X" ? "O" : "X";
+  }
+  updateTurnDisplay();
+  return moveSeq;
+}
+
+/**
+ * 套用一步伺服器確認的移動（move_made 與重新連線補送的移動）
+ */
+function applyMove(data) {
+  // 伺服器確認了預測的移動
+  if (
+    pendingMove &&
+    data.row === pendingMove.row &&
+    data.col === pendingMove.col &&
+    data.symbol === mySymbol
+  ) {
+    pendingMove = null;
+  }
+  // 使用二維數組座標直接訪問
+  board[data.row][data.col] = data.symbol;
+  updateCell(data.row, data.col, data.symbol);
+  currentTurn = data.turn;
+  updateTurnDisplay();
+}
+
+/**
+ * 伺服器拒絕預測的移動：移除棋子並回到下棋前的狀態
+ */
+function rollbackMove(seq) {
+  if (!pendingMove || pendingMove.seq !== seq) return;
+  const move = pendingMove;
+  pendingMove = null;
+  board[move.row][move.col] = null;
+  updateCell(move.row, move.col, null);
+  currentTurn = move.turn;
+  gameActive = move.gameActive;
+  updateTurnDisplay();
+}
+
+/**
+ * 二進位編碼解碼（格式與 WireCodec.py 相同）
+ */
+const SYMBOL_CODES = [null, "X", "O", "Draw"];
+
+function decodeHotEvent(event, data) {
+  // JSON 物件直接使用
+  if (!(data instanceof ArrayBuffer) && !ArrayBuffer.isView(data)) {
+    return data;
+  }
+  const bytes = data instanceof ArrayBuffer
+    ? new Uint8Array(data)
+    : new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+
+  if (event === "move_made") {
+    // row, col, symbol, turn
+    return {
+      row: bytes[0],
+      col: bytes[1],
+      symbol: SYMBOL_CODES[bytes[2]],
+      turn: SYMBOL_CODES[bytes[3]],
+    };
+  }
+
+  if (event === "round_end") {
+    // winner, left, right, draw, round_count, flags, 連線數, 之後每條連線為 [格數, (row, col)...]
+    // flags: 0x01 比賽結束、0x02/0x04 左/右超時、0x08/0x10 左/右比賽時間用完
+    const flags = bytes[5];
+    const lineCount = bytes[6];
+    const winningLines = [];
+    let offset = 7;
+    for (let i = 0; i < lineCount; i++) {
+      const length = bytes[offset++];
+      const line = [];
+      for (let j = 0; j < length; j++) {
+        line.push([bytes[offset], bytes[offset + 1]]);
+        offset += 2;
+      }
+      winningLines.push(line);
+    }
+    return {
+      winner: SYMBOL_CODES[bytes[0]],
+      scores: { left: bytes[1], right: bytes[2], draw: bytes[3] },
+      round_count: bytes[4],
+      match_finished: (flags & 0x01) !== 0,
+      winning_lines: winningLines,
+      timeout_side: flags & 0x02 ? "left" : flags & 0x04 ? "right" : null,
+      forfeit_side: flags & 0x08 ? "left" : flags & 0x10 ? "right" : null,
+    };
+  }
+
+  return data;
+}
+
 /**
  * 聊天室功能
  */
@@ -429,7 +803,7 @@ function appendMessage(msg) {
 function sendMessage() {
   const msg = chatInput.value.trim();
   if (msg) {
-    // 以結構化 JSON 送出，伺服器會以 session 的 username 覆蓋或填入
+    // 以結構化 JSON 送出，名稱由伺服器依連線時登記的身分填入
     const timestamp = new Date().toLocaleTimeString("zh-TW", { hour12: false });
     socket.emit("chat message", { message: msg, time: timestamp });
     chatInput.value = "";
@@ -497,6 +871,13 @@ function updateTurnDisplay() {
   }
 }
 
+/**
+ * 玩家顯示名稱（登入時選擇的圖示 + 名稱）
+ */
+function displayName(player) {
+  return player.icon ? `${player.icon} ${player.username}` : player.username;
+}
+
 function updateScoreDisplay() {
   // 更新左玩家
   const leftSymbolEl = document.getElementById("left-symbol");
@@ -505,7 +886,7 @@ function updateScoreDisplay() {
 
   if (leftPlayer && leftSymbolEl && leftNameEl && leftScoreEl) {
     leftSymbolEl.textContent = leftPlayer.symbol;
-    leftNameEl.textContent = leftPlayer.username;
+    leftNameEl.textContent = displayName(leftPlayer);
     leftScoreEl.textContent = scores.left;
   }
 
@@ -516,7 +897,7 @@ function updateScoreDisplay() {
 
   if (rightPlayer && rightSymbolEl && rightNameEl && rightScoreEl) {
     rightSymbolEl.textContent = rightPlayer.symbol;
-    rightNameEl.textContent = rightPlayer.username;
+    rightNameEl.textContent = displayName(rightPlayer);
     rightScoreEl.textContent = scores.right;
   }
 
@@ -0,0 +1,13 @@
+"""
+helpers.py - 測試共用的輔助類別
+"""
+
+
+class FakeClock:
+    """可手動推進的時鐘（傳給接受 time_func 的類別）"""
+
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
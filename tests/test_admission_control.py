@@ -0,0 +1,82 @@
+"""
+test_admission_control.py - 准入控制單元測試
+測試 AdmissionControl.py 的容量上限、等待佇列、預估等待時間與延遲量測
+"""
+
+import unittest
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from AdmissionControl import AdmissionControl, DEFAULT_ROOM_LIFETIME
+from TimerScheduler import TimerScheduler
+from tests.helpers import FakeClock
+
+
+class TestAdmissionControl(unittest.TestCase):
+    """AdmissionControl 的單元測試"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.admission = AdmissionControl(max_sockets=2, max_rooms=1, max_queue=2,
+                                          shed_latency=0.5, time_func=self.clock)
+
+    def test_socket_limit(self):
+        """測試連線數達上限時拒絕並計數"""
+        self.assertTrue(self.admission.allow_connect(1))
+        self.assertFalse(self.admission.allow_connect(2))
+        self.assertEqual(self.admission.shed_count, 1)
+
+    def test_room_limit(self):
+        """測試房間數上限，0 代表不限"""
+        self.assertTrue(self.admission.room_available(0))
+        self.assertFalse(self.admission.room_available(1))
+        self.assertTrue(AdmissionControl(max_rooms=0).room_available(1000))
+
+    def test_queue_order_and_limit(self):
+        """測試佇列依加入順序、重複加入維持原位置、已滿時拒絕"""
+        self.assertEqual(self.admission.enqueue('a'), 1)
+        self.assertEqual(self.admission.enqueue('b'), 2)
+        self.assertEqual(self.admission.enqueue('a'), 1)
+        self.assertIsNone(self.admission.enqueue('c'))
+
+        self.assertTrue(self.admission.remove('a'))
+        self.assertEqual(self.admission.position('b'), 1)
+        self.assertEqual(self.admission.pop(), 'b')
+        self.assertIsNone(self.admission.pop())
+        self.assertEqual(len(self.admission), 0)
+
+    def test_eta(self):
+        """測試每兩位排隊玩家需要等一個房間結束"""
+        self.assertEqual(self.admission.eta(1), DEFAULT_ROOM_LIFETIME)
+        self.assertEqual(self.admission.eta(4), DEFAULT_ROOM_LIFETIME * 2)
+        for _ in range(50):
+            self.admission.record_room_closed(10)
+        self.assertAlmostEqual(self.admission.eta(2), 10, places=0)
+
+    def test_overload_sheds(self):
+        """測試延遲超過門檻時拒絕新連線與排隊"""
+        for _ in range(20):
+            self.admission.record_latency(2.0)
+        self.assertTrue(self.admission.overloaded)
+        self.assertFalse(self.admission.allow_connect(0))
+        self.assertIsNone(self.admission.enqueue('a'))
+
+        for _ in range(50):
+            self.admission.record_latency(0.0)
+        self.assertFalse(self.admission.overloaded)
+
+    def test_probe_measures_scheduler_lag(self):
+        """測試延遲量測：計時器比預定晚觸發的秒數"""
+        scheduler = TimerScheduler(time_func=self.clock)
+        self.admission.start(scheduler)
+        self.clock.now += self.admission.probe_interval + 1.0  # 晚 1 秒才執行
+        scheduler.run_due()
+        self.assertAlmostEqual(self.admission.latency, 0.2, places=6)
+        self.assertEqual(scheduler.pending_count(), 1)  # 已排程下一次量測
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+test_asset_pipeline.py - 靜態資源管線單元測試
+測試 AssetPipeline.py 的指紋網址、預先壓縮與快取標頭
+"""
+
+import gzip
+import os
+import re
+import sys
+import unittest
+
+from flask import Flask, render_template_string
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from AssetPipeline import AssetPipeline, IMMUTABLE_CACHE
+from WebApp import WebApp
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), '..', 'static')
+
+
+class TestAssetPipeline(unittest.TestCase):
+    """AssetPipeline 的單元測試"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.webapp = WebApp()
+        cls.client = cls.webapp.App.test_client()
+
+    def asset_url(self, filename):
+        """從登入頁面取出資源的指紋網址"""
+        html = self.client.get('/login').get_data(as_text=True)
+        stem, ext = os.path.splitext(filename)
+        match = re.search(rf'/assets/{re.escape(stem)}\.[0-9a-f]{{12}}{re.escape(ext)}', html)
+        self.assertIsNotNone(match, html)
+        return match.group(0)
+
+    def test_fingerprinted_urls_in_templates(self):
+        """測試模板使用帶指紋的網址"""
+        for filename in ('css/main.css', 'css/login.css', 'js/login.js'):
+            self.asset_url(filename)
+
+    def test_serves_precompressed_gzip(self):
+        """測試依 Accept-Encoding 回傳預先壓縮的內容與快取標頭"""
+        url = self.asset_url('css/main.css')
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Cache-Control'], IMMUTABLE_CACHE)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertTrue(response.mimetype.startswith('text/css'))
+        with open(os.path.join(STATIC_DIR, 'css', 'main.css'), 'rb') as f:
+            self.assertEqual(gzip.decompress(response.data), f.read())
+
+    def test_identity_without_accept_encoding(self):
+        """測試客戶端不支援壓縮時回傳原始內容"""
+        url = self.asset_url('js/login.js')
+        response = self.client.get(url, headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        with open(os.path.join(STATIC_DIR, 'js', 'login.js'), 'rb') as f:
+            self.assertEqual(response.data, f.read())
+
+    def test_etag_not_modified(self):
+        """測試 If-None-Match 相符時回 304"""
+        url = self.asset_url('css/main.css')
+        etag = self.client.get(url).headers['ETag']
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+    def test_unknown_asset(self):
+        """測試未建置或指紋錯誤的路徑回 404"""
+        self.assertEqual(self.client.get('/assets/css/main.000000000000.css').status_code, 404)
+
+    def test_disabled_falls_back_to_static(self):
+        """測試停用時模板使用一般 static 網址"""
+        app = Flask(__name__, static_folder=STATIC_DIR)
+        AssetPipeline(app.static_folder).init_app(app, enabled=False)
+        with app.test_request_context():
+            self.assertEqual(render_template_string("{{ asset_url('css/main.css') }}"), '/static/css/main.css')
+
+
+if __name__ == '__main__':
+    unittest.main()
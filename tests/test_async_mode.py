@@ -0,0 +1,42 @@
+"""
+test_async_mode.py - 事件迴圈模式阻塞工作單元測試
+測試 AsyncMode.offload 在各模式下的執行緒與例外傳遞
+"""
+
+import threading
+import unittest
+from unittest import mock
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from AsyncMode import offload
+from Config import Config
+
+
+class TestOffload(unittest.TestCase):
+    """offload 的單元測試"""
+
+    def test_threading_runs_inline(self):
+        """測試 threading 模式下直接在目前的執行緒呼叫"""
+        with mock.patch.object(Config, 'ASYNC_MODE', 'threading'):
+            self.assertEqual(offload(threading.get_ident), threading.get_ident())
+            self.assertEqual(offload(max, 1, 3), 3)
+
+    def test_eventlet_runs_in_os_thread(self):
+        """測試 eventlet 模式下交給 OS 執行緒池執行，例外傳回呼叫端"""
+        try:
+            import eventlet  # noqa: F401
+        except ImportError:
+            self.skipTest('eventlet 未安裝')
+        with mock.patch.object(Config, 'ASYNC_MODE', 'eventlet'):
+            self.assertNotEqual(offload(threading.get_ident), threading.get_ident())
+            self.assertEqual(offload(max, 1, 3), 3)
+            with self.assertRaises(ZeroDivisionError):
+                offload(divmod, 1, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
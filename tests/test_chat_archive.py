@@ -0,0 +1,124 @@
+"""
+test_chat_archive.py - 聊天紀錄封存單元測試
+測試 ChatArchive.py 的背景批次寫入、全文搜尋與管理端點
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ChatArchive import ChatArchive
+from Config import Config
+from WebApp import WebApp
+
+
+class ChatArchiveTestCase(unittest.TestCase):
+    """建立暫存資料庫的共用基底"""
+
+    def setUp(self):
+        """每個測試前建立暫存目錄與已啟動的封存"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.archive = ChatArchive(os.path.join(self.tmpdir, 'chat.sqlite3'), batch_size=2, flush_interval=0.05)
+        self.archive.start()
+        self.archive.archive('room_1', '玩家A', '強勁的棋手 已抵達戰場', created_at=100.0)
+        self.archive.archive('room_1', '玩家B', 'gg well played', created_at=200.0)
+        self.archive.archive(None, '玩家C', '大廳有人嗎', created_at=300.0)
+        self.archive.flush()
+
+    def tearDown(self):
+        self.archive.stop()
+        shutil.rmtree(self.tmpdir)
+
+
+class TestChatArchive(ChatArchiveTestCase):
+    """ChatArchive 的單元測試"""
+
+    def test_batched_writes(self):
+        """測試佇列中的訊息全部寫入"""
+        self.assertEqual(self.archive.written, 3)
+        self.assertEqual(self.archive.pending_count(), 0)
+
+    def test_failed_batch_retried_per_message(self):
+        """測試批次中有無法寫入的訊息時，同批的其他訊息仍逐筆寫入"""
+        self.archive.batch_size = 3
+        with self.assertLogs('ChatArchive', 'ERROR'):
+            self.archive.archive('room_2', '玩家A', 'first', created_at=400.0)
+            self.archive.archive('room_2', '玩家B', ['not', 'text'], created_at=401.0)
+            self.archive.archive('room_3', '玩家C', 'third', created_at=402.0)
+            self.archive.flush()
+        self.assertEqual(self.archive.written, 5)
+        self.assertEqual([m['message'] for m in self.archive.search(since=400)], ['third', 'first'])
+
+    def test_full_text_search(self):
+        """測試中文與英文子字串搜尋"""
+        self.assertEqual([m['username'] for m in self.archive.search('抵達戰')], ['玩家A'])
+        self.assertEqual([m['username'] for m in self.archive.search('well')], ['玩家B'])
+
+    def test_short_query_and_syntax_characters(self):
+        """測試過短的關鍵字只在指定房間與時間範圍內搜尋，以及含 FTS 語法字元的關鍵字"""
+        self.assertEqual([m['username'] for m in self.archive.search('大廳', room_id='lobby', since=0, until=400)],
+                         ['玩家C'])
+        self.assertEqual(self.archive.search('大廳', room_id='room_1', since=0, until=400), [])
+        self.assertEqual(self.archive.search('"gg" OR *'), [])
+
+    def test_short_query_requires_scope(self):
+        """測試過短的關鍵字沒有限定房間或時間範圍過大時拒絕（避免掃描整個資料表）"""
+        for kwargs in ({}, {'room_id': 'lobby'}, {'since': 0, 'until': 400},
+                       {'room_id': 'lobby', 'since': 0, 'until': 200000}):
+            with self.assertRaises(ValueError):
+                self.archive.search('大廳', **kwargs)
+
+    def test_room_and_time_filters(self):
+        """測試依房間與時間範圍過濾（由新到舊）"""
+        self.assertEqual([m['username'] for m in self.archive.search(room_id='room_1')], ['玩家B', '玩家A'])
+        self.assertEqual([m['room_id'] for m in self.archive.search(room_id='lobby')], ['lobby'])
+        self.assertEqual([m['username'] for m in self.archive.search(since=150, until=300)], ['玩家B'])
+
+    def test_pagination(self):
+        """測試以 before_id 分頁"""
+        first = self.archive.search(limit=2)
+        rest = self.archive.search(limit=2, before_id=first[-1]['id'])
+        self.assertEqual([m['username'] for m in first + rest], ['玩家C', '玩家B', '玩家A'])
+
+    def test_disabled_archive_ignores_messages(self):
+        """測試停用時不收任何訊息"""
+        archive = ChatArchive('')
+        archive.start()
+        archive.archive('room_1', '玩家A', 'hello')
+        self.assertFalse(archive.enabled)
+        self.assertEqual(archive.pending_count(), 0)
+
+
+class TestChatSearchEndpoint(ChatArchiveTestCase):
+    """/admin/chat/search 的整合測試"""
+
+    def test_search_endpoint(self):
+        """測試以管理權杖搜尋並取得分頁游標"""
+        headers = {'X-Admin-Token': 'secret'}
+        with mock.patch.object(Config, 'ADMIN_TOKEN', 'secret'), \
+                mock.patch('WebApp.chat_archive', self.archive):
+            client = WebApp().App.test_client()
+            response = client.get('/admin/chat/search?room=room_1&limit=1', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertEqual(data['messages'][0]['username'], '玩家B')
+
+            response = client.get(f"/admin/chat/search?room=room_1&before={data['next_before']}", headers=headers)
+            self.assertEqual([m['username'] for m in response.get_json()['messages']], ['玩家A'])
+            self.assertIsNone(response.get_json()['next_before'])
+
+            self.assertEqual(client.get('/admin/chat/search?q=gg', headers=headers).status_code, 400)
+            response = client.get('/admin/chat/search?q=gg&room=room_1&since=0&until=1000', headers=headers)
+            self.assertEqual([m['username'] for m in response.get_json()['messages']], ['玩家B'])
+
+            self.assertEqual(client.get('/admin/chat/search').status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
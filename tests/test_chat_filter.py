@@ -0,0 +1,142 @@
+"""
+test_chat_filter.py - 聊天禁用字過濾單元測試
+測試 ChatFilter.py 的 Aho-Corasick 比對、遮蔽與重新載入
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ChatFilter import AhoCorasick, ChatFilter
+from TimerScheduler import TimerScheduler
+
+
+class TestAhoCorasick(unittest.TestCase):
+    """AhoCorasick 的單元測試"""
+
+    def test_overlapping_matches(self):
+        """測試重疊與互為後綴的字都能找到"""
+        automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+        self.assertEqual(automaton.find('ushers'), [(1, 4), (2, 6)])
+
+    def test_case_insensitive(self):
+        """測試比對不分大小寫"""
+        automaton = AhoCorasick(['Noob'])
+        self.assertEqual(automaton.find('you NOOB'), [(4, 8)])
+
+    def test_matches_against_naive_search(self):
+        """測試與逐字搜尋的結果一致"""
+        words = ['ab', 'bab', 'abc', 'c', '壞蛋', '大壞蛋']
+        text = 'xababcabc 你這個大壞蛋 c'
+        automaton = AhoCorasick(words)
+        expected = set()
+        for word in words:
+            start = text.find(word)
+            while start != -1:
+                expected.add(start + len(word))
+                start = text.find(word, start + 1)
+        self.assertEqual({end for _, end in automaton.find(text)}, expected)
+
+
+class TestChatFilter(unittest.TestCase):
+    """ChatFilter 的單元測試"""
+
+    def setUp(self):
+        self.filter = ChatFilter()
+        self.filter.reload(['壞蛋', 'noob', 'bad word'])
+
+    def test_censor(self):
+        """測試禁用字替換為遮蔽字元，其餘不變"""
+        self.assertEqual(self.filter.censor('你這個壞蛋 NOOB!'), '你這個** ****!')
+        self.assertEqual(self.filter.censor('a bad words'), 'a ********s')
+        self.assertEqual(self.filter.censor('乾淨的訊息'), '乾淨的訊息')
+
+    def test_non_text_unchanged(self):
+        """測試不是字串的內容原樣返回，不會拋出例外"""
+        self.assertEqual(self.filter.censor(123), 123)
+        self.assertEqual(self.filter.censor(['bad word']), ['bad word'])
+
+    def test_without_word_list(self):
+        """測試未載入清單時原樣返回"""
+        self.assertEqual(ChatFilter().censor('壞蛋'), '壞蛋')
+
+    def test_reload_replaces_list(self):
+        """測試重新載入後使用新的清單"""
+        self.assertEqual(self.filter.reload(['乾淨']), 1)
+        self.assertEqual(self.filter.censor('壞蛋乾淨'), '壞蛋**')
+
+
+class TestChatFilterFile(unittest.TestCase):
+    """從檔案載入與自動重新載入的測試"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'words.txt')
+        self.write('# 註解\n壞蛋\n\n')
+        self.filter = ChatFilter(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, content, mtime=None):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_load_file_skips_comments(self):
+        """測試讀取檔案時略過註解與空行"""
+        self.assertEqual(self.filter.reload(), 1)
+        self.assertEqual(self.filter.censor('# 壞蛋'), '# **')
+
+    def test_watch_reloads_changed_file(self):
+        """測試檔案修改後由排程器自動重新載入"""
+        now = [100.0]
+        scheduler = TimerScheduler(time_func=lambda: now[0])
+        self.filter.reload()
+        self.filter.watch(scheduler, interval=5)
+
+        now[0] += 5
+        scheduler.run_due()
+        self.assertEqual(self.filter.censor('笨蛋'), '笨蛋')
+
+        self.write('笨蛋\n', mtime=os.path.getmtime(self.path) + 10)
+        now[0] += 5
+        scheduler.run_due()
+        # 在背景執行緒編譯，完成前仍使用舊清單
+        worker = self.filter._worker
+        self.assertIsNotNone(worker)
+        worker.join(timeout=5)
+        self.assertEqual(self.filter.censor('笨蛋'), '笨蛋')
+
+        # 替換在排程器上進行
+        scheduler.run_due()
+        self.assertIsNone(self.filter._worker)
+        self.assertEqual(self.filter.censor('笨蛋壞蛋'), '**壞蛋')
+
+    def test_watch_keeps_list_on_read_error(self):
+        """測試背景讀取失敗時保留舊清單並可再次重新載入"""
+        now = [100.0]
+        scheduler = TimerScheduler(time_func=lambda: now[0])
+        self.filter.reload()
+        self.filter.watch(scheduler, interval=5)
+
+        with open(self.path, 'wb') as f:
+            f.write(b'\xff\xfe\xfa')
+        os.utime(self.path, (self.filter._mtime + 10, self.filter._mtime + 10))
+        now[0] += 5
+        with self.assertLogs('ChatFilter', level='ERROR'):
+            scheduler.run_due()
+            self.filter._worker.join(timeout=5)
+        scheduler.run_due()
+        self.assertIsNone(self.filter._worker)
+        self.assertEqual(self.filter.censor('壞蛋'), '**')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,6 +36,9 @@ class TestGame(unittest.TestCase):
         self.game.make_move(0, 0)  # (0, 0)
         self.game.make_move(0, 1)  # (0, 1)
         
+        self.assertEqual(self.game.moves, [(0, 0), (0, 1)])
+        generation = self.game.generation
+        
         # 重置
         self.game.reset()
         
@@ -44,6 +47,8 @@ class TestGame(unittest.TestCase):
         self.assertEqual(self.game.turn, Player.X.value)
         self.assertIsNone(self.game.winner)
         self.assertFalse(self.game.started)
+        self.assertEqual(self.game.moves, [])
+        self.assertEqual(self.game.generation, generation + 1)
     
     # ==================== 遊戲開始測試 ====================
     
@@ -292,6 +297,71 @@ class TestGameEdgeCases(unittest.TestCase):
                 self.assertEqual(game.board[row][col], Player.X.value)
 
 
+class TestWinningLines(unittest.TestCase):
+    """獲勝連線記錄與 N x N 棋盤的測試"""
+    
+    def test_winning_line_recorded(self):
+        """測試獲勝時記錄完成的連線"""
+        game = Game()
+        game.start()
+        for row, col in [(0,0), (1,0), (0,1), (1,1), (0,2)]:
+            game.make_move(row, col)
+        
+        self.assertEqual(game.winning_lines, [[[0, 0], [0, 1], [0, 2]]])
+    
+    def test_double_winning_lines(self):
+        """測試最後一步同時完成兩條連線"""
+        game = Game()
+        game.start()
+        # X 最後下在 (0,0) 同時完成第一行與第一列
+        for row, col in [(0,1), (1,1), (0,2), (2,2), (1,0), (1,2), (2,0), (2,1), (0,0)]:
+            game.make_move(row, col)
+        
+        self.assertEqual(game.winner, Player.X.value)
+        self.assertEqual(len(game.winning_lines), 2)
+        self.assertIn([[0, 0], [0, 1], [0, 2]], game.winning_lines)
+        self.assertIn([[0, 0], [1, 0], [2, 0]], game.winning_lines)
+    
+    def test_draw_has_no_winning_lines(self):
+        """測試平局時沒有獲勝連線"""
+        game = Game()
+        game.start()
+        for row, col in [(0,1), (0,0), (0,2), (1,1), (1,0), (1,2), (2,1), (2,0), (2,2)]:
+            game.make_move(row, col)
+        
+        self.assertEqual(game.winner, GameResult.DRAW.value)
+        self.assertEqual(game.winning_lines, [])
+    
+    def test_reset_clears_winning_lines(self):
+        """測試重置後清除獲勝連線"""
+        game = Game()
+        game.start()
+        for row, col in [(0,0), (1,0), (0,1), (1,1), (0,2)]:
+            game.make_move(row, col)
+        game.reset()
+        
+        self.assertEqual(game.winning_lines, [])
+    
+    def test_large_board_anti_diagonal(self):
+        """測試 5x5 棋盤的副對角線獲勝"""
+        game = Game(size=5)
+        game.start()
+        for i in range(5):
+            game.make_move(i, 4 - i, Player.X.value)
+            if i < 4:
+                self.assertIsNone(game.winner)
+        
+        self.assertEqual(game.winner, Player.X.value)
+        self.assertEqual(game.winning_lines, [[[0, 4], [1, 3], [2, 2], [3, 1], [4, 0]]])
+    
+    def test_large_board_bounds(self):
+        """測試 4x4 棋盤可下在第 4 列但不可超出"""
+        game = Game(size=4)
+        game.start()
+        self.assertTrue(game.make_move(3, 3))
+        self.assertFalse(game.make_move(4, 0))
+
+
 def run_tests():
     """執行所有測試"""
     # 創建測試套件
@@ -301,6 +371,7 @@ def run_tests():
     # 添加所有測試
     suite.addTests(loader.loadTestsFromTestCase(TestGame))
     suite.addTests(loader.loadTestsFromTestCase(TestGameEdgeCases))
+    suite.addTests(loader.loadTestsFromTestCase(TestWinningLines))
     
     # 執行測試
     runner = unittest.TextTestRunner(verbosity=2)
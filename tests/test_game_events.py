@@ -0,0 +1,699 @@
+"""
+test_game_events.py - 遊戲事件整合測試
+透過 Socket.IO 測試客戶端測試 GameEvents.py 的事件流程
+"""
+
+import time
+import tempfile
+import unittest
+import sys
+import os
+from unittest import mock
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import ChatEvents
+import GameEvents
+import WireCodec
+from ChatFilter import AhoCorasick
+from Config import Config
+from HotRestart import hot_restart
+from AdmissionControl import admission
+from OutboundGuard import outbound_guard
+from WebApp import WebApp
+
+
+class GameEventsTestCase(unittest.TestCase):
+    """建立 WebApp 與測試客戶端的共用基底"""
+
+    @classmethod
+    def setUpClass(cls):
+        """整個測試類別共用一個 WebApp"""
+        cls.webapp = WebApp()
+
+    def setUp(self):
+        """每個測試前清空全域房間狀態"""
+        GameEvents.room_manager.clear()
+        GameEvents.room_manager.lobby_chat_history.clear()
+        self.clients = []
+
+    def tearDown(self):
+        """斷開所有測試客戶端"""
+        for client in self.clients:
+            if client.is_connected():
+                client.disconnect()
+
+    def connect(self, **kwargs):
+        """建立並記錄一個測試客戶端"""
+        client = self.webapp.SocketIO.test_client(self.webapp.App, **kwargs)
+        self.clients.append(client)
+        return client
+
+    @staticmethod
+    def events(client, name):
+        """取出客戶端收到的指定事件 payload"""
+        return [packet['args'][0] for packet in client.get_received() if packet['name'] == name]
+
+    def start_match(self, first_kwargs=None, second_kwargs=None):
+        """
+        讓兩位玩家完成配對
+
+        Returns:
+            tuple: (先手客戶端, 後手客戶端)
+        """
+        a = self.connect(**(first_kwargs or {}))
+        b = self.connect(**(second_kwargs or {}))
+        a.emit('join_pvp')
+        b.emit('join_pvp')
+        start = self.events(a, 'game_start')[0]
+        b.get_received()
+        if start['your_symbol'] == start['turn']:
+            return a, b
+        return b, a
+
+
+class TestBinaryCodec(GameEventsTestCase):
+    """熱門事件二進位編碼的整合測試"""
+
+    def test_codec_negotiation(self):
+        """測試連線時回覆協商結果"""
+        binary = self.connect(auth={'codec': 'binary'})
+        plain = self.connect()
+        self.assertEqual(self.events(binary, 'codec_selected'), [{'codec': 'binary'}])
+        self.assertEqual(self.events(plain, 'codec_selected'), [{'codec': 'json'}])
+
+    def test_mixed_codecs_in_one_room(self):
+        """測試同房間內二進位與 JSON 玩家各自收到對應格式"""
+        first, second = self.start_match({'auth': {'codec': 'binary'}})
+        moves = [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]
+        for i, (row, col) in enumerate(moves):
+            player = first if i % 2 == 0 else second
+            player.emit('make_move', WireCodec.encode('make_move', {'row': row, 'col': col}))
+
+        payload_types = set()
+        for client in (first, second):
+            received = client.get_received()
+            moves_made = [p['args'][0] for p in received if p['name'] == 'move_made']
+            round_end = [p['args'][0] for p in received if p['name'] == 'round_end']
+            self.assertEqual(len(moves_made), 5)
+            self.assertEqual(len(round_end), 1)
+
+            payload = round_end[0]
+            payload_types.add(type(payload))
+            if isinstance(payload, bytes):
+                payload = WireCodec.decode('round_end', payload)
+            self.assertEqual(payload['winning_lines'], [[[0, 0], [0, 1], [0, 2]]])
+
+        self.assertEqual(payload_types, {bytes, dict})
+
+
+class TestActionDispatcher(GameEventsTestCase):
+    """action 註冊表與批次 action 的整合測試"""
+
+    def test_single_action(self):
+        """測試單一 action 轉發"""
+        client = self.connect()
+        client.emit('action', {'action': 'join_pvp'})
+        self.assertEqual(len(self.events(client, 'waiting_for_opponent')), 1)
+
+    def test_batch_join_and_move(self):
+        """測試一個 frame 內完成加入與下棋"""
+        waiting = self.connect()
+        waiting.emit('join_pvp')
+        waiting.get_received()
+
+        bot = self.connect()
+        bot.emit('action', {'action': 'batch', 'actions': [
+            {'action': 'join_pvp'},
+            {'action': 'make_move', 'data': {'row': 1, 'col': 1}},
+        ]})
+        received = bot.get_received()
+        start = [p['args'][0] for p in received if p['name'] == 'game_start'][0]
+        moves = [p['args'][0] for p in received if p['name'] == 'move_made']
+
+        if start['your_symbol'] == start['turn']:
+            # bot 是先手，第二個 action 直接落子
+            self.assertEqual(moves, [{'row': 1, 'col': 1, 'symbol': start['your_symbol'],
+                                      'turn': [s for s in ('X', 'O') if s != start['your_symbol']][0]}])
+        else:
+            # bot 是後手，第二個 action 不是它的回合，會被拒絕
+            self.assertEqual(moves, [])
+
+    def test_invalid_batch_is_ignored(self):
+        """測試批次中有無效 action 時整批忽略"""
+        client = self.connect()
+        client.get_received()
+        client.emit('action', {'action': 'batch', 'actions': [
+            {'action': 'join_pvp'},
+            {'action': 'make_move', 'data': {'row': 'a', 'col': 1}},
+        ]})
+        self.assertEqual(client.get_received(), [])
+        self.assertEqual(GameEvents.room_manager.get_room_count(), 0)
+
+    def test_batch_limit(self):
+        """測試超過上限的批次被忽略"""
+        client = self.connect()
+        client.get_received()
+        client.emit('action', {'action': 'batch', 'actions': ['reset_game'] * 100})
+        self.assertEqual(client.get_received(), [])
+
+    def test_validate_move_data(self):
+        """測試下棋 payload 驗證"""
+        self.assertEqual(GameEvents.validate_move_data({'row': 0, 'col': 2}), {'row': 0, 'col': 2})
+        self.assertIsNone(GameEvents.validate_move_data({'row': 3, 'col': 0}))
+        self.assertIsNone(GameEvents.validate_move_data({'row': True, 'col': 0}))
+        self.assertIsNone(GameEvents.validate_move_data({'row': 1}))
+        self.assertIsNone(GameEvents.validate_move_data(None))
+        self.assertEqual(GameEvents.validate_move_data({'row': 0, 'col': 2, 'seq': 7}),
+                         {'row': 0, 'col': 2, 'seq': 7})
+        self.assertIsNone(GameEvents.validate_move_data({'row': 0, 'col': 2, 'seq': 0x10000}))
+        self.assertIsNone(GameEvents.validate_move_data({'row': 0, 'col': 2, 'seq': '7'}))
+
+
+
+class TestRoomListing(GameEventsTestCase):
+    """大廳房間列表 API 與指定房間加入的整合測試"""
+
+    def test_etag_conditional_get(self):
+        """測試房間集合沒有變動時回 304，變動後回新的列表"""
+        http = self.webapp.App.test_client()
+        self.connect().emit('join_pvp')
+
+        response = http.get('/api/rooms')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['rooms']), 1)
+        etag = response.headers['ETag']
+
+        self.assertEqual(http.get('/api/rooms', headers={'If-None-Match': etag}).status_code, 304)
+
+        self.connect().emit('join_pvp')
+        response = http.get('/api/rooms', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['rooms'][0]['status'], 'playing')
+
+    def test_invalid_status(self):
+        """測試不支援的狀態篩選回 400"""
+        http = self.webapp.App.test_client()
+        self.assertEqual(http.get('/api/rooms?status=full').status_code, 400)
+
+    def test_join_specific_room(self):
+        """測試指定 room_id 加入房間，已開始的房間回傳 room_full"""
+        host = self.connect()
+        host.emit('join_pvp')
+        room_id = self.events(host, 'waiting_for_opponent')[0]['room_id']
+
+        guest = self.connect()
+        guest.emit('join_pvp', {'room_id': room_id})
+        self.assertEqual(self.events(guest, 'game_start')[0]['room_id'], room_id)
+
+        late = self.connect()
+        late.emit('action', {'action': 'join_pvp', 'data': {'room_id': room_id}})
+        self.assertEqual(len(self.events(late, 'room_full')), 1)
+        self.assertEqual(len(GameEvents.room_manager.get_room(room_id).players), 2)
+        self.assertEqual(GameEvents.room_manager.get_room_count(), 1)
+
+    def test_validate_join_data(self):
+        """測試加入配對 payload 驗證"""
+        self.assertEqual(GameEvents.validate_join_data(None), {})
+        self.assertEqual(GameEvents.validate_join_data({'room_id': 'room_1'}), {'room_id': 'room_1'})
+        self.assertIsNone(GameEvents.validate_join_data({'room_id': 5}))
+        self.assertIsNone(GameEvents.validate_join_data('room_1'))
+
+
+class TestHotRestart(GameEventsTestCase):
+    """排空、快照與重新連線恢復棋局的整合測試"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for name, value in (('path', os.path.join(directory.name, 'rooms.snapshot')), ('draining', False)):
+            patcher = mock.patch.object(hot_restart, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_drain_and_resume(self):
+        """測試排空後拒絕配對，新行程載入快照後玩家帶權杖回到原棋局"""
+        first, second = self.start_match()
+        first.emit('make_move', {'row': 0, 'col': 0})
+        first.get_received()
+        second.get_received()
+
+        http = self.webapp.App.test_client()
+        self.assertEqual(hot_restart.drain(self.webapp.SocketIO), 1)
+        self.assertEqual(http.get('/readyz').status_code, 503)
+        tokens = [self.events(client, 'resume_token')[0]['token'] for client in (first, second)]
+
+        late = self.connect()
+        late.emit('join_pvp')
+        self.assertEqual(len(self.events(late, 'server_draining')), 1)
+        self.assertEqual(GameEvents.room_manager.get_room_count(), 1)
+
+        # 模擬新行程：清空房間後載入快照
+        GameEvents.room_manager.clear()
+        hot_restart.draining = False
+        self.assertEqual(hot_restart.restore(GameEvents.turn_scheduler), 1)
+
+        resumed = [self.connect(auth={'resume': token}) for token in tokens]
+        states = [self.events(client, 'game_resumed')[0] for client in resumed]
+        self.assertEqual(states[0]['board'][0][0], states[0]['your_symbol'])
+        self.assertNotEqual(states[0]['your_symbol'], states[1]['your_symbol'])
+
+        resumed[1].emit('make_move', {'row': 2, 'col': 2})
+        self.assertEqual(self.events(resumed[0], 'move_made')[0]['row'], 2)
+
+    def test_expire_admits_queued(self):
+        """測試逾時解散未到齊的房間後才讓排隊中的玩家遞補"""
+        first, second = self.start_match()
+        hot_restart.drain(self.webapp.SocketIO)
+        GameEvents.room_manager.clear()
+        hot_restart.draining = False
+        hot_restart.restore(GameEvents.turn_scheduler)
+        room = next(iter(GameEvents.room_manager.rooms.values()))
+        tokens = [player.resume_token for player in room.players]
+
+        release = mock.Mock()
+        hot_restart.expire(tokens, release)
+        release.assert_called_once_with([room])
+        self.assertEqual(GameEvents.room_manager.get_room_count(), 0)
+
+        # 沒有房間被解散時不處理
+        hot_restart.expire(tokens, release)
+        release.assert_called_once_with([room])
+
+    @mock.patch.object(Config, 'RECONNECT_GRACE', 15)
+    @mock.patch.object(admission, 'max_rooms', 0)
+    def test_expire_keeps_disconnected_rooms(self):
+        """測試快照逾時只解散載入的房間，一般斷線保留座位中的房間不受影響"""
+        self.start_match()
+        hot_restart.drain(self.webapp.SocketIO)
+        GameEvents.room_manager.clear()
+        hot_restart.draining = False
+        hot_restart.restore(GameEvents.turn_scheduler)
+        restored = next(iter(GameEvents.room_manager.rooms))
+        tokens = [player.resume_token for player in GameEvents.room_manager.get_room(restored).players]
+
+        first, second = self.start_match()
+        second.disconnect()
+        first.get_received()
+        hot_restart.expire(tokens)
+        self.assertIsNone(GameEvents.room_manager.get_room(restored))
+        self.assertEqual(GameEvents.room_manager.get_room_count(), 1)
+        self.assertEqual(self.events(first, 'opponent_left'), [])
+
+    def test_invalid_token(self):
+        """測試無效的恢復權杖收到 resume_failed"""
+        client = self.connect(auth={'resume': 'bogus'})
+        self.assertEqual(len(self.events(client, 'resume_failed')), 1)
+
+
+class TestAdmission(GameEventsTestCase):
+    """房間上限、等待佇列與過載拒絕的整合測試"""
+
+    def setUp(self):
+        super().setUp()
+        admission._queue.clear()
+        for name, value in (('max_rooms', 1), ('max_queue', 1), ('shed_latency', 0.5), ('latency', 0.0)):
+            patcher = mock.patch.object(admission, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_queue_then_admit(self):
+        """測試房間已滿時排隊，斷線玩家逾時未回來、房間解散後自動遞補"""
+        first, second = self.start_match()
+        queued = self.connect()
+        queued.emit('join_pvp')
+        self.assertEqual(self.events(queued, 'join_queued')[0]['position'], 1)
+
+        rejected = self.connect()
+        rejected.emit('join_pvp')
+        self.assertEqual(len(self.events(rejected, 'game_in_progress')), 1)
+
+        # 保留座位期間房間仍在，排隊中的玩家繼續等待
+        first.disconnect()
+        self.assertEqual(self.events(queued, 'waiting_for_opponent'), [])
+        self.assertEqual(len(admission), 1)
+
+        GameEvents.turn_scheduler.run_due(now=time.monotonic() + Config.RECONNECT_GRACE + 1)
+        self.assertEqual(len(self.events(queued, 'waiting_for_opponent')), 1)
+        self.assertEqual(len(admission), 0)
+
+        # 留下的玩家自動重新配對時排在遞補的玩家之後：加入其房間
+        second.emit('join_pvp')
+        self.assertEqual(len(self.events(queued, 'game_start')), 1)
+        self.assertEqual(GameEvents.room_manager.get_room_count(), 1)
+
+    def test_new_joiner_does_not_skip_queue(self):
+        """測試有玩家在排隊時，新玩家即使遇到空位也排在後面（先到先配對）"""
+        self.start_match()
+        queued = self.connect()
+        queued.emit('join_pvp')
+        self.assertEqual(self.events(queued, 'join_queued')[0]['position'], 1)
+
+        # 空出容量但尚未遞補時，新玩家加入
+        with mock.patch.object(admission, 'max_rooms', 2), mock.patch.object(admission, 'max_queue', 2):
+            newcomer = self.connect()
+            newcomer.emit('join_pvp')
+        names = [packet['name'] for packet in queued.get_received()]
+        self.assertIn('waiting_for_opponent', names)
+        self.assertIn('game_start', names)
+        self.assertEqual(self.events(newcomer, 'waiting_for_opponent'), [])
+        self.assertEqual(len(admission), 0)
+
+    @mock.patch.object(Config, 'RECONNECT_GRACE', 0)
+    def test_immediate_leave_admits(self):
+        """測試不保留座位時，玩家斷線、房間解散後立即遞補"""
+        first, second = self.start_match()
+        queued = self.connect()
+        queued.emit('join_pvp')
+        first.disconnect()
+        self.assertEqual(len(self.events(queued, 'waiting_for_opponent')), 1)
+        self.assertEqual(len(admission), 0)
+
+    def test_overload_sheds_new_load(self):
+        """測試過載時拒絕新連線與建立新房間"""
+        client = self.connect()
+        with mock.patch.object(admission, 'latency', admission.shed_latency + 1):
+            client.emit('join_pvp')
+            self.assertEqual(len(self.events(client, 'server_busy')), 1)
+            self.assertFalse(self.connect().is_connected())
+        self.assertEqual(GameEvents.room_manager.get_room_count(), 0)
+
+
+class TestReconnect(GameEventsTestCase):
+    """對戰中斷線保留座位、帶權杖重新連線的整合測試"""
+
+    def start_with_tokens(self):
+        """
+        讓兩位玩家完成配對並取出各自的 game_start
+        
+        Returns:
+            list: [(先手客戶端, game_start), (後手客戶端, game_start)]
+        """
+        a = self.connect()
+        b = self.connect()
+        a.emit('join_pvp')
+        b.emit('join_pvp')
+        players = [(client, self.events(client, 'game_start')[0]) for client in (a, b)]
+        players.sort(key=lambda item: item[1]['your_symbol'] != item[1]['turn'])
+        return players
+
+    @staticmethod
+    def count(client, name):
+        """計算客戶端收到的指定事件數（含沒有 payload 的事件）"""
+        return sum(packet['name'] == name for packet in client.get_received())
+
+    def test_reconnect_catches_up(self):
+        """測試斷線期間對手收到通知，重新連線後只補送錯過的移動"""
+        (first, _), (second, start) = self.start_with_tokens()
+        second.disconnect()
+        self.assertEqual(self.events(first, 'opponent_reconnecting'), [{'grace': Config.RECONNECT_GRACE}])
+
+        # 暫停中不能下棋
+        first.emit('make_move', {'row': 0, 'col': 0, 'seq': 1})
+        self.assertEqual(self.events(first, 'move_rejected'), [{'seq': 1}])
+
+        known = {'generation': start['generation'], 'moves': 0}
+        back = self.connect(auth={'resume': start['resume_token'], 'known': known})
+        received = back.get_received()
+        names = [packet['name'] for packet in received]
+        self.assertIn('game_caught_up', names)
+        self.assertNotIn('game_resumed', names)
+        token = next(p['args'][0]['token'] for p in received if p['name'] == 'resume_token')
+        self.assertNotEqual(token, start['resume_token'])
+        self.assertEqual(self.count(first, 'opponent_reconnected'), 1)
+
+        first.emit('make_move', {'row': 0, 'col': 0})
+        self.assertEqual(self.events(back, 'move_made')[0]['row'], 0)
+
+    def test_reconnect_snapshot_for_old_generation(self):
+        """測試客戶端的棋局代數不同時送出完整狀態，並補上錯過的移動"""
+        (first, _), (second, start) = self.start_with_tokens()
+        second.disconnect()
+        back = self.connect(auth={'resume': start['resume_token'], 'known': {'generation': -1, 'moves': 0}})
+        state = self.events(back, 'game_resumed')[0]
+        self.assertEqual(state['your_symbol'], start['your_symbol'])
+
+    def test_grace_expiry(self):
+        """測試逾時未重新連線時解散房間並通知留下的玩家"""
+        (first, _), (second, start) = self.start_with_tokens()
+        room = next(iter(GameEvents.room_manager.rooms.values()))
+        first_sid = next(player.sid for player in room.players if player.resume_token != start['resume_token'])
+        second.disconnect()
+        first.get_received()
+        GameEvents.turn_scheduler.run_due(now=time.monotonic() + Config.RECONNECT_GRACE + 1)
+        received = [packet['name'] for packet in first.get_received()]
+        self.assertEqual(received.count('opponent_left'), 1)
+        self.assertEqual(GameEvents.room_manager.get_room_count(), 0)
+        # 留下的玩家離開已解散的房間頻道並回到大廳
+        rooms = self.webapp.SocketIO.server.rooms(first_sid, namespace='/')
+        self.assertNotIn(room.room_id, rooms)
+        self.assertEqual(ChatEvents.LOBBY_ROOM in rooms, Config.LOBBY_CHAT)
+
+        back = self.connect(auth={'resume': start['resume_token']})
+        self.assertEqual(len(self.events(back, 'resume_failed')), 1)
+
+
+    def test_reconnect_bypasses_connection_cap(self):
+        """測試連線數已滿或過載時，帶著保留座位權杖的玩家仍可重新連線，其他連線被拒絕"""
+        (first, _), (second, start) = self.start_with_tokens()
+        second.disconnect()
+        with mock.patch.object(admission, 'max_sockets', 1), \
+                mock.patch.object(admission, 'latency', admission.shed_latency + 1):
+            self.assertFalse(self.connect(auth={'resume': 'bogus'}).is_connected())
+            back = self.connect(auth={'resume': start['resume_token']})
+            self.assertTrue(back.is_connected())
+            self.assertEqual(len(self.events(back, 'game_resumed')), 1)
+            self.assertEqual(self.count(first, 'opponent_reconnected'), 1)
+
+
+class TestMovePrediction(GameEventsTestCase):
+    """預測下棋（帶 seq 的 make_move）被拒絕時回覆 move_rejected 的整合測試"""
+
+    def test_rejected_with_seq(self):
+        """測試無法執行的預測移動收到帶同一序號的 move_rejected"""
+        first, second = self.start_match()
+        first.emit('make_move', {'row': 0, 'col': 0, 'seq': 1})
+        self.assertEqual(len(self.events(second, 'move_made')), 1)
+        self.assertEqual(self.events(first, 'move_rejected'), [])
+
+        # 不是自己的回合
+        first.emit('make_move', {'row': 1, 'col': 1, 'seq': 2})
+        self.assertEqual(self.events(first, 'move_rejected'), [{'seq': 2}])
+
+        # 格子已被佔用（二進位編碼同樣帶序號）
+        second.emit('make_move', WireCodec.encode('make_move', {'row': 0, 'col': 0, 'seq': 300}))
+        self.assertEqual(self.events(second, 'move_rejected'), [{'seq': 300}])
+
+    def test_no_reply_without_seq(self):
+        """測試沒有序號的移動被拒絕時不回覆"""
+        client = self.connect()
+        client.get_received()
+        client.emit('make_move', {'row': 0, 'col': 0})
+        self.assertEqual(client.get_received(), [])
+        client.emit('make_move', {'row': 0, 'col': 0, 'seq': 5})
+        self.assertEqual(self.events(client, 'move_rejected'), [{'seq': 5}])
+
+
+class TestSlowConsumer(GameEventsTestCase):
+    """送出佇列落後時略過遊戲事件並以 resync 補上的整合測試"""
+
+    def test_skip_then_resync(self):
+        """測試落後的玩家收不到 move_made，恢復後收到含最新棋盤的 resync"""
+        first, second = self.start_match()
+        room = next(iter(GameEvents.room_manager.rooms.values()))
+        state = room.get_state()
+        slow_sid = next(player['sid'] for player in state['players'] if player['symbol'] != state['turn'])
+
+        with mock.patch.object(outbound_guard, 'lagging', {slow_sid: 0}):
+            first.emit('make_move', {'row': 1, 'col': 1})
+            self.assertEqual(len(self.events(first, 'move_made')), 1)
+            self.assertEqual(self.events(second, 'move_made'), [])
+
+        GameEvents.send_resync(self.webapp.SocketIO, slow_sid)
+        resync = self.events(second, 'resync')[0]
+        self.assertEqual(resync['board'][1][1], state['turn'])
+        self.assertEqual(resync['turn'], resync['your_symbol'])
+
+
+class TestRoomChat(GameEventsTestCase):
+    """房間聊天與大廳頻道的整合測試"""
+
+    @staticmethod
+    def chat_texts(client):
+        """送出合併器中的訊息後，取出客戶端收到的聊天訊息內容（單筆與合併批次）"""
+        ChatEvents.chat_coalescer.flush_all()
+        texts = []
+        for packet in client.get_received():
+            if packet['name'] == 'chat message':
+                texts.append(packet['args'][0]['message'])
+            elif packet['name'] == 'chat messages':
+                texts.extend(entry['message'] for entry in packet['args'][0]['messages'])
+        return texts
+
+    def test_system_messages_coalesced(self):
+        """測試配對成功時的兩則系統訊息合併成一個事件"""
+        a = self.connect()
+        a.emit('join_pvp')
+        ChatEvents.chat_coalescer.flush_all()
+        b = self.connect()
+        b.emit('join_pvp')
+        ChatEvents.chat_coalescer.flush_all()
+
+        batches = self.events(b, 'chat messages')
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]['messages']), 2)
+        self.assertEqual(self.events(b, 'chat message'), [])
+
+    def test_chat_scoped_to_room(self):
+        """測試房間內的聊天只送到同房間，大廳的聊天只送到大廳"""
+        a, b = self.start_match()
+        lobby = self.connect()
+        lobby.emit('join_pvp')  # 已有遊戲進行中，留在大廳
+        self.chat_texts(a)
+        self.chat_texts(b)
+        lobby.get_received()
+
+        a.emit('chat message', {'message': 'room hello'})
+        lobby.emit('chat message', {'message': 'lobby hello'})
+
+        self.assertEqual(self.chat_texts(a), ['room hello'])
+        self.assertEqual(self.chat_texts(b), ['room hello'])
+        self.assertEqual(self.chat_texts(lobby), ['lobby hello'])
+
+    def test_banned_words_censored(self):
+        """測試聊天訊息中的禁用字被遮蔽"""
+        a, b = self.start_match()
+        self.chat_texts(b)
+        with mock.patch.object(ChatEvents.chat_filter, '_automaton', AhoCorasick(['壞蛋'])):
+            a.emit('chat message', {'message': '你這個壞蛋'})
+            a.emit('chat message', {'message': ['壞蛋']})
+        self.assertEqual(self.chat_texts(b), ['你這個**'])
+
+    def test_non_text_message_dropped(self):
+        """測試內容不是字串的聊天訊息被丟棄，數字轉成字串"""
+        a, b = self.start_match()
+        self.chat_texts(b)
+        with mock.patch.object(ChatEvents.rate_limiter, 'allow', return_value=True):
+            for message in ({'text': 'hi'}, ['bad'], None, True):
+                a.emit('chat message', {'message': message})
+            a.emit('chat message', ['bad'])
+            a.emit('chat message', {'message': 123, 'time': {'h': 1}})
+        self.assertEqual(self.chat_texts(b), ['123'])
+
+    def test_history_sent_on_join(self):
+        """測試加入房間時一次收到房間的聊天歷史"""
+        a = self.connect()
+        a.emit('join_pvp')
+        a.emit('chat message', {'message': '快來'})
+        b = self.connect()
+        b.emit('join_pvp')
+
+        history = self.events(b, 'chat history')
+        self.assertEqual(len(history), 1)
+        self.assertEqual([entry['message'] for entry in history[0]['messages']],
+                         ['請等候其他玩家加入！', '快來'])
+
+    def test_lobby_history_on_connect(self):
+        """測試連線時收到大廳的聊天歷史"""
+        self.connect().emit('chat message', {'message': 'hi lobby'})
+        late = self.connect()
+        history = self.events(late, 'chat history')
+        self.assertEqual(history[0]['room_id'], None)
+        self.assertEqual(history[0]['messages'][0]['message'], 'hi lobby')
+
+    @mock.patch.object(Config, 'RECONNECT_GRACE', 0)
+    def test_remaining_player_returns_to_lobby(self):
+        """測試對手離開後，留下的玩家回到大廳頻道"""
+        a, b = self.start_match()
+        lobby = self.connect()
+        self.chat_texts(a)
+        b.disconnect()
+        a.get_received()
+        lobby.get_received()
+
+        lobby.emit('chat message', {'message': 'back'})
+        self.assertEqual(self.chat_texts(a), ['back'])
+
+
+class TestIdentity(GameEventsTestCase):
+    """連線身分登記的整合測試"""
+
+    def login(self, username, icon='😺'):
+        """以 HTTP 登入後建立共用 cookie 的 Socket.IO 客戶端"""
+        http = self.webapp.App.test_client()
+        http.post('/login', data={'username': username, 'icon': icon})
+        return self.connect(flask_test_client=http)
+
+    def test_identity_in_game_state(self):
+        """測試登入的名稱與圖示出現在對戰資訊中"""
+        a = self.login('玩家A', '🐼')
+        b = self.login('玩家B', '🦊')
+        a.emit('join_pvp')
+        b.emit('join_pvp')
+
+        start = self.events(a, 'game_start')[0]
+        players = {start['left_player']['username']: start['left_player']['icon'],
+                   start['right_player']['username']: start['right_player']['icon']}
+        self.assertEqual(players, {'玩家A': '🐼', '玩家B': '🦊'})
+
+    def test_chat_ignores_client_username(self):
+        """測試聊天名稱取自登記的身分，不採信客戶端送來的名稱"""
+        a = self.login('玩家A')
+        a.emit('chat message', {'message': 'hi', 'username': '系統'})
+        ChatEvents.chat_coalescer.flush_all()
+        messages = self.events(a, 'chat message')
+        self.assertEqual(messages[-1]['username'], '玩家A')
+
+    def test_identity_forgotten_on_disconnect(self):
+        """測試斷線後移除身分"""
+        count = len(GameEvents.identities)
+        a = self.login('玩家A')
+        self.assertEqual(len(GameEvents.identities), count + 1)
+        a.disconnect()
+        self.assertEqual(len(GameEvents.identities), count)
+
+
+class TestTurnClock(GameEventsTestCase):
+    """伺服器端步時計時的整合測試"""
+
+    @mock.patch.object(Config, 'TURN_TIME_LIMIT', 5.0)
+    def test_timeout_broadcasts_round_end(self):
+        """測試超時後雙方收到判負的 round_end"""
+        first, second = self.start_match()
+        room = next(iter(GameEvents.room_manager.rooms.values()))
+        self.assertIsNotNone(room.clock_timer)
+
+        GameEvents.turn_scheduler.run_due(now=time.monotonic() + 10)
+
+        for client in (first, second):
+            round_end = self.events(client, 'round_end')
+            self.assertEqual(len(round_end), 1)
+            self.assertEqual(round_end[0]['timeout_side'], 'left')
+            self.assertEqual(round_end[0]['scores']['right'], 1)
+
+    @mock.patch.object(Config, 'TURN_TIME_LIMIT', 5.0)
+    def test_move_rearms_clock(self):
+        """測試下棋後舊計時器失效並輪到對手計時"""
+        first, second = self.start_match()
+        room = next(iter(GameEvents.room_manager.rooms.values()))
+        old_timer = room.clock_timer
+
+        first.emit('make_move', {'row': 0, 'col': 0})
+        self.assertTrue(old_timer.cancelled)
+        self.assertIsNot(room.clock_timer, old_timer)
+
+    @mock.patch.object(Config, 'TURN_TIME_LIMIT', 5.0)
+    def test_disconnect_cancels_clock(self):
+        """測試房間解散時取消計時器"""
+        first, second = self.start_match()
+        room = next(iter(GameEvents.room_manager.rooms.values()))
+        timer = room.clock_timer
+
+        first.disconnect()
+        self.assertTrue(timer.cancelled)
+
+
+if __name__ == '__main__':
+    unittest.main()
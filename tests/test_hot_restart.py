@@ -0,0 +1,127 @@
+"""
+test_hot_restart.py - 排空與熱重啟單元測試
+測試房間快照的匯出與還原、恢復權杖、逾時解散與快照檔讀寫
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from Config import Config
+from HotRestart import HotRestart
+from RoomManager import RoomManager
+
+
+class TestRoomSnapshot(unittest.TestCase):
+    """RoomManager 快照與恢復的單元測試"""
+
+    def setUp(self):
+        """建立一場已下一步棋的對戰"""
+        self.manager = RoomManager()
+        self.room_id = self.manager.create_room('sid_a', '玩家A', '🐼')
+        self.manager.join_room(self.room_id, 'sid_b', '玩家B')
+        self.manager.create_room('sid_c', '玩家C')  # 等待中的房間不保存
+        room = self.manager.get_room(self.room_id)
+        first = room.left_player.sid
+        self.manager.make_move(self.room_id, first, 1, 1)
+        room.scores['left'] = 2
+        self.room = room
+
+    def restore(self):
+        """把快照載入新的房間管理器（模擬新行程）"""
+        manager = RoomManager()
+        self.assertEqual(manager.restore(self.manager.snapshot()), [self.room_id])
+        return manager, manager.get_room(self.room_id)
+
+    def test_round_trip(self):
+        """測試棋盤、戰績與座位完整還原，版本號延續並遞增"""
+        manager, restored = self.restore()
+        self.assertEqual(restored.game.board, self.room.game.board)
+        self.assertEqual(restored.game.turn, self.room.game.turn)
+        self.assertEqual(restored.scores, self.room.scores)
+        self.assertEqual(restored.left_player.username, self.room.left_player.username)
+        self.assertEqual(restored.left_player.symbol, self.room.left_player.symbol)
+        self.assertGreater(restored.version, self.room.version)
+        self.assertEqual(manager.get_room_count(), 1)
+
+    def test_suspended_until_all_resume(self):
+        """測試玩家到齊前暫停下棋與計時，到齊後恢復"""
+        manager, restored = self.restore()
+        self.assertTrue(restored.suspended)
+        self.assertIsNone(restored.turn_time_left())
+
+        tokens = [player.resume_token for player in self.room.players]
+        self.assertIs(manager.resume_player(tokens[0], 'new_a'), restored)
+        self.assertTrue(restored.suspended)
+        self.assertFalse(restored.make_move('new_a', 0, 0))
+
+        manager.resume_player(tokens[1], 'new_b')
+        self.assertFalse(restored.suspended)
+        self.assertEqual(manager.get_room_by_sid('new_b'), self.room_id)
+
+    @mock.patch.object(Config, 'TURN_TIME_LIMIT', 30)
+    def test_suspended_room_elapsed(self):
+        """測試玩家斷線暫停中的房間，快照只記斷線前已用掉的秒數（暫停時間不算思考時間）"""
+        self.room.turn_started_at = time.monotonic() - 5
+        self.manager.suspend_player('sid_b')
+        self.room.turn_started_at -= 60  # 暫停 60 秒後才排空
+
+        manager, restored = self.restore()
+        for player in self.room.players:
+            manager.resume_player(player.resume_token, 'new_' + player.username)
+        self.assertFalse(restored.suspended)
+        self.assertAlmostEqual(restored.turn_time_left(), 25, delta=1)
+
+    def test_token_single_use(self):
+        """測試權杖只能使用一次，無效權杖返回 None"""
+        manager, _ = self.restore()
+        token = self.room.players[0].resume_token
+        self.assertIsNotNone(manager.resume_player(token, 'new_a'))
+        self.assertIsNone(manager.resume_player(token, 'other'))
+        self.assertIsNone(manager.resume_player('bogus', 'other'))
+
+    def test_expire_unreturned(self):
+        """測試以未使用的快照權杖解散未到齊的房間，已用過的權杖不會解散房間"""
+        manager, restored = self.restore()
+        manager.resume_player(self.room.players[0].resume_token, 'new_a')
+        self.assertIsNone(manager.expire_player(self.room.players[0].resume_token))
+        self.assertIs(manager.expire_player(self.room.players[1].resume_token), restored)
+        self.assertEqual(manager.get_room_count(), 0)
+        self.assertIsNone(manager.get_room_by_sid('new_a'))
+        self.assertIsNone(manager.resume_player(self.room.players[1].resume_token, 'new_b'))
+
+
+class TestSnapshotFile(unittest.TestCase):
+    """快照檔讀寫的單元測試"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'rooms.snapshot')
+        self.hot_restart = HotRestart(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_and_load_once(self):
+        """測試寫出後可讀回，讀取後檔案即被刪除"""
+        self.hot_restart.save({'saved_at': 1.0, 'rooms': []})
+        self.assertEqual(self.hot_restart.load()['rooms'], [])
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(self.hot_restart.load())
+
+    def test_corrupt_file(self):
+        """測試損毀的快照被忽略並刪除"""
+        with open(self.path, 'wb') as f:
+            f.write(b'not gzip')
+        self.assertIsNone(self.hot_restart.load())
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
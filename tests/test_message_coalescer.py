@@ -0,0 +1,116 @@
+"""
+test_message_coalescer.py - 外送訊息合併單元測試
+測試 MessageCoalescer.py 的時間窗、批次上限與立即送出
+"""
+
+import threading
+import time
+import unittest
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from MessageCoalescer import MessageCoalescer
+from TimerScheduler import TimerScheduler
+
+
+class FakeSocketIO:
+    """記錄 emit 的假 SocketIO（背景工作不啟動，由測試手動執行排程器）"""
+
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data, to=None):
+        self.emitted.append((event, data, to))
+
+    def start_background_task(self, target, *args):
+        pass
+
+    def sleep(self, seconds):
+        pass
+
+
+class TestMessageCoalescer(unittest.TestCase):
+    """MessageCoalescer 的單元測試"""
+
+    def setUp(self):
+        """每個測試前建立使用假時鐘的排程器與合併器"""
+        self.now = 100.0
+        self.scheduler = TimerScheduler(time_func=lambda: self.now)
+        self.socketio = FakeSocketIO()
+        self.coalescer = MessageCoalescer('chat message', 'chat messages', window=0.03, max_batch=3)
+        self.coalescer.start(self.socketio, self.scheduler)
+
+    def advance(self, seconds):
+        """推進時間並執行到期的計時器"""
+        self.now += seconds
+        self.scheduler.run_due()
+
+    def test_batches_within_window(self):
+        """測試時間窗內的訊息合併成一個陣列事件"""
+        self.coalescer.post('room_1', {'message': 'a'})
+        self.coalescer.post('room_1', {'message': 'b'})
+        self.assertEqual(self.socketio.emitted, [])
+
+        self.advance(0.03)
+        self.assertEqual(self.socketio.emitted, [
+            ('chat messages', {'messages': [{'message': 'a'}, {'message': 'b'}]}, 'room_1')
+        ])
+
+    def test_single_message_uses_plain_event(self):
+        """測試整批只有一則時以單筆事件送出"""
+        self.coalescer.post('room_1', {'message': 'a'})
+        self.advance(0.03)
+        self.assertEqual(self.socketio.emitted, [('chat message', {'message': 'a'}, 'room_1')])
+
+    def test_rooms_batched_separately(self):
+        """測試不同 room 各自合併"""
+        self.coalescer.post('room_1', {'message': 'a'})
+        self.coalescer.post('lobby', {'message': 'b'})
+        self.advance(0.03)
+        self.assertEqual(sorted(to for _, _, to in self.socketio.emitted), ['lobby', 'room_1'])
+
+    def test_max_batch_sends_immediately(self):
+        """測試達到批次上限時立即送出並取消計時器"""
+        for text in 'abc':
+            self.coalescer.post('room_1', {'message': text})
+        self.assertEqual(len(self.socketio.emitted), 1)
+        self.assertEqual(len(self.socketio.emitted[0][1]['messages']), 3)
+
+        self.advance(0.03)
+        self.assertEqual(len(self.socketio.emitted), 1)
+
+    def test_flush(self):
+        """測試手動送出尚未到期的批次"""
+        self.coalescer.post('room_1', {'message': 'a'})
+        self.coalescer.flush('room_1')
+        self.coalescer.flush('room_1')
+        self.assertEqual(self.socketio.emitted, [('chat message', {'message': 'a'}, 'room_1')])
+
+    def test_window_not_stretched_by_tick(self):
+        """測試以真實排程迴圈執行時，批次在時間窗到期後送出，不會延後到排程器的 tick"""
+        scheduler = TimerScheduler(tick=5.0)
+        sent = threading.Event()
+        socketio = FakeSocketIO()
+        socketio.start_background_task = lambda target: threading.Thread(target=target, daemon=True).start()
+        socketio.emit = lambda event, data, to=None: sent.set()
+        coalescer = MessageCoalescer('chat message', 'chat messages', window=0.03, max_batch=3)
+        coalescer.start(socketio, scheduler)
+        self.addCleanup(scheduler.stop)
+
+        started = time.monotonic()
+        coalescer.post('room_1', {'message': 'a'})
+        self.assertTrue(sent.wait(1.0))
+        self.assertGreaterEqual(time.monotonic() - started, 0.03)
+
+    def test_zero_window_disables_coalescing(self):
+        """測試時間窗為 0 時直接送出"""
+        self.coalescer.window = 0
+        self.coalescer.post('room_1', {'message': 'a'})
+        self.assertEqual(self.socketio.emitted, [('chat message', {'message': 'a'}, 'room_1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+test_metrics.py - 執行指標單元測試
+測試 Metrics.py 的直方圖、計數器與 /metrics 輸出
+"""
+
+import threading
+import unittest
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import GameEvents
+from Metrics import Metrics, metrics
+from WebApp import WebApp
+
+
+class TestMetrics(unittest.TestCase):
+    """Metrics 的單元測試"""
+
+    def setUp(self):
+        """每個測試前建立獨立的收集器"""
+        self.metrics = Metrics(prefix='test')
+
+    def test_histogram_buckets_are_cumulative(self):
+        """測試直方圖輸出為累計次數"""
+        self.metrics.observe('make_move', 0.0004)
+        self.metrics.observe('make_move', 0.003)
+        self.metrics.observe('make_move', 10)
+        text = self.metrics.render()
+
+        self.assertIn('test_handler_latency_seconds_bucket{event="make_move",le="0.0005"} 1', text)
+        self.assertIn('test_handler_latency_seconds_bucket{event="make_move",le="0.005"} 2', text)
+        self.assertIn('test_handler_latency_seconds_bucket{event="make_move",le="+Inf"} 3', text)
+        self.assertIn('test_handler_latency_seconds_count{event="make_move"} 3', text)
+
+    def test_counters_merged_across_threads(self):
+        """測試多執行緒寫入後合併正確"""
+        def work():
+            for _ in range(1000):
+                self.metrics.inc('emits_total', 'move_made')
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn('test_emits_total{event="move_made"} 8000', self.metrics.render())
+
+    def test_timed_decorator(self):
+        """測試計時裝飾器記錄次數並保留回傳值"""
+        @self.metrics.timed('join_pvp')
+        def handler(value):
+            return value * 2
+
+        self.assertEqual(handler(21), 42)
+        self.assertIn('test_handler_latency_seconds_count{event="join_pvp"} 1', self.metrics.render())
+
+    def test_gauges(self):
+        """測試抓取時才取值的指標"""
+        self.metrics.register_gauge('rooms', '房間數', lambda: {'state="waiting"': 2})
+        self.metrics.register_gauge('connected_sockets', '連線數', lambda: 5)
+        text = self.metrics.render()
+        self.assertIn('# TYPE test_rooms gauge', text)
+        self.assertIn('test_rooms{state="waiting"} 2', text)
+        self.assertIn('test_connected_sockets 5', text)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """/metrics 路由的整合測試"""
+
+    def test_metrics_route(self):
+        """測試事件處理後 /metrics 包含延遲、emit 次數與房間數"""
+        GameEvents.room_manager.clear()
+        webapp = WebApp()
+        client = webapp.SocketIO.test_client(webapp.App)
+        client.emit('join_pvp')
+
+        response = webapp.App.test_client().get('/metrics')
+        text = response.get_data(as_text=True)
+        client.disconnect()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn('tictactoe_handler_latency_seconds_count{event="join_pvp"}', text)
+        self.assertIn('tictactoe_emits_total{event="waiting_for_opponent"}', text)
+        self.assertIn('tictactoe_rooms{state="waiting"} 1', text)
+        self.assertIn('tictactoe_connected_sockets 1', text)
+        self.assertIs(metrics, sys.modules['Metrics'].metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+test_outbound_guard.py - 慢速客戶端保護單元測試
+測試 OutboundGuard.py 的落後判斷、重新同步與中斷連線
+"""
+
+import unittest
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from OutboundGuard import OutboundGuard
+from tests.helpers import FakeClock
+
+
+class FakeQueue:
+    """只提供 qsize() 的送出佇列"""
+
+    def __init__(self):
+        self.size = 0
+
+    def qsize(self):
+        return self.size
+
+
+class FakeSocket:
+    """engine.io Socket 的替身"""
+
+    def __init__(self):
+        self.queue = FakeQueue()
+
+
+class FakeEngine:
+    """engine.io Server 的替身"""
+
+    def __init__(self):
+        self.sockets = {}
+
+
+class FakeManager:
+    """socket.io 管理器的替身（eio sid 與 socket sid 對照）"""
+
+    def __init__(self):
+        self.sids = {}
+
+    def sid_from_eio_sid(self, eio_sid, namespace):
+        return self.sids.get(eio_sid)
+
+
+class FakeServer:
+    """python-socketio Server 的替身，記錄被中斷的連線"""
+
+    def __init__(self):
+        self.eio = FakeEngine()
+        self.manager = FakeManager()
+        self.disconnected = []
+
+    def add(self, sid):
+        """新增一個連線並返回其送出佇列"""
+        socket = FakeSocket()
+        self.eio.sockets['eio-' + sid] = socket
+        self.manager.sids['eio-' + sid] = sid
+        return socket.queue
+
+    def disconnect(self, sid):
+        self.disconnected.append(sid)
+
+
+class TestOutboundGuard(unittest.TestCase):
+    """OutboundGuard 的單元測試"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.guard = OutboundGuard(max_queue=10, stale_timeout=5, time_func=self.clock)
+        self.server = FakeServer()
+        self.resynced = []
+
+    def check(self):
+        self.guard.check(self.server, self.resynced.append)
+
+    def test_mark_lagging(self):
+        """測試佇列超過上限的連線被標記為落後並略過"""
+        slow = self.server.add('slow')
+        self.server.add('fast').size = 10
+        slow.size = 11
+        self.check()
+        self.assertEqual(self.guard.skip(['slow', 'fast']), ['slow'])
+
+    def test_resync_after_drain(self):
+        """測試佇列降到上限一半以下才解除落後並補送一次 resync"""
+        queue = self.server.add('slow')
+        queue.size = 20
+        self.check()
+
+        queue.size = 6
+        self.check()
+        self.assertEqual(self.resynced, [])
+        self.assertEqual(self.guard.skip(['slow']), ['slow'])
+
+        queue.size = 5
+        self.check()
+        self.assertEqual(self.resynced, ['slow'])
+        self.assertEqual(self.guard.skip(['slow']), [])
+        self.assertEqual(self.guard.resync_count, 1)
+
+    def test_disconnect_stale(self):
+        """測試落後超過 stale_timeout 秒仍未恢復時中斷連線"""
+        queue = self.server.add('slow')
+        queue.size = 20
+        self.check()
+
+        self.clock.now += 5
+        self.check()
+        self.assertEqual(self.server.disconnected, [])
+
+        self.clock.now += 1
+        self.check()
+        self.assertEqual(self.server.disconnected, ['slow'])
+        self.assertEqual(self.guard.disconnect_count, 1)
+        self.assertEqual(self.guard.lagging, {})
+
+    def test_forget(self):
+        """測試斷線後移除落後紀錄"""
+        self.server.add('slow').size = 20
+        self.check()
+        self.guard.forget('slow')
+        self.assertEqual(self.guard.skip(['slow']), [])
+
+    def test_unknown_namespace_ignored(self):
+        """測試沒有對應 socket sid 的連線不處理"""
+        self.server.eio.sockets['orphan'] = FakeSocket()
+        self.server.eio.sockets['orphan'].queue.size = 100
+        self.check()
+        self.assertEqual(self.guard.lagging, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
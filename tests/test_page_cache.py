@@ -0,0 +1,93 @@
+"""
+test_page_cache.py - 頁面片段快取單元測試
+測試 PageCache.py 的片段快取、值的跳脫與頁面路由
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+from flask import render_template
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import PageCache as page_cache_module
+from PageCache import PageCache
+from WebApp import WebApp
+
+
+class TestPageCache(unittest.TestCase):
+    """PageCache 的單元測試"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = WebApp().App
+
+    def setUp(self):
+        self.cache = PageCache()
+
+    def render_both(self, template_name, **values):
+        """同時以快取與直接渲染產生頁面"""
+        with self.app.test_request_context('/login'):
+            self.app.preprocess_request()
+            return self.cache.render(template_name, **values), render_template(template_name, **values)
+
+    def test_matches_direct_render(self):
+        """測試快取結果與直接渲染一致（含錯誤分支）"""
+        icons = ['😺', '🐶', '🐼', '🚀', '🎃']
+        for error in (None, '請輸入使用者名稱'):
+            for username in ('', '玩家A'):
+                cached, direct = self.render_both('login.html', error=error, icons=icons, username_value=username)
+                self.assertEqual(cached, direct)
+
+    def test_renders_template_once_per_shape(self):
+        """測試相同形狀的請求只渲染一次模板"""
+        with mock.patch.object(page_cache_module, 'render_template', wraps=render_template) as spy:
+            for icons in (['😺', '🐶'], ['🐼', '🚀'], ['🎃', '🐧']):
+                cached, _ = self.render_both('login.html', error=None, icons=icons, username_value='')
+                self.assertIn(f'value="{icons[1]}"', cached)
+            self.assertEqual(spy.call_count, 1)
+
+            self.render_both('login.html', error='錯誤', icons=['😺', '🐶'], username_value='')
+            self.assertEqual(spy.call_count, 2)
+
+    def test_values_are_escaped(self):
+        """測試填入的值會經過 HTML 跳脫"""
+        cached, direct = self.render_both('login.html', error='<script>', icons=['😺'], username_value='"><b>')
+        self.assertNotIn('<script>', cached)
+        self.assertIn('&#34;&gt;&lt;b&gt;', cached)
+        self.assertEqual(cached, direct)
+
+    def test_disabled_renders_directly(self):
+        """測試停用時每次都直接渲染"""
+        self.cache.enabled = False
+        with mock.patch.object(page_cache_module, 'render_template', return_value='page') as spy:
+            self.render_both('login.html', error=None, icons=[], username_value='')
+            self.render_both('login.html', error=None, icons=[], username_value='')
+        self.assertEqual(spy.call_count, 2)
+
+
+class TestPageRoutes(unittest.TestCase):
+    """登入頁與首頁的整合測試"""
+
+    def setUp(self):
+        self.client = WebApp().App.test_client()
+
+    def test_login_page_has_random_icons(self):
+        """測試登入頁每次仍有 5 個圖示"""
+        html = self.client.get('/login').get_data(as_text=True)
+        self.assertEqual(html.count('name="icon"'), 5)
+        self.assertNotIn('@@SLOT', html)
+
+    def test_home_shows_user(self):
+        """測試首頁的導覽列顯示登入者名稱與圖示"""
+        self.client.post('/login', data={'username': '玩家A', 'icon': '🐼'})
+        html = self.client.get('/').get_data(as_text=True)
+        self.assertIn('<span class="user-name">玩家A</span>', html)
+        self.assertIn('<span class="user-icon">🐼</span>', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+test_profiler.py - 線上剖析工具單元測試
+測試 Profiler.py 的取樣、自動停止、記憶體快照與管理端點權限
+"""
+
+import unittest
+from unittest import mock
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from Config import Config
+from Metrics import Metrics
+from Profiler import Profiler
+from TimerScheduler import TimerScheduler
+from WebApp import WebApp
+
+
+class TestProfiler(unittest.TestCase):
+    """Profiler 的單元測試"""
+
+    def setUp(self):
+        """每個測試前建立獨立的收集器與可控制時間的剖析器"""
+        self.now = 100.0
+        self.metrics = Metrics(prefix='test')
+        self.scheduler = TimerScheduler(time_func=lambda: self.now)
+        self.profiler = Profiler(hook_target=self.metrics, time_func=lambda: self.now,
+                                 scheduler=self.scheduler)
+
+        @self.metrics.timed('make_move')
+        def handler(value):
+            return sorted(range(value))[-1]
+
+        self.handler = handler
+
+    def tearDown(self):
+        self.profiler.stop_memory_trace()
+
+    def test_no_hook_while_off(self):
+        """測試未開啟時不掛 hook"""
+        self.assertIsNone(self.metrics.call_hook)
+        self.assertFalse(self.profiler.active)
+        self.assertEqual(self.handler(10), 9)
+        self.assertEqual(self.profiler.calls, {})
+
+    def test_profiles_sampled_calls(self):
+        """測試取樣比例為 1 時每次呼叫都被剖析並彙整"""
+        self.profiler.start(duration=10, sample_rate=1)
+        for _ in range(3):
+            self.assertEqual(self.handler(10), 9)
+
+        self.assertEqual(self.profiler.calls, {'make_move': 3})
+        report = self.profiler.report(sort='tottime')
+        self.assertIn('===== make_move (3 calls) =====', report)
+        self.assertIn('sorted', report)
+
+    def test_sample_rate_zero_skips(self):
+        """測試取樣比例為 0 時不剖析"""
+        self.profiler.start(duration=10, sample_rate=0)
+        self.handler(10)
+        self.assertEqual(self.profiler.calls, {})
+
+    def test_stops_after_duration(self):
+        """測試時間到時由排程器移除 hook 並關閉 tracemalloc"""
+        self.profiler.start(duration=5, sample_rate=1, trace_memory=True)
+        self.assertEqual(self.profiler.status()['remaining'], 5)
+        self.now += 4
+        self.scheduler.run_due()
+        self.assertTrue(self.profiler.active)
+
+        self.now += 1
+        self.scheduler.run_due()
+        self.assertFalse(self.profiler.active)
+        self.assertIsNone(self.metrics.call_hook)
+        self.assertFalse(self.profiler.status()['tracing_memory'])
+        self.assertEqual(self.handler(10), 9)
+        self.assertEqual(self.profiler.calls, {})
+
+    def test_restart_cancels_old_expiry(self):
+        """測試重新開始剖析時，上一輪的結束計時器不會提早停止新一輪"""
+        self.profiler.start(duration=5, sample_rate=1)
+        self.now += 3
+        self.profiler.start(duration=5, sample_rate=1)
+        self.now += 3
+        self.scheduler.run_due()
+        self.assertTrue(self.profiler.active)
+        self.profiler.stop()
+        self.assertEqual(self.scheduler.run_due(now=self.now + 10), 0)
+
+    def test_invalid_sort_falls_back(self):
+        """測試無效的排序鍵不會造成錯誤"""
+        self.profiler.start(duration=10, sample_rate=1)
+        self.handler(10)
+        self.assertIn('make_move', self.profiler.report(sort='nope'))
+
+    def test_memory_report(self):
+        """測試記憶體快照只在 tracemalloc 開啟時產生"""
+        self.assertIn('未開啟', self.profiler.memory_report())
+        self.profiler.start_memory_trace()
+        self.assertIn('room modules total', self.profiler.memory_report())
+        self.profiler.stop_memory_trace()
+        self.assertIn('未開啟', self.profiler.memory_report())
+
+
+class TestAdminEndpoints(unittest.TestCase):
+    """管理端點的權限測試"""
+
+    def setUp(self):
+        """以設定好的 ADMIN_TOKEN 建立應用（未設定時不註冊管理端點）"""
+        patcher = mock.patch.object(Config, 'ADMIN_TOKEN', 'secret')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = WebApp().App.test_client()
+
+    def test_disabled_without_token(self):
+        """測試未設定 ADMIN_TOKEN 時端點不存在"""
+        with mock.patch.object(Config, 'ADMIN_TOKEN', ''):
+            client = WebApp().App.test_client()
+            self.assertEqual(client.get('/admin/profile').status_code, 404)
+            # 已註冊的端點在權杖被清空後同樣回 404
+            self.assertEqual(self.client.get('/admin/profile').status_code, 404)
+
+    def test_rejects_wrong_token(self):
+        """測試權杖錯誤時拒絕"""
+        response = self.client.get('/admin/profile', headers={'X-Admin-Token': 'wrong'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_start_and_stop(self):
+        """測試以正確權杖開始與停止剖析"""
+        headers = {'X-Admin-Token': 'secret'}
+        response = self.client.post('/admin/profile/start?duration=5&sample=0.5', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['active'])
+        self.assertEqual(response.get_json()['sample_rate'], 0.5)
+
+        response = self.client.post('/admin/profile/stop', headers=headers)
+        self.assertFalse(response.get_json()['active'])
+        self.assertEqual(self.client.get('/admin/memory', headers=headers).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
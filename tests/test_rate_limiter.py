@@ -0,0 +1,65 @@
+"""
+test_rate_limiter.py - 事件限流單元測試
+測試 RateLimiter.py 的 token bucket 行為與拒絕計數
+"""
+
+import unittest
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from RateLimiter import RateLimiter
+from tests.helpers import FakeClock
+
+
+class TestRateLimiter(unittest.TestCase):
+    """RateLimiter 的單元測試"""
+
+    def setUp(self):
+        """每個測試前建立限流器：下棋每秒 2 次、最多累積 3 次"""
+        self.clock = FakeClock(0.0)
+        self.limiter = RateLimiter({'make_move': (2, 3), 'chat message': (0, 5)}, time_func=self.clock)
+
+    def test_burst_then_reject(self):
+        """測試瞬間可用完 burst，之後被拒絕並計數"""
+        results = [self.limiter.allow('sid_a', 'make_move') for _ in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(self.limiter.get_rejected_counts(), {'make_move': 2})
+
+    def test_refill(self):
+        """測試 token 依速率補充且不超過 burst"""
+        for _ in range(3):
+            self.limiter.allow('sid_a', 'make_move')
+        self.clock.now += 0.5  # 補充 1 個
+        self.assertTrue(self.limiter.allow('sid_a', 'make_move'))
+        self.assertFalse(self.limiter.allow('sid_a', 'make_move'))
+
+        self.clock.now += 100  # 最多補滿 3 個
+        results = [self.limiter.allow('sid_a', 'make_move') for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_buckets_are_per_sid(self):
+        """測試不同連線各自計算"""
+        for _ in range(3):
+            self.limiter.allow('sid_a', 'make_move')
+        self.assertFalse(self.limiter.allow('sid_a', 'make_move'))
+        self.assertTrue(self.limiter.allow('sid_b', 'make_move'))
+
+    def test_unlimited_events(self):
+        """測試速率為 0 或未設定的事件不限流"""
+        for _ in range(100):
+            self.assertTrue(self.limiter.allow('sid_a', 'chat message'))
+            self.assertTrue(self.limiter.allow('sid_a', 'join_pvp'))
+        self.assertEqual(self.limiter.buckets, {})
+
+    def test_forget(self):
+        """測試斷線後移除 bucket"""
+        self.limiter.allow('sid_a', 'make_move')
+        self.limiter.forget('sid_a')
+        self.assertEqual(self.limiter.buckets, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
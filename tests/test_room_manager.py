@@ -0,0 +1,292 @@
+"""
+test_room_manager.py - 房間管理單元測試
+測試 RoomManager.py 的房間狀態管理與快取
+"""
+
+import json
+import unittest
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import mock
+
+from Config import Config
+from RoomManager import RoomManager
+
+
+class TestGameRoomState(unittest.TestCase):
+    """GameRoom 狀態快取的單元測試"""
+
+    def setUp(self):
+        """每個測試前建立一個已開始的房間"""
+        self.manager = RoomManager()
+        self.room_id = self.manager.create_room('sid_a', '玩家A')
+        self.manager.join_room(self.room_id, 'sid_b', '玩家B')
+        self.room = self.manager.get_room(self.room_id)
+
+    def _current_sid(self):
+        """取得目前輪到的玩家 sid"""
+        for player in self.room.players:
+            if player.symbol == self.room.game.turn:
+                return player.sid
+        return None
+
+    def test_left_player_moves_first(self):
+        """測試配對完成後由左玩家先手"""
+        state = self.room.get_state()
+        self.assertEqual(state['turn'], state['left_player']['symbol'])
+
+    def test_state_cached_until_change(self):
+        """測試狀態未變動時回傳同一份快取"""
+        first = self.room.get_state()
+        self.assertIs(self.room.get_state(), first)
+
+    def test_move_invalidates_cache(self):
+        """測試下棋後快取失效且內容正確"""
+        before = self.room.get_state()
+        version = self.room.version
+
+        self.assertTrue(self.room.make_move(self._current_sid(), 1, 1))
+        after = self.room.get_state()
+
+        self.assertGreater(self.room.version, version)
+        self.assertIsNot(after, before)
+        self.assertIsNone(before['board'][1][1])  # 舊快取不受影響
+        self.assertIsNotNone(after['board'][1][1])
+
+    def test_encoded_payload_per_version(self):
+        """測試同一版本的廣播 payload 只編碼一次，狀態變動後重新編碼"""
+        build = lambda state: {'turn': state['turn']}
+        first = self.room.get_encoded('game_reset', build)
+        self.assertIs(self.room.get_encoded('game_reset', build), first)
+        self.assertEqual(json.loads(first.text), {'turn': self.room.get_state()['turn']})
+
+        self.assertTrue(self.room.make_move(self._current_sid(), 1, 1))
+        after = self.room.get_encoded('game_reset', build)
+        self.assertIsNot(after, first)
+        self.assertEqual(after.payload['turn'], self.room.get_state()['turn'])
+
+    def test_failed_move_keeps_cache(self):
+        """測試無效移動不會讓快取失效"""
+        before = self.room.get_state()
+        self.assertFalse(self.room.make_move(self._current_sid(), 5, 5))
+        self.assertIs(self.room.get_state(), before)
+
+    def test_reset_and_new_match_invalidate_cache(self):
+        """測試重置回合與開始新比賽都會更新狀態"""
+        self.room.scores['left'] = 3
+        self.room.mark_dirty()
+        self.room.reset()
+        self.assertTrue(self.room.get_state()['match_finished'])
+
+        self.room.start_new_match()
+        state = self.room.get_state()
+        self.assertFalse(state['match_finished'])
+        self.assertEqual(state['scores'], {'left': 0, 'right': 0, 'draw': 0})
+        self.assertEqual(state['turn'], state['left_player']['symbol'])
+
+
+
+class TestGameRoomClock(unittest.TestCase):
+    """GameRoom 計時的單元測試"""
+
+    def setUp(self):
+        """每個測試前建立一個已開始的房間（時間從 0 開始）"""
+        for name, value in (('TURN_TIME_LIMIT', 30.0), ('MATCH_TIME_BASE', 60.0),
+                            ('MATCH_TIME_INCREMENT', 2.0)):
+            patcher = mock.patch.object(Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = RoomManager()
+        room_id = self.manager.create_room('sid_a', '玩家A')
+        self.manager.join_room(room_id, 'sid_b', '玩家B')
+        self.room = self.manager.get_room(room_id)
+        self.room.start_new_match()
+        self.room.turn_started_at = 0.0
+
+    def _sid_of(self, side):
+        """取得指定座位的 sid"""
+        return self.room.left_player.sid if side == 'left' else self.room.right_player.sid
+
+    def test_turn_limit(self):
+        """測試單步限時比比賽剩餘時間短時取單步限時"""
+        self.assertEqual(self.room.turn_time_left(now=10.0), 20.0)
+
+    def test_move_charges_clock_with_increment(self):
+        """測試下棋扣除用時並加秒"""
+        self.assertTrue(self.room.make_move(self._sid_of('left'), 0, 0, now=10.0))
+        self.assertEqual(self.room.clock['left'], 52.0)
+        self.assertEqual(self.room.turn_started_at, 10.0)
+
+    def test_turn_timeout_counts_as_loss(self):
+        """測試單步超時本回合判負並計入戰績"""
+        self.assertTrue(self.room.timeout(now=30.0))
+        state = self.room.get_state()
+        self.assertEqual(state['winner'], self.room.right_player.symbol)
+        self.assertEqual(state['scores'], {'left': 0, 'right': 1, 'draw': 0})
+        self.assertEqual(state['timeout_side'], 'left')
+        self.assertIsNone(state['forfeit_side'])
+        self.assertFalse(state['match_finished'])
+        self.assertIsNone(self.room.turn_time_left(now=31.0))
+
+    def test_match_clock_exhausted_ends_match(self):
+        """測試比賽時間用完直接結束比賽"""
+        self.room.clock['left'] = 5.0
+        self.assertEqual(self.room.turn_time_left(now=0.0), 5.0)
+        self.assertTrue(self.room.timeout(now=5.0))
+        state = self.room.get_state()
+        self.assertEqual(state['forfeit_side'], 'left')
+        self.assertTrue(state['match_finished'])
+        self.assertEqual(state['scores']['right'], 1)
+
+    def test_reset_clears_timeout(self):
+        """測試下一回合清除超時標記，新比賽重置時間"""
+        self.room.timeout(now=30.0)
+        self.room.reset()
+        self.assertIsNone(self.room.timeout_side)
+        self.room.start_new_match()
+        self.assertEqual(self.room.clock, {'left': 60.0, 'right': 60.0})
+
+    def test_timeout_when_round_over(self):
+        """測試回合已結束時不會再判超時"""
+        self.room.timeout(now=30.0)
+        self.assertFalse(self.room.timeout(now=60.0))
+
+
+class TestChatHistory(unittest.TestCase):
+    """房間與大廳聊天歷史的單元測試"""
+
+    def setUp(self):
+        """每個測試前以較小的歷史長度建立房間管理器"""
+        with mock.patch.object(Config, 'CHAT_HISTORY_SIZE', 3):
+            self.manager = RoomManager()
+            self.room_id = self.manager.create_room('sid_a', '玩家A')
+
+    def test_ring_buffer_keeps_latest(self):
+        """測試超過上限時只保留最新的訊息"""
+        for i in range(5):
+            self.manager.add_chat_message(self.room_id, {'message': str(i)})
+        history = self.manager.get_chat_history(self.room_id)
+        self.assertEqual([entry['message'] for entry in history], ['2', '3', '4'])
+
+    def test_lobby_separate_from_room(self):
+        """測試大廳與房間的歷史互不影響"""
+        self.manager.add_chat_message(None, {'message': 'lobby'})
+        self.assertEqual(self.manager.get_chat_history(None), [{'message': 'lobby'}])
+        self.assertEqual(self.manager.get_chat_history(self.room_id), [])
+
+    def test_unknown_room(self):
+        """測試房間不存在時不記錄"""
+        self.assertFalse(self.manager.add_chat_message('missing', {'message': 'x'}))
+        self.assertEqual(self.manager.get_chat_history('missing'), [])
+
+
+class TestRoomListing(unittest.TestCase):
+    """大廳房間列表索引的單元測試"""
+
+    def setUp(self):
+        self.manager = RoomManager()
+        self.room_ids = [self.manager.create_room(f'sid_{i}', f'玩家{i}') for i in range(5)]
+
+    def test_pages_in_creation_order(self):
+        """測試依建立順序分頁，最後一頁沒有游標"""
+        rooms, cursor = self.manager.list_rooms(limit=2)
+        self.assertEqual([room['room_id'] for room in rooms], self.room_ids[:2])
+        rooms, cursor = self.manager.list_rooms(cursor=cursor, limit=2)
+        self.assertEqual([room['room_id'] for room in rooms], self.room_ids[2:4])
+        rooms, cursor = self.manager.list_rooms(cursor=cursor, limit=2)
+        self.assertEqual([room['room_id'] for room in rooms], self.room_ids[4:])
+        self.assertIsNone(cursor)
+
+    def test_cursor_stable_after_removal(self):
+        """測試房間被刪除後游標仍然有效，不會重複或跳過"""
+        rooms, cursor = self.manager.list_rooms(limit=2)
+        self.manager.leave_room('sid_1')
+        self.manager.leave_room('sid_2')
+        rooms, cursor = self.manager.list_rooms(cursor=cursor, limit=2)
+        self.assertEqual([room['room_id'] for room in rooms], self.room_ids[3:5])
+
+    def test_status_filter_and_version(self):
+        """測試加入房間後狀態更新並遞增版本號"""
+        version = self.manager.rooms_version
+        self.manager.join_room(self.room_ids[1], 'sid_x', '玩家X', '🐼')
+        self.assertGreater(self.manager.rooms_version, version)
+
+        playing, _ = self.manager.list_rooms(status='playing')
+        self.assertEqual([room['room_id'] for room in playing], [self.room_ids[1]])
+        self.assertEqual(playing[0]['players'][1], {'username': '玩家X', 'icon': '🐼'})
+        waiting, _ = self.manager.list_rooms(status='waiting')
+        self.assertEqual(len(waiting), 4)
+
+    def test_clear_bumps_version(self):
+        """測試清除所有房間後列表為空且版本號遞增"""
+        version = self.manager.rooms_version
+        self.manager.clear()
+        self.assertEqual(self.manager.list_rooms(), ([], None))
+        self.assertGreater(self.manager.rooms_version, version)
+
+
+class TestReconnect(unittest.TestCase):
+    """對戰中斷線保留座位、重新連線補送移動的單元測試"""
+
+    def setUp(self):
+        """建立一場已下一步棋的對戰"""
+        self.manager = RoomManager()
+        self.room_id = self.manager.create_room('sid_a', '玩家A')
+        self.manager.join_room(self.room_id, 'sid_b', '玩家B')
+        self.room = self.manager.get_room(self.room_id)
+        self.manager.make_move(self.room_id, self.room.left_player.sid, 0, 0)
+
+    def test_suspend_and_resume(self):
+        """測試斷線後房間暫停，帶權杖回來後換發新權杖"""
+        token = self.manager.suspend_player('sid_b')
+        self.assertTrue(self.room.suspended)
+        self.assertIsNone(self.manager.get_room_by_sid('sid_b'))
+
+        self.assertIs(self.manager.resume_player(token, 'sid_b2'), self.room)
+        self.assertFalse(self.room.suspended)
+        self.assertNotEqual(self.room.get_player_by_sid('sid_b2').resume_token, token)
+        self.assertIsNone(self.manager.resume_player(token, 'sid_b3'))
+
+    def test_waiting_room_not_suspended(self):
+        """測試等待中的房間斷線時不保留座位"""
+        self.manager.create_room('sid_c', '玩家C')
+        self.assertIsNone(self.manager.suspend_player('sid_c'))
+
+    def test_expire_player(self):
+        """測試逾時未回來時解散房間，已回來的權杖不再生效"""
+        token = self.manager.suspend_player('sid_b')
+        self.assertIs(self.manager.expire_player(token), self.room)
+        self.assertEqual(self.manager.get_room_count(), 0)
+        self.assertIsNone(self.manager.get_room_by_sid('sid_a'))
+        self.assertIsNone(self.manager.expire_player(token))
+
+    def test_leave_drops_suspended_token(self):
+        """測試留下的玩家離開而解散房間時，一併移除斷線玩家的恢復權杖"""
+        token = self.manager.suspend_player('sid_b')
+        self.assertEqual(self.manager.leave_room('sid_a'), self.room_id)
+        self.assertEqual(self.manager.get_room_count(), 0)
+        self.assertEqual(self.manager._resume_tokens, {})
+        self.assertIsNone(self.manager.resume_player(token, 'sid_b2'))
+
+    def test_missed_moves(self):
+        """測試同一局只補送錯過的移動，不同局或已結束的回合改送完整狀態"""
+        generation = self.room.game.generation
+        symbol = self.room.game.board[0][0]
+        self.assertEqual(self.room.get_missed_moves({'generation': generation, 'moves': 0}), [
+            {'row': 0, 'col': 0, 'symbol': symbol, 'turn': 'O' if symbol == 'X' else 'X'}
+        ])
+        self.assertEqual(self.room.get_missed_moves({'generation': generation, 'moves': 1}), [])
+        self.assertIsNone(self.room.get_missed_moves({'generation': generation, 'moves': 2}))
+        self.assertIsNone(self.room.get_missed_moves({'generation': generation - 1, 'moves': 0}))
+        self.assertIsNone(self.room.get_missed_moves(None))
+
+        self.room.game.forfeit(self.room.game.turn)
+        self.assertIsNone(self.room.get_missed_moves({'generation': generation, 'moves': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
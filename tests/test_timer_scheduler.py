@@ -0,0 +1,115 @@
+"""
+test_timer_scheduler.py - 共用計時排程器單元測試
+測試 TimerScheduler.py 的排程、取消與到期執行
+"""
+
+import threading
+import time
+import unittest
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from TimerScheduler import TimerScheduler
+from tests.helpers import FakeClock
+
+
+class TestTimerScheduler(unittest.TestCase):
+    """TimerScheduler 的單元測試"""
+
+    def setUp(self):
+        """每個測試前建立使用假時鐘的排程器"""
+        self.clock = FakeClock()
+        self.scheduler = TimerScheduler(time_func=self.clock)
+        self.fired = []
+
+    def test_fires_in_deadline_order(self):
+        """測試計時器依到期時間順序觸發"""
+        self.scheduler.schedule(3, self.fired.append, 'c')
+        self.scheduler.schedule(1, self.fired.append, 'a')
+        self.scheduler.schedule(2, self.fired.append, 'b')
+
+        self.clock.now += 2
+        self.assertEqual(self.scheduler.run_due(), 2)
+        self.assertEqual(self.fired, ['a', 'b'])
+
+        self.clock.now += 1
+        self.scheduler.run_due()
+        self.assertEqual(self.fired, ['a', 'b', 'c'])
+
+    def test_not_fired_before_deadline(self):
+        """測試未到期的計時器不會觸發"""
+        self.scheduler.schedule(5, self.fired.append, 'x')
+        self.clock.now += 4.9
+        self.assertEqual(self.scheduler.run_due(), 0)
+        self.assertEqual(self.fired, [])
+
+    def test_cancel(self):
+        """測試取消後不會觸發，且會在到期時清除"""
+        handle = self.scheduler.schedule(1, self.fired.append, 'x')
+        handle.cancel()
+        self.clock.now += 1
+        self.assertEqual(self.scheduler.run_due(), 0)
+        self.assertEqual(self.fired, [])
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+    def test_callback_can_reschedule(self):
+        """測試 callback 內可以再排程（不會死結）"""
+        def reschedule():
+            self.fired.append('first')
+            self.scheduler.schedule(1, self.fired.append, 'second')
+
+        self.scheduler.schedule(1, reschedule)
+        self.clock.now += 1
+        self.scheduler.run_due()
+        self.clock.now += 1
+        self.scheduler.run_due()
+        self.assertEqual(self.fired, ['first', 'second'])
+
+    def test_many_timers(self):
+        """測試大量計時器共用一個排程器"""
+        for i in range(10000):
+            self.scheduler.schedule(i % 10, self.fired.append, i)
+        self.clock.now += 10
+        self.assertEqual(self.scheduler.run_due(), 10000)
+
+
+class ThreadSocketIO:
+    """以真正的執行緒執行背景工作的 SocketIO 替身"""
+
+    @staticmethod
+    def start_background_task(target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        return thread
+
+
+class TestSchedulerLoop(unittest.TestCase):
+    """背景排程迴圈的單元測試（使用真實時間）"""
+
+    def setUp(self):
+        """以很長的 tick 啟動迴圈：計時器準時觸發只能靠喚醒，而不是固定間隔的檢查"""
+        self.scheduler = TimerScheduler(tick=5.0)
+        self.scheduler.start(ThreadSocketIO())
+        self.addCleanup(self.scheduler.stop)
+        time.sleep(0.01)  # 讓迴圈進入等待
+
+    def test_short_timer_wakes_loop(self):
+        """測試排入比目前等待更早到期的計時器時立即喚醒，於到期時間附近觸發"""
+        fired = threading.Event()
+        started = time.monotonic()
+        self.scheduler.schedule(0.03, fired.set)
+        self.assertTrue(fired.wait(1.0))
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_callback_scheduled_during_run(self):
+        """測試計時器執行中排入的 0 秒計時器不必等到下一個 tick"""
+        fired = threading.Event()
+        self.scheduler.schedule(0.01, lambda: self.scheduler.schedule(0, fired.set))
+        self.assertTrue(fired.wait(1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+test_webapp.py - 應用工廠與健康檢查端點測試
+測試 create_app()、/healthz、/readyz 與可選子系統的延遲載入
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from flask_socketio import SocketIO
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import WebApp as webapp_module
+from ChatFilter import chat_filter
+from WebApp import create_app
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+
+class TestAppFactory(unittest.TestCase):
+    """create_app() 與健康檢查端點的測試"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+
+    def setUp(self):
+        self.client = self.app.test_client()
+
+    def test_factory_exposes_socketio(self):
+        """測試工廠返回的應用帶有 SocketIO 擴充"""
+        self.assertIn('socketio', self.app.extensions)
+
+    def test_healthz(self):
+        """測試存活檢查永遠回 200"""
+        response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'status': 'ok'})
+
+    def test_readyz_ready(self):
+        """測試初始化完成且排程器執行中時回 200"""
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['status'], 'ready')
+        self.assertTrue(data['checks']['initialized'])
+        self.assertTrue(data['checks']['scheduler'])
+
+    def test_readyz_not_ready(self):
+        """測試排程器未執行時回 503 並列出失敗的檢查"""
+        with mock.patch.object(type(webapp_module.turn_scheduler), 'running',
+                               new_callable=mock.PropertyMock, return_value=False):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.get_json()['checks']['scheduler'])
+
+    def test_eventlet_connection_limit(self):
+        """測試 eventlet 模式提高 WSGI 伺服器的同時連線上限（預設 1024 會限制 WebSocket 連線數）"""
+        socketio = self.app.extensions['socketio']
+        webapp = webapp_module.WebApp.__new__(webapp_module.WebApp)
+        webapp.SocketIO = socketio
+        self.assertEqual(webapp.server_options(), {})
+        with mock.patch.object(socketio, 'async_mode', 'eventlet'):
+            self.assertEqual(webapp.server_options(), {'max_size': webapp_module.EVENTLET_MAX_CONNECTIONS})
+
+    def test_optional_subsystems_start_in_background(self):
+        """測試設定禁用字清單時，建構應用不等待清單編譯，背景載入完成後才就緒"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'words.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('壞蛋\n')
+            tasks = []
+            with mock.patch.object(chat_filter, 'path', path), \
+                    mock.patch.object(chat_filter, '_automaton', None), \
+                    mock.patch.object(chat_filter, '_watching', True), \
+                    mock.patch.object(SocketIO, 'start_background_task',
+                                      lambda socketio, target, *args: tasks.append(target)):
+                client = create_app().test_client()
+                self.assertEqual(client.get('/readyz').status_code, 503)
+                self.assertEqual(chat_filter.word_count, 0)
+
+                for task in tasks:
+                    if task.__name__ == '_start_optional_subsystems':
+                        task()
+                self.assertEqual(chat_filter.word_count, 1)
+                self.assertEqual(client.get('/readyz').status_code, 200)
+
+    def test_optional_modules_not_loaded(self):
+        """測試匯入 WebApp 不會載入剖析器與 sqlite3（以全新子行程檢查）"""
+        code = (
+            'import sys, WebApp\n'
+            "print(','.join(m for m in ('Profiler', 'cProfile', 'tracemalloc', 'sqlite3') if m in sys.modules))\n"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code], cwd=ROOT_DIR,
+            env=dict(os.environ, ADMIN_TOKEN='', CHAT_ARCHIVE_PATH=''),
+            check=True, capture_output=True, text=True
+        ).stdout
+        self.assertEqual(output.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+test_wire_codec.py - 二進位編碼單元測試
+測試 WireCodec.py 的打包、解包與協商
+"""
+
+import json
+import unittest
+import sys
+import os
+
+# 添加 app 目錄到路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import WireCodec
+
+
+class TestWireCodec(unittest.TestCase):
+    """WireCodec 的單元測試"""
+
+    def test_make_move_round_trip(self):
+        """測試下棋請求打包後為 2 bytes 並可還原"""
+        data = WireCodec.encode('make_move', {'row': 2, 'col': 1})
+        self.assertEqual(len(data), 2)
+        self.assertEqual(WireCodec.decode('make_move', data), {'row': 2, 'col': 1})
+
+    def test_make_move_with_seq(self):
+        """測試帶序號的下棋請求打包後為 4 bytes 並可還原"""
+        payload = {'row': 0, 'col': 2, 'seq': 513}
+        data = WireCodec.encode('make_move', payload)
+        self.assertEqual(len(data), 4)
+        self.assertEqual(WireCodec.decode('make_move', data), payload)
+
+    def test_move_made_round_trip(self):
+        """測試下棋結果打包後為 4 bytes 並可還原"""
+        payload = {'row': 1, 'col': 1, 'symbol': 'X', 'turn': 'O'}
+        data = WireCodec.encode('move_made', payload)
+        self.assertEqual(len(data), 4)
+        self.assertEqual(WireCodec.decode('move_made', data), payload)
+
+    def test_round_end_round_trip(self):
+        """測試回合結束（含多條連線）可還原"""
+        payload = {
+            'winner': 'X',
+            'scores': {'left': 2, 'right': 1, 'draw': 1},
+            'round_count': 3,
+            'match_finished': False,
+            'winning_lines': [[[0, 0], [0, 1], [0, 2]], [[0, 0], [1, 0], [2, 0]]],
+            'timeout_side': None,
+            'forfeit_side': None
+        }
+        data = WireCodec.encode('round_end', payload)
+        self.assertEqual(WireCodec.decode('round_end', data), payload)
+
+    def test_round_end_draw(self):
+        """測試平局沒有連線"""
+        payload = {
+            'winner': 'Draw',
+            'scores': {'left': 0, 'right': 0, 'draw': 1},
+            'round_count': 0,
+            'match_finished': False,
+            'winning_lines': [],
+            'timeout_side': None,
+            'forfeit_side': None
+        }
+        self.assertEqual(WireCodec.decode('round_end', WireCodec.encode('round_end', payload)), payload)
+
+    def test_round_end_timeout_flags(self):
+        """測試超時與比賽判負的 flags"""
+        payload = {
+            'winner': 'O',
+            'scores': {'left': 1, 'right': 2, 'draw': 0},
+            'round_count': 2,
+            'match_finished': True,
+            'winning_lines': [],
+            'timeout_side': 'left',
+            'forfeit_side': 'left'
+        }
+        self.assertEqual(WireCodec.decode('round_end', WireCodec.encode('round_end', payload)), payload)
+
+    def test_decode_malformed(self):
+        """測試格式錯誤的資料返回 None"""
+        self.assertIsNone(WireCodec.decode('make_move', b'\x01'))
+        self.assertIsNone(WireCodec.decode('move_made', b'\x01\x01\x09\x01'))
+        self.assertIsNone(WireCodec.decode('round_end', b'\x01\x00\x00\x00\x00\x00\x01\x03\x00'))
+
+    def test_negotiate(self):
+        """測試編碼協商"""
+        self.assertEqual(WireCodec.negotiate('binary', True), WireCodec.CODEC_BINARY)
+        self.assertEqual(WireCodec.negotiate('binary', False), WireCodec.CODEC_JSON)
+        self.assertEqual(WireCodec.negotiate(None, True), WireCodec.CODEC_JSON)
+
+
+class TestPacketJSON(unittest.TestCase):
+    """預先編碼 payload 與封包 JSON 模組的單元測試"""
+
+    def test_encoded_payload_embedded(self):
+        """測試封包直接嵌入已編碼的 payload，結果與一般編碼相同"""
+        payload = {'turn': 'X', 'scores': {'left': 1, 'right': 0}, 'name': '玩家'}
+        encoded = WireCodec.EncodedPayload(payload)
+        text = WireCodec.PacketJSON.dumps(['game_reset', encoded], separators=(',', ':'))
+        self.assertEqual(text, json.dumps(['game_reset', payload], separators=(',', ':')))
+        self.assertEqual(WireCodec.PacketJSON.loads(text), ['game_reset', payload])
+
+    def test_other_data_unchanged(self):
+        """測試一般資料交給標準 json"""
+        self.assertEqual(WireCodec.PacketJSON.dumps(['chat message', {'a': [1]}]), '["chat message", {"a": [1]}]')
+
+
+if __name__ == '__main__':
+    unittest.main()